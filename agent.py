@@ -1,19 +1,295 @@
 # agent.py - LangChain Optimized Version
-from typing import List, Dict, Any
+import asyncio
+import contextvars
+import logging
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, AsyncIterator, Callable, Iterable, Tuple, Optional
+from uuid import UUID
 from langchain.agents import AgentExecutor, create_react_agent
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.prompts import PromptTemplate
 from langchain_core.tools import BaseTool
 from langchain.schema import SystemMessage
-from langchain_tools import SearchTool
-from config import OLLAMA_CONFIG, OPENAI_API_CONFIG
+from langchain_tools import SearchTool, count_tokens
+from config import OLLAMA_CONFIG, OPENAI_API_CONFIG, AGENT_CONFIG, PAGE_FETCH_CONFIG, ANSWER_CACHE_CONFIG
+from search_engines import TieredCache
+from search_engines.cache import normalize_query
+from semantic_cache import get_semantic_cache
+from tracing import Span, current_span, get_metrics, get_tracer, set_attribute, set_current_span, tracing_enabled
+
+logger = logging.getLogger(__name__)
+
+
+# Marks the end of a token stream
+_STREAM_END = object()
+
+
+_answer_cache: Optional[TieredCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[TieredCache]:
+    """Get the process-wide final answer cache, or None if answer caching is disabled."""
+    global _answer_cache
+    if not ANSWER_CACHE_CONFIG["enabled"]:
+        return None
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = TieredCache(
+                    path=ANSWER_CACHE_CONFIG["path"],
+                    memory_max_entries=ANSWER_CACHE_CONFIG["memory_max_entries"],
+                    disk_max_entries=ANSWER_CACHE_CONFIG["disk_max_entries"],
+                    table="agent_answers"
+                )
+    return _answer_cache
+
+
+# What AgentExecutor returns when it gives up before the LLM writes a Final Answer
+AGENT_STOPPED_OUTPUT = "Agent stopped due to iteration limit or time limit."
+
+# Tool outputs that report a failure rather than information
+_TOOL_FAILURE_PREFIXES = ("Search failed", "Fetching pages failed", "No search results found", "No pages to fetch")
+
+
+def _all_tools_failed(observations: Iterable[Any]) -> bool:
+    """Whether tools were called and every call failed."""
+    observations = [str(observation) for observation in observations]
+    return bool(observations) and all(observation.startswith(_TOOL_FAILURE_PREFIXES) for observation in observations)
+
+
+def is_cacheable_result(result: Dict[str, Any]) -> bool:
+    """
+    Whether an AgentExecutor result is a Final Answer worth caching.
+
+    Iteration or time limit stops are not answers, and answers written after
+    every tool call failed only reflect a transient outage.
+    """
+    output = result.get("output")
+    if not output or output.strip() == AGENT_STOPPED_OUTPUT:
+        return False
+    # "_Exception" steps are parsing errors fed back to the LLM, not tool calls
+    observations = [observation for action, observation in result.get("intermediate_steps", [])
+                    if getattr(action, "tool", None) != "_Exception"]
+    return not _all_tools_failed(observations)
+
+
+def _log_cached_answer(hit):
+    logger.debug("Using cached answer for similar query '%s' (similarity %.2f)", hit.query, hit.similarity)
+    set_attribute("cache.hit", "semantic")
+    get_metrics().inc("cache_hits_total", cache="answer_semantic")
+
+
+class FinalAnswerStreamHandler(BaseCallbackHandler):
+    """Callback handler that forwards the LLM tokens following 'Final Answer:'."""
+    
+    ANSWER_PREFIX = "Final Answer:"
+    
+    # Called directly in the event loop for async runs, so emit can target an asyncio.Queue
+    run_inline = True
+    
+    def __init__(self, emit: Callable[[str], None]):
+        self.emit = emit
+        self._buffer = ""
+        self._answering = False
+        self._emitted = False
+    
+    def on_llm_start(self, *args, **kwargs):
+        self._buffer = ""
+        self._answering = False
+        self._emitted = False
+    
+    def on_chat_model_start(self, *args, **kwargs):
+        self.on_llm_start()
+    
+    def on_llm_new_token(self, token: str, **kwargs):
+        if not self._answering:
+            # Reasoning steps are not streamed; wait for the answer marker
+            self._buffer += token
+            index = self._buffer.find(self.ANSWER_PREFIX)
+            if index == -1:
+                return
+            self._answering = True
+            token = self._buffer[index + len(self.ANSWER_PREFIX):]
+        
+        # Drop the whitespace between the marker and the answer
+        if not self._emitted:
+            token = token.lstrip()
+            if not token:
+                return
+            self._emitted = True
+        self.emit(token)
+
+
+def _token_usage(response) -> Tuple[Optional[int], Optional[int]]:
+    """Get the (input, output) token counts an LLM reported, if it reported any."""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens"), usage.get("completion_tokens")
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens"), usage.get("output_tokens")
+            info = generation.generation_info or {}
+            # Ollama's counts
+            if "eval_count" in info:
+                return info.get("prompt_eval_count"), info.get("eval_count")
+    return None, None
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Callback handler that records a span and metrics for every LLM and tool call.
+    
+    LLM spans carry the model, latency, time to first token and token counts
+    (as reported by the model, or estimated with the tokenizer). A tool span
+    is the current span while the tool runs, so the searches it makes become
+    its children.
+    """
+    
+    # Called directly in the thread or task running the step, so the current span is the step's
+    run_inline = True
+    
+    def __init__(self):
+        # run id -> (span, span that was current before a tool span)
+        self._spans: Dict[UUID, Tuple[Span, Optional[Span]]] = {}
+        self._lock = threading.Lock()
+    
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, attributes: Dict[str, Any],
+               kind: str = "INTERNAL") -> Span:
+        with self._lock:
+            parent = self._spans.get(parent_run_id)
+        span = get_tracer().start_span(name, attributes, kind=kind, parent=parent[0] if parent else None)
+        with self._lock:
+            self._spans[run_id] = (span, current_span())
+        return span
+    
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None) -> Optional[Span]:
+        with self._lock:
+            span, _ = self._spans.pop(run_id, (None, None))
+        if span is not None:
+            if error is not None:
+                span.record_error(error)
+            get_tracer().end_span(span)
+        return span
+    
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID,
+                     parent_run_id: Optional[UUID] = None, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or params.get("_type") or "unknown"
+        self._start(run_id, parent_run_id, f"llm {model}", {
+            "gen_ai.request.model": model,
+            "gen_ai.usage.input_tokens": sum(count_tokens(prompt) for prompt in prompts),
+            "gen_ai.usage.estimated": True,
+        }, kind="CLIENT")
+    
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID,
+                            parent_run_id: Optional[UUID] = None, **kwargs):
+        prompts = ["\n".join(str(message.content) for message in batch) for batch in messages]
+        self.on_llm_start(serialized, prompts, run_id=run_id, parent_run_id=parent_run_id, **kwargs)
+    
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs):
+        with self._lock:
+            span, _ = self._spans.get(run_id, (None, None))
+        if span is not None and "gen_ai.time_to_first_token" not in span.attributes:
+            span.set_attribute("gen_ai.time_to_first_token", span.duration)
+            get_metrics().observe("llm_time_to_first_token_seconds", span.duration,
+                                  model=span.attributes["gen_ai.request.model"])
+    
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        with self._lock:
+            span, _ = self._spans.get(run_id, (None, None))
+        if span is None:
+            return
+        input_tokens, output_tokens = _token_usage(response)
+        if output_tokens is not None:
+            span.set_attribute("gen_ai.usage.estimated", False)
+            if input_tokens is not None:
+                span.set_attribute("gen_ai.usage.input_tokens", input_tokens)
+        else:
+            output_tokens = sum(count_tokens(generation.text) for generations in response.generations
+                                for generation in generations)
+        span.set_attribute("gen_ai.usage.output_tokens", output_tokens)
+        self._end(run_id)
+        self._record_llm(span, "ok")
+    
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        span = self._end(run_id, error)
+        if span is not None:
+            self._record_llm(span, "error")
+    
+    @staticmethod
+    def _record_llm(span: Span, status: str):
+        model = span.attributes["gen_ai.request.model"]
+        metrics = get_metrics()
+        metrics.inc("llm_requests_total", model=model, status=status)
+        metrics.observe("llm_request_duration_seconds", span.duration, model=model)
+        metrics.inc("llm_tokens_total", span.attributes["gen_ai.usage.input_tokens"], model=model, direction="input")
+        metrics.inc("llm_tokens_total", span.attributes.get("gen_ai.usage.output_tokens", 0), model=model,
+                    direction="output")
+    
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID,
+                      parent_run_id: Optional[UUID] = None, **kwargs):
+        name = serialized.get("name") or "tool"
+        span = self._start(run_id, parent_run_id, f"tool {name}", {"tool.name": name, "tool.input": input_str})
+        set_current_span(span)
+    
+    def _end_tool(self, run_id: UUID, error: Optional[BaseException] = None):
+        with self._lock:
+            _, previous = self._spans.get(run_id, (None, None))
+        span = self._end(run_id, error)
+        if span is None:
+            return
+        if current_span() is span:
+            set_current_span(previous)
+        get_metrics().observe("agent_tool_duration_seconds", span.duration, tool=span.attributes["tool.name"])
+    
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs):
+        self._end_tool(run_id)
+    
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._end_tool(run_id, error)
+
+
+_tracing_handler = TracingCallbackHandler()
+
+
+def get_tracing_callbacks() -> List[BaseCallbackHandler]:
+    """Get the callbacks that trace LLM and tool calls, or an empty list if tracing and metrics are disabled."""
+    return [_tracing_handler] if tracing_enabled() else []
 
 
 class LangChainSearchAgent:
     """LangChain-based search agent with tool usage capabilities."""
     
-    def __init__(self, llm_client, tools: List[BaseTool] = None):
+    # Agent mode name used in traces and metrics
+    mode = "react"
+    
+    def __init__(self, llm_client, tools: List[BaseTool] = None, verbose: bool = True, cache_context: str = ""):
+        """
+        Initialize the agent.
+        
+        Args:
+            llm_client: LangChain LLM or chat model
+            tools: Tools the agent can use
+            verbose: Print the agent's reasoning steps
+            cache_context: What answers depend on besides the query (LLM model, search engine);
+                cached answers are only reused within the same context
+        """
         self.llm_client = llm_client
         self.tools = tools or []
+        self.verbose = verbose
+        self.cache_context = cache_context
+        # Queries whose cached answer is being refreshed in the background
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self._refresh_tasks = set()
         self.agent_executor = None
         self._setup_agent()
     
@@ -34,8 +310,9 @@ Guidelines:
 1. Use the search tool when you need up-to-date information or facts
 2. Be thorough in your analysis of search results
 3. Cite sources when possible
-4. If search results are insufficient, acknowledge limitations
-5. Provide clear, well-structured answers
+4. If snippets are not detailed enough and a fetch_pages tool is available, use it to read the most relevant pages
+5. If search results are insufficient, acknowledge limitations
+6. Provide clear, well-structured answers
 
 TOOLS:
 ------
@@ -77,55 +354,638 @@ Question: {input}
             self.agent_executor = AgentExecutor(
                 agent=agent,
                 tools=self.tools,
-                verbose=True,
-                handle_parsing_errors=True
+                verbose=self.verbose,
+                handle_parsing_errors=True,
+                # Lets is_cacheable_result see whether the tool calls worked
+                return_intermediate_steps=True
             )
         except Exception as e:
-            print(f"Warning: Failed to initialize LangChain agent: {e}")
-            print("Falling back to simple tool execution...")
+            logger.warning("Failed to initialize LangChain agent: %s; falling back to simple tool execution", e)
             self.agent_executor = None
     
+    @contextmanager
+    def _traced_run(self, query: str) -> Iterator[Span]:
+        """Run a block as the root span of an agent run and record its duration."""
+        span = None
+        try:
+            with get_tracer().span("agent.run", {"agent.mode": self.mode, "agent.query": query}) as span:
+                yield span
+        finally:
+            if span is not None:
+                cache = "hit" if span.attributes.get("cache.hit") else "miss"
+                metrics = get_metrics()
+                metrics.inc("agent_runs_total", mode=self.mode, status="error" if span.error else "ok")
+                metrics.observe("agent_run_duration_seconds", span.duration, mode=self.mode, cache=cache)
+    
+    def _answer_key(self, query: str) -> str:
+        return "\x1f".join([self.cache_context, normalize_query(query)])
+    
+    def _is_stale(self, entry) -> bool:
+        return time.time() - entry.stored_at >= ANSWER_CACHE_CONFIG["ttl"]
+    
+    def _cached_answer(self, query: str) -> Optional[str]:
+        """
+        Look up a cached answer for the query.
+        
+        Stale answers are returned as well, while a background run refreshes them.
+        """
+        cache = get_answer_cache()
+        entry = cache.get_entry(self._answer_key(query)) if cache is not None else None
+        if entry is not None:
+            stale = self._is_stale(entry)
+            if stale:
+                logger.info("Serving stale cached answer for '%s', refreshing in the background", query)
+                self._start_refresh(query)
+            else:
+                logger.debug("Using cached answer for '%s'", query)
+            set_attribute("cache.hit", "stale" if stale else "exact")
+            get_metrics().inc("cache_hits_total", cache="answer")
+            return entry.value
+        
+        semantic_cache = get_semantic_cache("answers")
+        hit = semantic_cache.lookup(query, context=self.cache_context) if semantic_cache is not None else None
+        if hit is not None:
+            _log_cached_answer(hit)
+            return hit.value
+        return None
+    
+    async def _acached_answer(self, query: str) -> Optional[str]:
+        """Non-blocking counterpart of ``_cached_answer``."""
+        cache = get_answer_cache()
+        entry = await asyncio.to_thread(cache.get_entry, self._answer_key(query)) if cache is not None else None
+        if entry is not None:
+            stale = self._is_stale(entry)
+            if stale:
+                logger.info("Serving stale cached answer for '%s', refreshing in the background", query)
+                self._start_arefresh(query)
+            else:
+                logger.debug("Using cached answer for '%s'", query)
+            set_attribute("cache.hit", "stale" if stale else "exact")
+            get_metrics().inc("cache_hits_total", cache="answer")
+            return entry.value
+        
+        semantic_cache = get_semantic_cache("answers")
+        hit = await semantic_cache.alookup(query, context=self.cache_context) if semantic_cache is not None else None
+        if hit is not None:
+            _log_cached_answer(hit)
+            return hit.value
+        return None
+    
+    def _store_answer(self, query: str, output: str):
+        cache = get_answer_cache()
+        if cache is not None:
+            # Kept past its TTL so it can still be served while being refreshed
+            cache.set(self._answer_key(query), output, ANSWER_CACHE_CONFIG["ttl"] + ANSWER_CACHE_CONFIG["stale_ttl"])
+        semantic_cache = get_semantic_cache("answers")
+        if semantic_cache is not None:
+            semantic_cache.store(query, output, context=self.cache_context)
+    
+    async def _astore_answer(self, query: str, output: str):
+        cache = get_answer_cache()
+        if cache is not None:
+            await asyncio.to_thread(cache.set, self._answer_key(query), output,
+                                    ANSWER_CACHE_CONFIG["ttl"] + ANSWER_CACHE_CONFIG["stale_ttl"])
+        semantic_cache = get_semantic_cache("answers")
+        if semantic_cache is not None:
+            await semantic_cache.astore(query, output, context=self.cache_context)
+    
+    def _answer(self, query: str) -> str:
+        """Run the agent loop and cache the answer."""
+        result = self.agent_executor.invoke({"input": query})
+        if "output" not in result:
+            return "No response generated"
+        if is_cacheable_result(result):
+            self._store_answer(query, result["output"])
+        return result["output"]
+    
+    async def _aanswer(self, query: str) -> str:
+        """Non-blocking counterpart of ``_answer``."""
+        result = await self.agent_executor.ainvoke({"input": query})
+        if "output" not in result:
+            return "No response generated"
+        if is_cacheable_result(result):
+            await self._astore_answer(query, result["output"])
+        return result["output"]
+    
+    def _claim_refresh(self, query: str) -> bool:
+        """Mark a query as being refreshed; False if a refresh is already running."""
+        key = self._answer_key(query)
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+    
+    def _release_refresh(self, query: str):
+        with self._refresh_lock:
+            self._refreshing.discard(self._answer_key(query))
+    
+    def _start_refresh(self, query: str):
+        if not self._claim_refresh(query):
+            return
+        
+        def refresh():
+            try:
+                self._answer(query)
+            except Exception as e:
+                logger.warning("Refreshing the cached answer for '%s' failed: %s", query, e)
+            finally:
+                self._release_refresh(query)
+        
+        # A daemon thread, so a one-shot CLI run exits right after printing the stale answer
+        threading.Thread(target=refresh, name="answer-refresh", daemon=True).start()
+    
+    def _start_arefresh(self, query: str):
+        if not self._claim_refresh(query):
+            return
+        
+        async def refresh():
+            try:
+                await self._aanswer(query)
+            except Exception as e:
+                logger.warning("Refreshing the cached answer for '%s' failed: %s", query, e)
+            finally:
+                self._release_refresh(query)
+        
+        # Keep a reference so the task isn't garbage collected while running
+        task = asyncio.ensure_future(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+    
     def run(self, query: str) -> str:
         """Run the agent with the given query."""
-        print(f"--- Running LangChain agent for query: '{query}' ---")
+        logger.info("Running LangChain agent for query: '%s'", query, extra={"query": query, "mode": self.mode})
         
-        try:
-            # Execute the agent
-            result = self.agent_executor.invoke({"input": query})
-            return result.get("output", "No response generated")
+        with self._traced_run(query) as span:
+            cached = self._cached_answer(query)
+            if cached is not None:
+                return cached
             
-        except Exception as e:
-            error_msg = f"Agent execution failed: {str(e)}"
-            print(f"Error: {error_msg}")
-            return error_msg
+            try:
+                # Execute the agent
+                return self._answer(query)
+                
+            except Exception as e:
+                span.record_error(e)
+                error_msg = f"Agent execution failed: {str(e)}"
+                logger.exception(error_msg)
+                return error_msg
+    
+    async def arun(self, query: str, raise_errors: bool = False) -> str:
+        """
+        Run the agent asynchronously so concurrent sessions overlap their I/O.
 
+        Args:
+            query: The question to answer
+            raise_errors: Re-raise agent failures instead of returning them as the answer
+        """
+        logger.info("Running LangChain agent for query: '%s'", query, extra={"query": query, "mode": self.mode})
+        
+        with self._traced_run(query) as span:
+            cached = await self._acached_answer(query)
+            if cached is not None:
+                return cached
+            
+            try:
+                return await self._aanswer(query)
+                
+            except Exception as e:
+                span.record_error(e)
+                error_msg = f"Agent execution failed: {str(e)}"
+                logger.exception(error_msg)
+                if raise_errors:
+                    raise
+                return error_msg
 
-def create_search_agent(llm_type: str = "ollama", search_engine: str = "auto"):
-    """Factory function to create a LangChain search agent."""
+
+    def iter_batch(self, queries: Iterable[str], concurrency: Optional[int] = None) -> Iterator[Tuple[int, str, str]]:
+        """
+        Run many queries with bounded concurrency, yielding results as each one completes.
+        
+        Queries are pulled from ``queries`` lazily, so arbitrarily large inputs
+        (e.g. a generator over a file) are never held in memory at once.
+        
+        Args:
+            queries: Queries to run
+            concurrency: Maximum number of queries running at the same time
+            
+        Yields:
+            Tuple[int, str, str]: (position of the query in the input, query, answer), in completion order
+        """
+        concurrency = max(1, concurrency or AGENT_CONFIG["batch_concurrency"])
+        pending_queries = enumerate(queries)
+        
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="agent-batch") as executor:
+            in_flight = {}
+            
+            def submit_next() -> bool:
+                for index, query in pending_queries:
+                    in_flight[executor.submit(self.run, query)] = (index, query)
+                    return True
+                return False
+            
+            for _ in range(concurrency):
+                if not submit_next():
+                    break
+            
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, query = in_flight.pop(future)
+                    # Keep the pool busy before handing the result to the consumer
+                    submit_next()
+                    yield index, query, future.result()
     
-    # Create proper LangChain LLM
+    def run_batch(self, queries: List[str], concurrency: Optional[int] = None) -> List[str]:
+        """
+        Run many queries with bounded concurrency.
+        
+        Args:
+            queries: Queries to run
+            concurrency: Maximum number of queries running at the same time
+            
+        Returns:
+            List[str]: Answers in the same order as ``queries``
+        """
+        answers = [None] * len(queries)
+        for index, _, answer in self.iter_batch(queries, concurrency):
+            answers[index] = answer
+        return answers
+    
+    def stream(self, query: str) -> Iterator[str]:
+        """
+        Run the agent and yield the final answer token by token as the LLM produces it.
+        
+        Falls back to yielding the whole output at once if the LLM did not stream
+        any answer tokens.
+        """
+        logger.info("Running LangChain agent for query: '%s'", query, extra={"query": query, "mode": self.mode})
+        
+        cached = self._cached_answer(query)
+        if cached is not None:
+            yield cached
+            return
+        
+        token_queue: "queue.Queue" = queue.Queue()
+        handler = FinalAnswerStreamHandler(token_queue.put)
+        outcome = {}
+        
+        def run_agent():
+            try:
+                with self._traced_run(query) as span:
+                    try:
+                        result = self.agent_executor.invoke({"input": query}, config={"callbacks": [handler]})
+                        outcome["output"] = result.get("output", "No response generated")
+                        if is_cacheable_result(result):
+                            self._store_answer(query, result["output"])
+                    except Exception as e:
+                        span.record_error(e)
+                        error_msg = f"Agent execution failed: {str(e)}"
+                        logger.exception(error_msg)
+                        outcome["output"] = error_msg
+            finally:
+                token_queue.put(_STREAM_END)
+        
+        worker = threading.Thread(target=run_agent, daemon=True)
+        worker.start()
+        
+        streamed = False
+        while True:
+            token = token_queue.get()
+            if token is _STREAM_END:
+                break
+            streamed = True
+            yield token
+        worker.join()
+        
+        if not streamed:
+            yield outcome["output"]
+    
+    async def astream(self, query: str) -> AsyncIterator[str]:
+        """Asynchronous counterpart of ``stream``."""
+        logger.info("Running LangChain agent for query: '%s'", query, extra={"query": query, "mode": self.mode})
+        
+        cached = await self._acached_answer(query)
+        if cached is not None:
+            yield cached
+            return
+        
+        token_queue: "asyncio.Queue" = asyncio.Queue()
+        handler = FinalAnswerStreamHandler(token_queue.put_nowait)
+        
+        async def run_agent() -> str:
+            try:
+                # Runs as its own task, so the span doesn't leak into the consumer's context
+                with self._traced_run(query) as span:
+                    try:
+                        result = await self.agent_executor.ainvoke({"input": query}, config={"callbacks": [handler]})
+                        if "output" not in result:
+                            return "No response generated"
+                        if is_cacheable_result(result):
+                            await self._astore_answer(query, result["output"])
+                        return result["output"]
+                    except Exception as e:
+                        span.record_error(e)
+                        error_msg = f"Agent execution failed: {str(e)}"
+                        logger.exception(error_msg)
+                        return error_msg
+            finally:
+                token_queue.put_nowait(_STREAM_END)
+        
+        task = asyncio.ensure_future(run_agent())
+        try:
+            streamed = False
+            while True:
+                token = await token_queue.get()
+                if token is _STREAM_END:
+                    break
+                streamed = True
+                yield token
+            output = await task
+        finally:
+            # The consumer stopped early; don't leave the agent running
+            if not task.done():
+                task.cancel()
+        
+        if not streamed:
+            yield output
+
+
+class PlanExecuteSearchAgent(LangChainSearchAgent):
+    """
+    Search agent that plans all searches up front and runs them in parallel.
+    
+    One LLM call breaks the question into sub-queries, every sub-query is
+    searched at the same time, and a second LLM call writes the answer from
+    all results. A question needing five searches thus costs two LLM calls
+    and the time of the slowest search, instead of five ReAct round trips.
+    Caching, batching and streaming work as in ``LangChainSearchAgent``.
+    """
+    
+    mode = "plan"
+    
+    PLAN_PROMPT = """Break the following question into at most {max_queries} web search queries that together cover everything needed to answer it.
+Write one search query per line, with no numbering or explanations. Use a single query if the question is simple.
+
+Question: {query}
+
+Search queries:"""
+    
+    SYNTHESIS_PROMPT = """You are a helpful AI assistant. Answer the question using the web search results below.
+Be thorough, cite sources (URLs) where possible, and acknowledge it if the results are insufficient.
+
+Question: {query}
+
+{results}
+
+Answer:"""
+    
+    def __init__(self, llm_client, tools: List[BaseTool] = None, verbose: bool = True, cache_context: str = "",
+                 max_subqueries: Optional[int] = None):
+        """
+        Initialize the agent.
+        
+        Args:
+            llm_client: LangChain LLM or chat model
+            tools: Tools; the web_search tool is used for every sub-query
+            verbose: Log the plan at INFO level rather than DEBUG
+            cache_context: What answers depend on besides the query (LLM model, search engine)
+            max_subqueries: Maximum number of searches per question
+        """
+        self.max_subqueries = max_subqueries or AGENT_CONFIG["max_subqueries"]
+        super().__init__(llm_client, tools=tools, verbose=verbose, cache_context=cache_context)
+    
+    def _setup_agent(self):
+        """Find the search tool; there is no ReAct executor in this mode."""
+        self.agent_executor = None
+        self.search_tool = next((tool for tool in self.tools if tool.name == "web_search"), None)
+        if self.search_tool is None:
+            self.search_tool = SearchTool()
+    
+    @staticmethod
+    def _text(output) -> str:
+        """Get the text of an LLM (str) or chat model (message) output."""
+        return getattr(output, "content", output)
+    
+    def _parse_plan(self, query: str, plan: str) -> List[str]:
+        subqueries = []
+        for line in plan.splitlines():
+            # Drop list markers and quotes the model may add anyway
+            line = re.sub(r"^\s*(?:[-*\u2022]|\d+[.)])\s*", "", line).strip().strip('"')
+            if line and not line.endswith(":") and line.lower() not in (q.lower() for q in subqueries):
+                subqueries.append(line)
+        subqueries = subqueries[:self.max_subqueries]
+        logger.log(logging.INFO if self.verbose else logging.DEBUG, "Plan: %s", subqueries or [query])
+        return subqueries or [query]
+    
+    def _plan_prompt(self, query: str) -> str:
+        return self.PLAN_PROMPT.format(max_queries=self.max_subqueries, query=query)
+    
+    def _synthesis_prompt(self, query: str, subqueries: List[str], observations: List[str]) -> str:
+        sections = [f"Search: {subquery}\n{observation}" for subquery, observation in zip(subqueries, observations)]
+        return self.SYNTHESIS_PROMPT.format(query=query, results="\n\n".join(sections))
+    
+    def _gather(self, query: str) -> Tuple[str, bool]:
+        """
+        Plan the searches, run them in parallel and build the synthesis prompt.
+
+        Returns:
+            Tuple[str, bool]: The prompt, and whether an answer based on it may be cached
+            (not when every search failed)
+        """
+        subqueries = self._parse_plan(query, self._text(self.llm_client.invoke(self._plan_prompt(query))))
+        with ThreadPoolExecutor(max_workers=len(subqueries), thread_name_prefix="plan-search") as executor:
+            # Each search runs in a copy of this context, so its spans join the agent run's trace
+            futures = [executor.submit(contextvars.copy_context().run, self.search_tool.invoke, {"query": subquery})
+                       for subquery in subqueries]
+            observations = [future.result() for future in futures]
+        return self._synthesis_prompt(query, subqueries, observations), not _all_tools_failed(observations)
+    
+    async def _agather(self, query: str) -> Tuple[str, bool]:
+        """Non-blocking counterpart of ``_gather``."""
+        plan = await self.llm_client.ainvoke(self._plan_prompt(query))
+        subqueries = self._parse_plan(query, self._text(plan))
+        observations = await asyncio.gather(*(self.search_tool.ainvoke({"query": subquery}) for subquery in subqueries))
+        return self._synthesis_prompt(query, subqueries, list(observations)), not _all_tools_failed(observations)
+    
+    def _answer(self, query: str) -> str:
+        prompt, cacheable = self._gather(query)
+        output = self._text(self.llm_client.invoke(prompt)).strip()
+        if cacheable:
+            self._store_answer(query, output)
+        return output
+    
+    async def _aanswer(self, query: str) -> str:
+        prompt, cacheable = await self._agather(query)
+        output = self._text(await self.llm_client.ainvoke(prompt)).strip()
+        if cacheable:
+            await self._astore_answer(query, output)
+        return output
+    
+    def stream(self, query: str) -> Iterator[str]:
+        """Run the searches, then yield the answer token by token as the LLM writes it."""
+        logger.info("Running plan-and-execute agent for query: '%s'", query, extra={"query": query, "mode": self.mode})
+        
+        cached = self._cached_answer(query)
+        if cached is not None:
+            yield cached
+            return
+        
+        token_queue: "queue.Queue" = queue.Queue()
+        
+        def run_agent():
+            try:
+                # Runs on its own thread, so the span doesn't leak into the consumer's context
+                with self._traced_run(query) as span:
+                    try:
+                        tokens = []
+                        prompt, cacheable = self._gather(query)
+                        for chunk in self.llm_client.stream(prompt):
+                            token = self._text(chunk)
+                            if token:
+                                tokens.append(token)
+                                token_queue.put(token)
+                        if cacheable:
+                            self._store_answer(query, "".join(tokens).strip())
+                    except Exception as e:
+                        span.record_error(e)
+                        error_msg = f"Agent execution failed: {str(e)}"
+                        logger.exception(error_msg)
+                        token_queue.put(error_msg)
+            finally:
+                token_queue.put(_STREAM_END)
+        
+        worker = threading.Thread(target=run_agent, daemon=True)
+        worker.start()
+        while True:
+            token = token_queue.get()
+            if token is _STREAM_END:
+                break
+            yield token
+        worker.join()
+    
+    async def astream(self, query: str) -> AsyncIterator[str]:
+        """Asynchronous counterpart of ``stream``."""
+        logger.info("Running plan-and-execute agent for query: '%s'", query, extra={"query": query, "mode": self.mode})
+        
+        cached = await self._acached_answer(query)
+        if cached is not None:
+            yield cached
+            return
+        
+        token_queue: "asyncio.Queue" = asyncio.Queue()
+        
+        async def run_agent():
+            try:
+                # Runs as its own task, so the span doesn't leak into the consumer's context
+                with self._traced_run(query) as span:
+                    try:
+                        tokens = []
+                        prompt, cacheable = await self._agather(query)
+                        async for chunk in self.llm_client.astream(prompt):
+                            token = self._text(chunk)
+                            if token:
+                                tokens.append(token)
+                                token_queue.put_nowait(token)
+                        if cacheable:
+                            await self._astore_answer(query, "".join(tokens).strip())
+                    except Exception as e:
+                        span.record_error(e)
+                        error_msg = f"Agent execution failed: {str(e)}"
+                        logger.exception(error_msg)
+                        token_queue.put_nowait(error_msg)
+            finally:
+                token_queue.put_nowait(_STREAM_END)
+        
+        task = asyncio.ensure_future(run_agent())
+        try:
+            while True:
+                token = await token_queue.get()
+                if token is _STREAM_END:
+                    break
+                yield token
+            await task
+        finally:
+            # The consumer stopped early; don't leave the agent running
+            if not task.done():
+                task.cancel()
+
+
+def create_llm(llm_type: str = "ollama"):
+    """
+    Create the LangChain LLM used by the agents.
+    
+    Args:
+        llm_type: "ollama" or "openai"
+    
+    Returns:
+        A LangChain LLM (Ollama) or chat model (OpenAI) that emits tokens to callbacks;
+        every call is traced unless tracing and metrics are disabled
+    """
     if llm_type == "openai":
         from langchain_openai import ChatOpenAI
-        llm = ChatOpenAI(
+        return ChatOpenAI(
             api_key=OPENAI_API_CONFIG["api_key"],
             base_url=OPENAI_API_CONFIG["base_url"],
-            model=OPENAI_API_CONFIG["model"]
-        )
-    else:
-        from langchain_community.llms import Ollama
-        llm = Ollama(
-            base_url=OLLAMA_CONFIG["host"],
-            model=OLLAMA_CONFIG["model"]
+            model=OPENAI_API_CONFIG["model"],
+            # Emit tokens to callbacks so the final answer can be streamed
+            streaming=True,
+            # Report token usage when streaming
+            stream_usage=True,
+            callbacks=get_tracing_callbacks()
         )
     
+    from langchain_community.llms import Ollama
+    return Ollama(
+        base_url=OLLAMA_CONFIG["host"],
+        model=OLLAMA_CONFIG["model"],
+        # Keep the model resident between agent steps
+        keep_alive=OLLAMA_CONFIG["keep_alive"],
+        timeout=int(OLLAMA_CONFIG["read_timeout"]),
+        callbacks=get_tracing_callbacks()
+    )
+
+
+# Agent classes by --agent-mode / AGENT_MODE
+AGENT_MODES = {"react": LangChainSearchAgent, "plan": PlanExecuteSearchAgent}
+
+
+def create_search_agent(llm_type: str = "ollama", search_engine: str = "auto", verbose: bool = True,
+                        agent_mode: Optional[str] = None):
+    """
+    Factory function to create a LangChain search agent.
+    
+    Args:
+        llm_type: "ollama" or "openai"
+        search_engine: Search engine name, or "auto"
+        verbose: Print the agent's reasoning steps
+        agent_mode: "react" (one tool call per LLM turn) or "plan" (parallel searches planned up front);
+            defaults to AGENT_MODE
+    """
+    agent_mode = agent_mode or AGENT_CONFIG["mode"]
+    if agent_mode not in AGENT_MODES:
+        raise ValueError(f"Unknown agent mode '{agent_mode}'. Choose one of: {', '.join(AGENT_MODES)}")
+    
+    # Create proper LangChain LLM
+    llm = create_llm(llm_type)
+    
     # Create search tool with specified engine
-    from langchain_tools import create_search_tool
-    search_tool = create_search_tool(engine=search_engine)
+    from langchain_tools import create_search_tool, create_fetch_tool
+    tools = [create_search_tool(engine=search_engine)]
+    if PAGE_FETCH_CONFIG["enabled"]:
+        # Lets the agent read full pages when snippets are not enough
+        tools.append(create_fetch_tool(engine=search_engine))
+    for tool in tools:
+        tool.callbacks = get_tracing_callbacks()
     
     # Create agent with tools
-    agent = LangChainSearchAgent(
+    model = OPENAI_API_CONFIG["model"] if llm_type == "openai" else OLLAMA_CONFIG["model"]
+    agent = AGENT_MODES[agent_mode](
         llm_client=llm,
-        tools=[search_tool]
+        tools=tools,
+        verbose=verbose,
+        # Answers depend on the model, engine and mode, so they are cached per combination
+        cache_context=f"{llm_type}:{model}|{search_engine}|{agent_mode}"
     )
     
     return agent
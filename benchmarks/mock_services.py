@@ -0,0 +1,257 @@
+# benchmarks/mock_services.py - Local stand-ins for the search and LLM APIs
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class LatencyProfile:
+    """
+    Response time and error distribution of a mocked API.
+
+    Latencies are log-normal around ``median``, the usual shape of network
+    service latencies: most responses are close to the median, with a long
+    tail controlled by ``jitter``.
+    """
+
+    def __init__(self, median: float = 0.05, jitter: float = 0.5, error_rate: float = 0.0,
+                 error_status: int = 503, seed: Optional[int] = None):
+        """
+        Args:
+            median: Median response time in seconds
+            jitter: Standard deviation of the log latency; 0 makes every response take ``median``
+            error_rate: Fraction of requests answered with ``error_status``
+            error_status: HTTP status of failed requests
+            seed: Random seed, for reproducible runs
+        """
+        self.median = median
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> Tuple[float, bool]:
+        """Draw (latency in seconds, whether the request fails) for one request."""
+        with self._lock:
+            latency = self.median * math.exp(self._random.gauss(0, self.jitter)) if self.jitter else self.median
+            return latency, self._random.random() < self.error_rate
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"median": self.median, "jitter": self.jitter, "error_rate": self.error_rate,
+                "error_status": self.error_status}
+
+
+def _search_items(query: str, count: int, offset: int = 0):
+    """Deterministic fake results for a query."""
+    slug = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-") or "query"
+    for index in range(offset, offset + count):
+        host = f"site{index % 7}.example.com"
+        yield {
+            "title": f"{query} - result {index + 1}",
+            "url": f"https://{host}/{slug}/{index + 1}",
+            "host": host,
+            "snippet": (f"Result {index + 1} for {query}. It explains the topic in detail, with background, "
+                        f"recent developments and references to further reading."),
+        }
+
+
+def _embedding(text: str, dim: int = 64):
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [(digest[i % len(digest)] - 128) / 128 for i in range(dim)]
+
+
+class MockServices:
+    """
+    Local stand-ins for the Google Custom Search, Brave Search and Ollama HTTP APIs.
+
+    One threaded HTTP/1.1 server (keep-alive, like the real APIs) serves:
+
+    - ``GET /customsearch/v1``: Google CSE results, honouring ``num`` and ``start``
+    - ``GET /res/v1/web/search``: Brave web search results
+    - ``POST /api/generate``: Ollama completions, streamed as NDJSON. The
+      response follows the agent's ReAct format: a web search first, then a
+      final answer once the prompt contains an observation.
+    - ``POST /api/embed`` / ``/api/embeddings``: deterministic embeddings
+
+    Every request waits for a latency drawn from the service's LatencyProfile
+    and fails with its error status at the profile's error rate. Ollama
+    responses additionally stream one token every ``token_delay`` seconds.
+
+    Use as a context manager, or call ``start()`` and ``stop()``.
+    """
+
+    def __init__(self, google: Optional[LatencyProfile] = None, brave: Optional[LatencyProfile] = None,
+                 ollama: Optional[LatencyProfile] = None, token_delay: float = 0.0, host: str = "127.0.0.1",
+                 port: int = 0):
+        """
+        Args:
+            google: Latency profile of the Google CSE API
+            brave: Latency profile of the Brave API
+            ollama: Latency profile of Ollama until the first token
+            token_delay: Seconds between streamed Ollama tokens
+            host: Interface to listen on
+            port: Port to listen on; 0 picks a free one
+        """
+        self.profiles = {
+            "google": google or LatencyProfile(),
+            "brave": brave or LatencyProfile(),
+            "ollama": ollama or LatencyProfile(median=0.1),
+        }
+        self.token_delay = token_delay
+        self.request_counts = {name: 0 for name in self.profiles}
+        self._counts_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def google_url(self) -> str:
+        return f"{self.base_url}/customsearch/v1"
+
+    @property
+    def brave_url(self) -> str:
+        return f"{self.base_url}/res/v1/web/search"
+
+    @property
+    def ollama_url(self) -> str:
+        return self.base_url
+
+    def start(self) -> "MockServices":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-services", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockServices":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _count(self, service: str):
+        with self._counts_lock:
+            self.request_counts[service] += 1
+
+    def _handler_class(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, body: Dict[str, Any]):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _delay(self, service: str) -> bool:
+                """Wait for the service's latency; returns False if the request should fail."""
+                services._count(service)
+                profile = services.profiles[service]
+                latency, failed = profile.sample()
+                time.sleep(latency)
+                if failed:
+                    self._send_json(profile.error_status, {"error": {"code": profile.error_status,
+                                                                     "message": "Injected error"}})
+                return not failed
+
+            def _read_json(self) -> Dict[str, Any]:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                query = params.get("q", "")
+                if url.path == "/customsearch/v1":
+                    if not self._delay("google"):
+                        return
+                    count, start = int(params.get("num", 10)), int(params.get("start", 1))
+                    items = [{"title": item["title"], "link": item["url"], "snippet": item["snippet"],
+                              "displayLink": item["host"]} for item in _search_items(query, count, start - 1)]
+                    self._send_json(200, {"items": items, "searchInformation": {"totalResults": "1000"}})
+                elif url.path == "/res/v1/web/search":
+                    if not self._delay("brave"):
+                        return
+                    count = int(params.get("count", 10))
+                    results = [{"title": item["title"], "url": item["url"], "description": item["snippet"],
+                                "meta_url": {"hostname": item["host"]}} for item in _search_items(query, count)]
+                    self._send_json(200, {"web": {"results": results}})
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                path = urlparse(self.path).path
+                if path not in ("/api/generate", "/api/embed", "/api/embeddings"):
+                    self._send_json(404, {"error": "not found"})
+                    return
+                payload = self._read_json()
+                if not self._delay("ollama"):
+                    return
+                if path == "/api/embed":
+                    texts = payload.get("input")
+                    texts = [texts] if isinstance(texts, str) else texts
+                    self._send_json(200, {"embeddings": [_embedding(text) for text in texts]})
+                elif path == "/api/embeddings":
+                    self._send_json(200, {"embedding": _embedding(payload.get("prompt", ""))})
+                else:
+                    self._generate(payload)
+
+            def _generate(self, payload: Dict[str, Any]):
+                prompt = payload.get("prompt", "")
+                tokens = self._completion(prompt).split(" ")
+                if payload.get("stream") is False:
+                    self._send_json(200, {"response": " ".join(tokens), "done": True,
+                                          "prompt_eval_count": len(prompt) // 4, "eval_count": len(tokens)})
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for index, token in enumerate(tokens):
+                    if index and services.token_delay:
+                        time.sleep(services.token_delay)
+                    text = token if index == 0 else " " + token
+                    self._write_chunk({"response": text, "done": False})
+                self._write_chunk({"response": "", "done": True, "prompt_eval_count": len(prompt) // 4,
+                                   "eval_count": len(tokens)})
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, body: Dict[str, Any]):
+                data = (json.dumps(body) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            @staticmethod
+            def _completion(prompt: str) -> str:
+                questions = list(re.finditer(r"^Question: (.*)$", prompt, flags=re.MULTILINE))
+                question = questions[-1].group(1) if questions else "the question"
+                # The format instructions mention observations too; only the scratchpad counts
+                scratchpad = prompt[questions[-1].end():] if questions else prompt
+                if "Observation:" in scratchpad:
+                    return (f"Thought: Do I need to use a tool? No\nFinal Answer: Based on the search results, "
+                            f"here is a summary about {question}. The sources agree on the main points.")
+                return f"Thought: Do I need to use a tool? Yes\nAction: web_search\nAction Input: {question}"
+
+        return Handler
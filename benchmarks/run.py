@@ -0,0 +1,376 @@
+# benchmarks/run.py - Offline performance benchmarks
+"""
+Measure throughput, latency percentiles and memory of the search and agent
+paths against local stand-ins for the Google CSE, Brave and Ollama APIs.
+
+Usage:
+    python -m benchmarks.run --requests 200 --concurrency 8
+    python -m benchmarks.run --scenarios search_tool,agent --output benchmarks/results/after.json \\
+        --baseline benchmarks/results/before.json
+
+No API keys are needed and no quota is used. Caches and rate limits are off
+by default so every request reaches the (mocked) network.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Allow running as a script as well as with -m
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_services import LatencyProfile, MockServices
+from logging_setup import setup_logging, shutdown_logging
+from config import (ANSWER_CACHE_CONFIG, OLLAMA_CONFIG, SEARCH_CACHE_CONFIG, SEARCH_ENGINES,
+                    SEARCH_RATE_LIMIT_CONFIG, SEMANTIC_CACHE_CONFIG)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Metrics compared against a baseline, and whether higher values are better
+COMPARED_METRICS = {
+    "throughput_rps": True,
+    "latency_p50_ms": False,
+    "latency_p95_ms": False,
+    "latency_p99_ms": False,
+    "python_peak_mb": False,
+}
+
+
+def percentile(samples: List[float], percent: float) -> Optional[float]:
+    """
+    Percentile of a sample, interpolating between the closest ranks.
+
+    Args:
+        samples: Observed values
+        percent: Percentile between 0 and 100
+
+    Returns:
+        Optional[float]: The percentile, or None for an empty sample
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * percent / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _rss_mb() -> Optional[float]:
+    """Resident set size of this process in MiB, where the platform reports it."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+@contextlib.contextmanager
+def benchmark_environment(services: MockServices, with_cache: bool = False):
+    """
+    Point the engines and the LLM at the mock services for the duration of the block.
+
+    Dummy API keys are set, rate limits and daily quotas are switched off (so
+    the persisted quota counters are never touched) and, unless ``with_cache``
+    is set, every cache is disabled. All settings are restored afterwards.
+    """
+    from search_engines import invalidate_search_engines, SearchEngineFactory
+    from search_engines import rate_limit, resilience
+
+    saved = [
+        (section, dict(section)) for section in (
+            SEARCH_ENGINES["custom_google"], SEARCH_ENGINES["brave"], OLLAMA_CONFIG, SEARCH_CACHE_CONFIG,
+            SEMANTIC_CACHE_CONFIG, ANSWER_CACHE_CONFIG, SEARCH_RATE_LIMIT_CONFIG
+        )
+    ]
+    saved_no_proxy = os.environ.get("NO_PROXY")
+    saved_rate_limiter = rate_limit._rate_limiter
+    saved_breakers = dict(resilience._circuit_breakers)
+
+    SEARCH_ENGINES["custom_google"].update(api_key="benchmark", cse_id="benchmark", base_url=services.google_url)
+    SEARCH_ENGINES["brave"].update(api_key="benchmark", base_url=services.brave_url)
+    OLLAMA_CONFIG["host"] = services.ollama_url
+    SEARCH_RATE_LIMIT_CONFIG.update(enabled=False, quota_path="")
+    if not with_cache:
+        SEARCH_CACHE_CONFIG["enabled"] = False
+        SEMANTIC_CACHE_CONFIG["enabled"] = False
+        ANSWER_CACHE_CONFIG["enabled"] = False
+    # Never send requests for the mock through a configured HTTP proxy
+    os.environ["NO_PROXY"] = ",".join(filter(None, [saved_no_proxy, "127.0.0.1", "localhost"]))
+    rate_limit._rate_limiter = None
+    # Circuit breakers opened by injected errors must not outlive the run
+    resilience._circuit_breakers.clear()
+    invalidate_search_engines()
+    SearchEngineFactory.invalidate_availability()
+    try:
+        yield
+    finally:
+        for section, values in saved:
+            section.clear()
+            section.update(values)
+        if saved_no_proxy is None:
+            os.environ.pop("NO_PROXY", None)
+        else:
+            os.environ["NO_PROXY"] = saved_no_proxy
+        rate_limit._rate_limiter = saved_rate_limiter
+        resilience._circuit_breakers.clear()
+        resilience._circuit_breakers.update(saved_breakers)
+        invalidate_search_engines()
+        SearchEngineFactory.invalidate_availability()
+
+
+def _google_wrapper(services: MockServices, args) -> Callable[[str], bool]:
+    from search_engines import CustomGoogleSearchAPIWrapper
+    wrapper = CustomGoogleSearchAPIWrapper("benchmark", "benchmark", base_url=services.google_url,
+                                           retry_delay=args.retry_delay)
+    return lambda query: bool(wrapper.results(query, num_results=args.num_results))
+
+
+def _brave(services: MockServices, args) -> Callable[[str], bool]:
+    from search_engines import BraveSearch
+    engine = BraveSearch()
+    return lambda query: bool(engine.search(query))
+
+
+def _search_tool(services: MockServices, args) -> Callable[[str], bool]:
+    from langchain_tools import SearchTool
+    tool = SearchTool(default_engine="customgoogle")
+
+    def run(query: str) -> bool:
+        output = tool._run(query, engine="customgoogle")
+        return not output.startswith(("Search failed", "No search results found"))
+    return run
+
+
+def _agent(services: MockServices, args) -> Callable[[str], bool]:
+    from agent import create_search_agent
+    agent = create_search_agent(llm_type="ollama", search_engine="customgoogle", verbose=False, agent_mode="react")
+    return lambda query: not agent.run(query).startswith("Agent execution failed")
+
+
+# Scenario name -> factory building the operation measured once per request
+SCENARIOS: Dict[str, Callable[[MockServices, Any], Callable[[str], bool]]] = {
+    "google_wrapper": _google_wrapper,
+    "brave": _brave,
+    "search_tool": _search_tool,
+    "agent": _agent,
+}
+
+
+def _timed(operation: Callable[[str], bool], query: str) -> Tuple[float, bool]:
+    started = time.perf_counter()
+    try:
+        ok = operation(query)
+    except Exception:
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def run_scenario(name: str, services: MockServices, args) -> Dict[str, Any]:
+    """
+    Run one scenario and summarize it.
+
+    Every request uses a distinct query, so nothing is answered from a cache
+    unless caching was enabled on purpose.
+
+    Returns:
+        Dict[str, Any]: Request and error counts, throughput, latency percentiles,
+        memory and the number of requests each mock service received
+    """
+    operation = SCENARIOS[name](services, args)
+    for index in range(args.warmup):
+        _timed(operation, f"{name} warmup query {index}")
+
+    gc.collect()
+    requests_before = dict(services.request_counts)
+    rss_before = _rss_mb()
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="benchmark") as executor:
+        samples = list(executor.map(lambda index: _timed(operation, f"{name} benchmark query {index}"),
+                                    range(args.requests)))
+    elapsed = time.perf_counter() - started
+    python_peak = None
+    if args.trace_memory:
+        python_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    rss_after = _rss_mb()
+
+    latencies = [latency * 1000 for latency, _ in samples]
+    errors = sum(1 for _, ok in samples if not ok)
+    return {
+        "requests": len(samples),
+        "concurrency": args.concurrency,
+        "errors": errors,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "throughput_rps": len(samples) / elapsed if elapsed > 0 else None,
+        "latency_mean_ms": sum(latencies) / len(latencies) if latencies else None,
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p95_ms": percentile(latencies, 95),
+        "latency_p99_ms": percentile(latencies, 99),
+        "latency_max_ms": max(latencies) if latencies else None,
+        "python_peak_mb": python_peak,
+        "rss_mb": rss_after,
+        "rss_growth_mb": rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+        "backend_requests": {service: count - requests_before[service]
+                             for service, count in services.request_counts.items()
+                             if count != requests_before[service]},
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Compare two benchmark result files.
+
+    Args:
+        current: Results of this run
+        baseline: Results to compare against
+        threshold: Relative change (e.g. 0.1 for 10%) in the wrong direction counted as a regression
+
+    Returns:
+        List[Dict[str, Any]]: One row per scenario and metric present in both results
+    """
+    rows = []
+    for scenario, results in current["scenarios"].items():
+        old_results = baseline.get("scenarios", {}).get(scenario)
+        if old_results is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = old_results.get(metric), results.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            rows.append({
+                "scenario": scenario,
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change": change,
+                "regressed": (-change if higher_is_better else change) > threshold,
+            })
+    return rows
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(RESULTS_DIR), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _format(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def print_summary(results: Dict[str, Any]):
+    print(f"{'scenario':<16}{'req':>6}{'err':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'peak MB':>9}")
+    for name, summary in results["scenarios"].items():
+        print(f"{name:<16}{summary['requests']:>6}{summary['errors']:>6}{_format(summary['throughput_rps']):>9}"
+              f"{_format(summary['latency_p50_ms']):>9}{_format(summary['latency_p95_ms']):>9}"
+              f"{_format(summary['latency_p99_ms']):>9}{_format(summary['python_peak_mb']):>9}")
+
+
+def print_comparison(rows: List[Dict[str, Any]]):
+    print(f"\n{'scenario':<16}{'metric':<18}{'baseline':>10}{'current':>10}{'change':>9}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regressed"] else ""
+        print(f"{row['scenario']:<16}{row['metric']:<18}{row['baseline']:>10.1f}{row['current']:>10.1f}"
+              f"{row['change']:>+9.1%}{flag}")
+
+
+def run_benchmarks(args) -> Dict[str, Any]:
+    """Start the mock services and run the selected scenarios."""
+    def profile(median: float) -> LatencyProfile:
+        return LatencyProfile(median=median, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+
+    services = MockServices(google=profile(args.google_latency), brave=profile(args.brave_latency),
+                            ollama=profile(args.ollama_latency), token_delay=args.token_delay)
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {key: value for key, value in vars(args).items()
+                         if key not in ("output", "baseline")},
+            "profiles": {name: profile.to_dict() for name, profile in services.profiles.items()},
+        },
+        "scenarios": {},
+    }
+    # Logs of the code under test go through the logging queue, like in production
+    setup_logging(level=args.log_level)
+    try:
+        with services, benchmark_environment(services, with_cache=args.with_cache):
+            for name in args.scenarios:
+                print(f"Running {name} ({args.requests} requests, concurrency {args.concurrency})...", flush=True)
+                results["scenarios"][name] = run_scenario(name, services, args)
+    finally:
+        shutdown_logging()
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline performance benchmarks against mock search and LLM APIs")
+    parser.add_argument("--scenarios", type=lambda value: [name.strip() for name in value.split(",") if name.strip()],
+                        default=list(SCENARIOS), help=f"Comma-separated scenarios (default: {','.join(SCENARIOS)})")
+    parser.add_argument("--requests", type=int, default=100, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests run at the same time")
+    parser.add_argument("--warmup", type=int, default=3, help="Unmeasured requests before each scenario")
+    parser.add_argument("--num-results", type=int, default=10, help="Results per Google search (above 10 fetches several pages)")
+    parser.add_argument("--google-latency", type=float, default=0.08, help="Median Google CSE response time in seconds")
+    parser.add_argument("--brave-latency", type=float, default=0.06, help="Median Brave response time in seconds")
+    parser.add_argument("--ollama-latency", type=float, default=0.2, help="Median Ollama time to first token in seconds")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="Seconds between streamed Ollama tokens")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Standard deviation of the log latency (0 for fixed latencies)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of mock API requests that fail with a 503")
+    parser.add_argument("--retry-delay", type=float, default=0.05, help="First retry backoff of the Google wrapper in seconds")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed of the latency and error distributions")
+    parser.add_argument("--with-cache", action="store_true", help="Keep the search and answer caches enabled")
+    parser.add_argument("--trace-memory", action="store_true", help="Measure peak Python memory with tracemalloc (slows the run)")
+    parser.add_argument("--log-level", type=str, default="CRITICAL", help="Log level of the code under test (default: CRITICAL, i.e. silent)")
+    parser.add_argument("--output", type=str, default=None, help="Result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", type=str, default=None, help="Earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change counted as a regression")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}. Choose from: {', '.join(SCENARIOS)}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    results = run_benchmarks(args)
+    print_summary(results)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            rows = compare(results, json.load(f), args.threshold)
+        print_comparison(rows)
+        if any(row["regressed"] for row in rows):
+            print(f"\nRegressions beyond {args.threshold:.0%} found")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,7 +7,16 @@ load_dotenv()
 # Ollama configuration
 OLLAMA_CONFIG = {
     "host": os.getenv("OLLAMA_HOST", "http://localhost:11434"),
-    "model": os.getenv("OLLAMA_MODEL", "llama3")
+    "model": os.getenv("OLLAMA_MODEL", "llama3"),
+    # How long Ollama keeps the model loaded after a request (e.g. "30m", "-1" for forever)
+    "keep_alive": os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+    # Model used for embeddings (reranking); must be pulled separately, e.g. `ollama pull nomic-embed-text`
+    "embed_model": os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text"),
+    "connect_timeout": float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5")),
+    "read_timeout": float(os.getenv("OLLAMA_READ_TIMEOUT", "300")),
+    "pool_size": int(os.getenv("OLLAMA_POOL_SIZE", "10")),
+    "max_retries": int(os.getenv("OLLAMA_MAX_RETRIES", "3")),
+    "retry_backoff": float(os.getenv("OLLAMA_RETRY_BACKOFF", "0.5"))
 }
 
 # OpenAI-compatible API configuration
@@ -17,6 +26,30 @@ OPENAI_API_CONFIG = {
     "model": os.getenv("OPENAI_MODEL", "gpt-4")
 }
 
+# Agent configuration
+AGENT_CONFIG = {
+    # Queries run at the same time by LangChainSearchAgent.run_batch / --batch-file
+    "batch_concurrency": int(os.getenv("AGENT_BATCH_CONCURRENCY", "4")),
+    # "react" (one tool call per LLM turn) or "plan" (searches planned up front and run in parallel)
+    "mode": os.getenv("AGENT_MODE", "react"),
+    # Searches per question in "plan" mode
+    "max_subqueries": int(os.getenv("AGENT_MAX_SUBQUERIES", "5")),
+    # Token budget of one search observation in the agent scratchpad
+    "observation_token_budget": int(os.getenv("AGENT_OBSERVATION_TOKEN_BUDGET", "800"))
+}
+
+# API server configuration (main.py --serve)
+SERVER_CONFIG = {
+    "host": os.getenv("SERVER_HOST", "127.0.0.1"),
+    "port": int(os.getenv("SERVER_PORT", "8000")),
+    # Requests processed at the same time; the rest wait up to queue_timeout seconds
+    "max_concurrency": int(os.getenv("SERVER_MAX_CONCURRENCY", "32")),
+    "queue_timeout": float(os.getenv("SERVER_QUEUE_TIMEOUT", "30")),
+    "default_llm": os.getenv("SERVER_DEFAULT_LLM", "ollama"),
+    # Build the default agent at startup
+    "warm_up": os.getenv("SERVER_WARM_UP", "true").lower() == "true"
+}
+
 # Search engine configurations (placeholders)
 SEARCH_ENGINES = {
     "google": {
@@ -25,7 +58,9 @@ SEARCH_ENGINES = {
     },
     "custom_google": {
         "api_key": os.getenv("GOOGLE_API_KEY"),
-        "cse_id": os.getenv("GOOGLE_CSE_ID")
+        "cse_id": os.getenv("GOOGLE_CSE_ID"),
+        # Overridable for API gateways and the local stand-ins in benchmarks/
+        "base_url": os.getenv("GOOGLE_CSE_BASE_URL", "https://www.googleapis.com/customsearch/v1")
     },
     "bing": {
         "api_key": os.getenv("BING_API_KEY")
@@ -37,6 +72,201 @@ SEARCH_ENGINES = {
         "api_key": os.getenv("BAIDU_API_KEY")
     },
     "brave": {
-        "api_key": os.getenv("BRAVE_API_KEY")
+        "api_key": os.getenv("BRAVE_API_KEY"),
+        "base_url": os.getenv("BRAVE_API_BASE_URL", "https://api.search.brave.com/res/v1/web/search")
+    }
+}
+
+def _parse_engine_values(value, cast):
+    """Parse "name=value,name=value" settings into a dict."""
+    return {
+        name.strip(): cast(item_value)
+        for name, _, item_value in (item.partition("=") for item in value.split(",") if "=" in item)
     }
+
+# Search result cache configuration
+SEARCH_CACHE_CONFIG = {
+    "enabled": os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true",
+    # SQLite file for the on-disk tier; set to an empty string for a memory-only cache
+    "path": os.path.expanduser(os.getenv(
+        "SEARCH_CACHE_PATH",
+        os.path.join("~", ".cache", "ollama-search-agent", "search_cache.sqlite3")
+    )),
+    "default_ttl": float(os.getenv("SEARCH_CACHE_TTL", "3600")),
+    # Per-engine TTLs in seconds, e.g. "customgoogle=86400,brave=1800"
+    "engine_ttls": _parse_engine_values(os.getenv("SEARCH_CACHE_ENGINE_TTLS", ""), float),
+    "memory_max_entries": int(os.getenv("SEARCH_CACHE_MEMORY_MAX_ENTRIES", "1024")),
+    "disk_max_entries": int(os.getenv("SEARCH_CACHE_DISK_MAX_ENTRIES", "100000"))
+}
+
+# Fan-out search configuration (the "fanout" engine)
+SEARCH_FANOUT_CONFIG = {
+    # Comma-separated engine names; empty means every configured engine
+    "engines": [name.strip() for name in os.getenv("SEARCH_FANOUT_ENGINES", "").split(",") if name.strip()],
+    "latency_budget": float(os.getenv("SEARCH_FANOUT_LATENCY_BUDGET", "5.0")),
+    "rrf_k": int(os.getenv("SEARCH_FANOUT_RRF_K", "60")),
+    "max_results": int(os.getenv("SEARCH_FANOUT_MAX_RESULTS", "10"))
+}
+
+# Hedged search configuration (the "hedged" engine)
+SEARCH_HEDGE_CONFIG = {
+    # Use the hedged engine whenever the search engine is "auto"
+    "enabled": os.getenv("SEARCH_HEDGE_ENABLED", "false").lower() == "true",
+    # Engines to query first and as the hedge; empty picks the two best available engines
+    "primary": os.getenv("SEARCH_HEDGE_PRIMARY", ""),
+    "secondary": os.getenv("SEARCH_HEDGE_SECONDARY", ""),
+    # Send the hedge once the primary is slower than this percentile of its recent latencies
+    "percentile": float(os.getenv("SEARCH_HEDGE_PERCENTILE", "95")),
+    "min_delay": float(os.getenv("SEARCH_HEDGE_MIN_DELAY", "0.2")),
+    "max_delay": float(os.getenv("SEARCH_HEDGE_MAX_DELAY", "3.0")),
+    # Delay used until min_samples latencies have been recorded
+    "default_delay": float(os.getenv("SEARCH_HEDGE_DEFAULT_DELAY", "1.0")),
+    "min_samples": int(os.getenv("SEARCH_HEDGE_MIN_SAMPLES", "20")),
+    # Worker threads shared by all blocking hedged searches; size it for the expected concurrent searches
+    "max_workers": int(os.getenv("SEARCH_HEDGE_MAX_WORKERS", "32"))
+}
+
+# Search rate limiting and daily quotas. Keys are engine names or quota groups;
+# "google_cse" is shared by the customgoogle and google engines.
+SEARCH_RATE_LIMIT_CONFIG = {
+    "enabled": os.getenv("SEARCH_RATE_LIMIT_ENABLED", "true").lower() == "true",
+    # Sustained requests per second, e.g. "google_cse=10,brave=1"
+    "rates": _parse_engine_values(os.getenv("SEARCH_RATE_LIMITS", "google_cse=10,brave=1"), float),
+    # Requests allowed per day (UTC), e.g. "google_cse=100,brave=2000"
+    "daily_quotas": _parse_engine_values(os.getenv("SEARCH_DAILY_QUOTAS", "google_cse=100"), int),
+    # Longest a request waits for the rate limit before failing over to another engine
+    "max_wait": float(os.getenv("SEARCH_RATE_LIMIT_MAX_WAIT", "10")),
+    # JSON file the daily usage counters are persisted to; empty keeps them in memory
+    "quota_path": os.path.expanduser(os.getenv(
+        "SEARCH_QUOTA_PATH",
+        os.path.join("~", ".cache", "ollama-search-agent", "search_quota.json")
+    )),
+    # Seconds between a quota change and the background write that persists it
+    "quota_flush_interval": float(os.getenv("SEARCH_QUOTA_FLUSH_INTERVAL", "5"))
+}
+
+# Retries and circuit breakers for search API requests
+SEARCH_RETRY_CONFIG = {
+    # Attempts per request, including the first one
+    "max_attempts": int(os.getenv("SEARCH_RETRY_MAX_ATTEMPTS", "3")),
+    # Exponential backoff with full jitter: up to base_delay * 2^n, capped at max_delay
+    "base_delay": float(os.getenv("SEARCH_RETRY_BASE_DELAY", "0.5")),
+    "max_delay": float(os.getenv("SEARCH_RETRY_MAX_DELAY", "8")),
+    # Consecutive failures that open an engine's circuit, and seconds before it is probed again
+    "failure_threshold": int(os.getenv("SEARCH_CIRCUIT_FAILURE_THRESHOLD", "5")),
+    "recovery_timeout": float(os.getenv("SEARCH_CIRCUIT_RECOVERY_TIMEOUT", "30"))
+}
+
+# Page fetching for the fetch_pages tool
+PAGE_FETCH_CONFIG = {
+    # Give the agent the fetch_pages tool
+    "enabled": os.getenv("PAGE_FETCH_ENABLED", "true").lower() == "true",
+    # Result pages fetched when the tool is given a search query instead of URLs
+    "top_n": int(os.getenv("PAGE_FETCH_TOP_N", "3")),
+    # Downloads in flight at once, overall and per host
+    "max_concurrency": int(os.getenv("PAGE_FETCH_MAX_CONCURRENCY", "8")),
+    "per_host_limit": int(os.getenv("PAGE_FETCH_PER_HOST_LIMIT", "2")),
+    "timeout": float(os.getenv("PAGE_FETCH_TIMEOUT", "10")),
+    # Bytes read per page; larger pages are cut off
+    "max_bytes": int(os.getenv("PAGE_FETCH_MAX_BYTES", "2000000")),
+    # Tokens of page text passed to the LLM per tool call, shared by the pages
+    "token_budget": int(os.getenv("PAGE_FETCH_TOKEN_BUDGET", "1500")),
+    "user_agent": os.getenv("PAGE_FETCH_USER_AGENT", "Mozilla/5.0 (compatible; ollama-search-agent)"),
+    # Fetch from loopback, private and link-local hosts (e.g. an intranet); off so LLM-chosen
+    # URLs can't reach internal services or cloud metadata endpoints
+    "allow_private_addresses": os.getenv("PAGE_FETCH_ALLOW_PRIVATE_ADDRESSES", "false").lower() == "true",
+    "max_redirects": int(os.getenv("PAGE_FETCH_MAX_REDIRECTS", "5"))
+}
+
+# Reranking of search results before they are passed to the LLM
+RERANK_CONFIG = {
+    "enabled": os.getenv("RERANK_ENABLED", "true").lower() == "true",
+    # Results kept after reranking; 0 keeps them all
+    "top_k": int(os.getenv("RERANK_TOP_K", "5")),
+    # Blend in cosine similarity of Ollama embeddings (OLLAMA_EMBED_MODEL) with the BM25 scores
+    "use_embeddings": os.getenv("RERANK_USE_EMBEDDINGS", "false").lower() == "true",
+    # Weight of the embedding similarity; the BM25 score gets the rest
+    "embedding_weight": float(os.getenv("RERANK_EMBEDDING_WEIGHT", "0.5")),
+    # Seconds to skip embeddings after the embedding request failed
+    "embedding_retry_after": float(os.getenv("RERANK_EMBEDDING_RETRY_AFTER", "60"))
+}
+
+# Semantic cache: reuses search results and answers for queries worded differently
+SEMANTIC_CACHE_CONFIG = {
+    # Needs an Ollama embedding model (OLLAMA_EMBED_MODEL)
+    "enabled": os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true",
+    # Minimum cosine similarity between two queries' embeddings to reuse a cached value
+    "threshold": float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+    "search_ttl": float(os.getenv("SEMANTIC_CACHE_SEARCH_TTL", "3600")),
+    "answer_ttl": float(os.getenv("SEMANTIC_CACHE_ANSWER_TTL", "86400")),
+    # Entries per cache before the least recently used are evicted
+    "max_entries": int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "10000")),
+    # Vector index: "numpy" (brute force), "hnsw" (needs hnswlib) or "auto"
+    "index": os.getenv("SEMANTIC_CACHE_INDEX", "auto"),
+    # With "auto", caches at least this large use HNSW when hnswlib is installed
+    "hnsw_min_entries": int(os.getenv("SEMANTIC_CACHE_HNSW_MIN_ENTRIES", "50000")),
+    # Seconds to skip lookups after the embedding request failed
+    "embedding_retry_after": float(os.getenv("SEMANTIC_CACHE_EMBEDDING_RETRY_AFTER", "60"))
+}
+
+# Final answer cache for LangChainSearchAgent (exact query match per LLM model and search engine)
+ANSWER_CACHE_CONFIG = {
+    # Off by default: answers about current events go out of date quickly
+    "enabled": os.getenv("ANSWER_CACHE_ENABLED", "false").lower() == "true",
+    # SQLite file for the on-disk tier; set to an empty string for a memory-only cache
+    "path": os.path.expanduser(os.getenv(
+        "ANSWER_CACHE_PATH",
+        os.path.join("~", ".cache", "ollama-search-agent", "answer_cache.sqlite3")
+    )),
+    # Seconds an answer is served as fresh
+    "ttl": float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+    # Seconds after that it is still served while a background run refreshes it
+    "stale_ttl": float(os.getenv("ANSWER_CACHE_STALE_TTL", "600")),
+    "memory_max_entries": int(os.getenv("ANSWER_CACHE_MEMORY_MAX_ENTRIES", "256")),
+    "disk_max_entries": int(os.getenv("ANSWER_CACHE_DISK_MAX_ENTRIES", "10000"))
+}
+
+# Deep research mode (DeepResearcher in deep_research.py)
+DEEP_RESEARCH_CONFIG = {
+    "max_subquestions": int(os.getenv("DEEP_RESEARCH_MAX_SUBQUESTIONS", "4")),
+    # Sub-questions researched at the same time
+    "max_workers": int(os.getenv("DEEP_RESEARCH_MAX_WORKERS", "4")),
+    # Budget per report, shared by all workers; includes planning and the report itself
+    "max_llm_calls": int(os.getenv("DEEP_RESEARCH_MAX_LLM_CALLS", "20")),
+    "max_searches": int(os.getenv("DEEP_RESEARCH_MAX_SEARCHES", "16")),
+    # Searches per sub-question (the first plus follow-ups picked by reflection)
+    "max_rounds": int(os.getenv("DEEP_RESEARCH_MAX_ROUNDS", "2")),
+    "results_per_search": int(os.getenv("DEEP_RESEARCH_RESULTS_PER_SEARCH", "5")),
+    # New result pages each worker downloads and reads (0 to use snippets only)
+    "pages_per_question": int(os.getenv("DEEP_RESEARCH_PAGES_PER_QUESTION", "2")),
+    # Tokens of each source's text given to the note-writing prompt
+    "tokens_per_source": int(os.getenv("DEEP_RESEARCH_TOKENS_PER_SOURCE", "400"))
+}
+
+# Step-level tracing (tracing.py): spans for agent runs, LLM calls, tool calls and searches
+TRACING_CONFIG = {
+    # Write finished spans to `path` as OTLP/JSON lines
+    "enabled": os.getenv("TRACING_ENABLED", "false").lower() == "true",
+    "path": os.path.expanduser(os.getenv(
+        "TRACING_PATH",
+        os.path.join("~", ".cache", "ollama-search-agent", "traces.jsonl")
+    )),
+    "service_name": os.getenv("TRACING_SERVICE_NAME", "ollama-search-agent"),
+    # Collect latency, token, cache hit and retry metrics (served at /metrics by --serve)
+    "metrics_enabled": os.getenv("METRICS_ENABLED", "true").lower() == "true"
+}
+
+# Diagnostics logging (logging_setup.py); answers printed by the CLI are not affected
+LOGGING_CONFIG = {
+    "level": os.getenv("LOG_LEVEL", "INFO").upper(),
+    # "text" for people, "json" for log collectors (one JSON object per line)
+    "format": os.getenv("LOG_FORMAT", "text").lower(),
+    # Per-module levels, e.g. "search_engines=DEBUG,langchain_tools.rerank=WARNING"
+    "module_levels": os.getenv("LOG_LEVELS", ""),
+    # Fraction of DEBUG records kept, so DEBUG can stay on under load
+    "debug_sample_rate": float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0")),
+    # "stderr", "stdout" or a file path
+    "output": os.getenv("LOG_OUTPUT", "stderr"),
+    # Records waiting for the background writer; further records are dropped rather than blocking
+    "queue_size": int(os.getenv("LOG_QUEUE_SIZE", "10000"))
 }
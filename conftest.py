@@ -0,0 +1,19 @@
+# conftest.py - pytest setup shared by the test scripts
+import os
+import shutil
+import tempfile
+
+# Point every on-disk cache, quota file and trace file at a scratch directory
+# before config.py reads the environment, so tests never touch ~/.cache
+_scratch_dir = tempfile.mkdtemp(prefix="ollama-search-agent-tests-")
+for _variable, _file_name in (
+    ("SEARCH_CACHE_PATH", "search_cache.sqlite3"),
+    ("SEARCH_QUOTA_PATH", "search_quota.json"),
+    ("ANSWER_CACHE_PATH", "answer_cache.sqlite3"),
+    ("TRACING_PATH", "traces.jsonl"),
+):
+    os.environ[_variable] = os.path.join(_scratch_dir, _file_name)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_scratch_dir, ignore_errors=True)
@@ -0,0 +1,402 @@
+# deep_research.py
+import asyncio
+import logging
+import queue
+import re
+import threading
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from config import DEEP_RESEARCH_CONFIG
+from search_engines import SearchResult, normalize_url
+from langchain_tools import asearch_with_failover, get_page_fetcher, get_reranker, truncate_text
+
+logger = logging.getLogger(__name__)
+
+
+# Marks the end of a report stream
+_STREAM_END = object()
+
+_CITATION_PATTERN = re.compile(r"\[(\d+)\]")
+
+
+class ResearchBudget:
+    """
+    Global limits on LLM calls and searches shared by all sub-question workers.
+
+    Workers take one unit before each call; once a limit is used up, workers
+    wrap up with what they have instead of failing.
+    """
+
+    def __init__(self, llm_calls: int, searches: int):
+        self._remaining = {"llm_calls": llm_calls, "searches": searches}
+        self._lock = threading.Lock()
+
+    def take(self, kind: str) -> bool:
+        """
+        Use one unit of the budget.
+
+        Args:
+            kind: "llm_calls" or "searches"
+
+        Returns:
+            bool: False if that budget is used up
+        """
+        with self._lock:
+            if self._remaining[kind] <= 0:
+                return False
+            self._remaining[kind] -= 1
+            return True
+
+    def remaining(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._remaining)
+
+
+class Evidence:
+    """
+    A source found during research.
+
+    Attributes:
+        number: Citation number, unique across the whole report
+        result: The search result
+        sub_question: Sub-question of the worker that found it first
+        content: Extracted page text, if the page was fetched
+    """
+
+    __slots__ = ("number", "result", "sub_question", "content")
+
+    def __init__(self, number: int, result: SearchResult, sub_question: str):
+        self.number = number
+        self.result = result
+        self.sub_question = sub_question
+        self.content = ""
+
+    def describe(self, max_tokens: int) -> str:
+        """Format the source for a prompt, within a token budget."""
+        text = self.content or self.result.snippet
+        return f"[{self.number}] {self.result.title} ({self.result.url})\n{truncate_text(text, max_tokens)}"
+
+
+class EvidenceStore:
+    """
+    Sources found by all workers, deduplicated by normalized URL.
+
+    A page found by several workers is stored (and fetched) once and keeps
+    one citation number.
+    """
+
+    def __init__(self):
+        self._by_url: Dict[str, Evidence] = {}
+        self._lock = threading.Lock()
+
+    def add(self, results: List[SearchResult], sub_question: str) -> List[Evidence]:
+        """
+        Record search results.
+
+        Args:
+            results: Results from one search
+            sub_question: Sub-question they were found for
+
+        Returns:
+            List[Evidence]: Evidence for every result, new or already known, in result order
+        """
+        evidence = []
+        with self._lock:
+            for result in results:
+                key = normalize_url(result.url)
+                if not key:
+                    continue
+                item = self._by_url.get(key)
+                if item is None:
+                    item = self._by_url[key] = Evidence(len(self._by_url) + 1, result, sub_question)
+                evidence.append(item)
+        return evidence
+
+    def __len__(self) -> int:
+        return len(self._by_url)
+
+    def all(self) -> List[Evidence]:
+        with self._lock:
+            return sorted(self._by_url.values(), key=lambda item: item.number)
+
+
+class Finding:
+    """What one worker found out about its sub-question."""
+
+    __slots__ = ("sub_question", "searches", "evidence", "notes")
+
+    def __init__(self, sub_question: str, searches: List[str], evidence: List[Evidence], notes: str):
+        self.sub_question = sub_question
+        self.searches = searches
+        self.evidence = evidence
+        self.notes = notes
+
+
+class DeepResearcher:
+    """
+    Deep research pipeline: plan, research sub-questions in parallel, write a report.
+
+    1. Plan: one LLM call splits the question into sub-questions.
+    2. Research: a pool of at most ``max_workers`` workers researches the
+       sub-questions concurrently. Each worker searches, reflects on the
+       results to pick a follow-up search (up to ``max_rounds`` searches),
+       fetches its best new pages and writes cited notes. Sources are
+       deduplicated across workers.
+    3. Report: one LLM call, streamed token by token, turns the notes into a
+       report citing the sources.
+
+    All workers share one budget of LLM calls and searches; one LLM call is
+    always kept back for the report.
+    """
+
+    PLAN_PROMPT = """You are planning a research report. Break the following question into at most {max_questions} distinct sub-questions that together cover everything the report needs.
+Write one sub-question per line, with no numbering or explanations.
+
+Question: {query}
+
+Sub-questions:"""
+
+    REFLECT_PROMPT = """You are researching this sub-question: {sub_question}
+(It is part of the larger question: {query})
+
+Searches so far: {searches}
+
+Sources found:
+{sources}
+
+If the sources answer the sub-question, reply with DONE. Otherwise reply with one new web search query that would find the missing information, and nothing else."""
+
+    NOTES_PROMPT = """Write concise research notes answering the sub-question from the sources below.
+Cite sources by their number in brackets, e.g. [3]. Only use information from the sources.
+
+Sub-question: {sub_question}
+
+Sources:
+{sources}
+
+Notes:"""
+
+    REPORT_PROMPT = """Write a well-structured research report answering the question below, based on the research notes.
+Cite sources by their number in brackets, e.g. [3], using the numbers from the notes. Point out open questions or conflicting information.
+
+Question: {query}
+
+Research notes:
+{notes}
+
+Report:"""
+
+    def __init__(self, llm, search_engine: str = "auto", max_subquestions: Optional[int] = None,
+                 max_workers: Optional[int] = None, max_llm_calls: Optional[int] = None,
+                 max_searches: Optional[int] = None, max_rounds: Optional[int] = None,
+                 pages_per_question: Optional[int] = None, verbose: bool = True):
+        """
+        Initialize the pipeline.
+
+        Args:
+            llm: LangChain LLM or chat model
+            search_engine: Search engine name, or "auto"
+            max_subquestions: Maximum number of sub-questions
+            max_workers: Sub-questions researched at the same time
+            max_llm_calls: LLM calls allowed per report, including planning and the report itself
+            max_searches: Searches allowed per report
+            max_rounds: Searches per sub-question
+            pages_per_question: New result pages each worker fetches and reads
+            verbose: Log progress at INFO level rather than DEBUG
+        """
+        self.llm = llm
+        self.search_engine = search_engine
+        self.max_subquestions = max_subquestions or DEEP_RESEARCH_CONFIG["max_subquestions"]
+        self.max_workers = max_workers or DEEP_RESEARCH_CONFIG["max_workers"]
+        self.max_llm_calls = max_llm_calls or DEEP_RESEARCH_CONFIG["max_llm_calls"]
+        self.max_searches = max_searches or DEEP_RESEARCH_CONFIG["max_searches"]
+        self.max_rounds = max_rounds or DEEP_RESEARCH_CONFIG["max_rounds"]
+        self.pages_per_question = (pages_per_question if pages_per_question is not None
+                                   else DEEP_RESEARCH_CONFIG["pages_per_question"])
+        self.verbose = verbose
+
+    def _log(self, message: str):
+        logger.log(logging.INFO if self.verbose else logging.DEBUG, message)
+
+    @staticmethod
+    def _text(output) -> str:
+        """Get the text of an LLM (str) or chat model (message) output."""
+        return getattr(output, "content", output)
+
+    @staticmethod
+    def _lines(text: str) -> List[str]:
+        """Split an LLM list answer into items, dropping list markers, quotes and duplicates."""
+        items = []
+        for line in text.splitlines():
+            line = re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line).strip().strip('"')
+            if line and not line.endswith(":") and line.lower() not in (item.lower() for item in items):
+                items.append(line)
+        return items
+
+    async def _allm(self, budget: ResearchBudget, prompt: str) -> Optional[str]:
+        """Call the LLM if the budget allows; None otherwise."""
+        if not budget.take("llm_calls"):
+            return None
+        return self._text(await self.llm.ainvoke(prompt)).strip()
+
+    async def _asearch(self, query: str) -> List[SearchResult]:
+        results, _ = await asearch_with_failover(query, self.search_engine)
+        reranker = get_reranker()
+        if reranker is not None:
+            results = await reranker.arerank(query, results)
+        return results[:DEEP_RESEARCH_CONFIG["results_per_search"]]
+
+    async def _plan(self, query: str, budget: ResearchBudget) -> List[str]:
+        plan = await self._allm(budget, self.PLAN_PROMPT.format(max_questions=self.max_subquestions, query=query))
+        sub_questions = self._lines(plan or "")[:self.max_subquestions]
+        self._log(f"Research plan: {sub_questions or [query]}")
+        return sub_questions or [query]
+
+    @staticmethod
+    def _sources(evidence: List[Evidence], tokens_per_source: int) -> str:
+        return "\n\n".join(item.describe(tokens_per_source) for item in evidence) or "(none)"
+
+    async def _fetch_pages(self, evidence: List[Evidence]):
+        """Read the pages of sources nobody has fetched yet."""
+        unread = [item for item in evidence if not item.content][:self.pages_per_question]
+        if not unread:
+            return
+        pages = await get_page_fetcher().afetch([item.result.url for item in unread])
+        for item, page in zip(unread, pages):
+            if page.ok and page.text:
+                item.content = page.text
+
+    async def _research(self, query: str, sub_question: str, store: EvidenceStore, budget: ResearchBudget,
+                        workers: asyncio.Semaphore) -> Finding:
+        """
+        Research one sub-question: search and reflect, read the best pages, write notes.
+
+        Failures are logged rather than raised, so one sub-question whose searches
+        or LLM calls fail still returns the evidence gathered up to that point.
+        """
+        async with workers:
+            self._log(f"Researching: {sub_question}")
+            searches: List[str] = []
+            evidence: List[Evidence] = []
+            notes = None
+            search_query = sub_question
+            try:
+                for round_number in range(self.max_rounds):
+                    if not budget.take("searches"):
+                        break
+                    searches.append(search_query)
+                    try:
+                        results = await self._asearch(search_query)
+                    except Exception as e:
+                        logger.warning("Search for '%s' failed: %s", search_query, e)
+                        break
+                    for item in store.add(results, sub_question):
+                        if item not in evidence:
+                            evidence.append(item)
+                    if round_number == self.max_rounds - 1:
+                        break
+
+                    reflection = await self._allm(budget, self.REFLECT_PROMPT.format(
+                        sub_question=sub_question, query=query, searches="; ".join(searches),
+                        sources=self._sources(evidence, 60)
+                    ))
+                    follow_up = self._lines(reflection or "DONE")
+                    if not follow_up or follow_up[0].upper().startswith("DONE") or follow_up[0] in searches:
+                        break
+                    search_query = follow_up[0]
+
+                if self.pages_per_question:
+                    await self._fetch_pages(evidence)
+
+                sources = self._sources(evidence, DEEP_RESEARCH_CONFIG["tokens_per_source"])
+                notes = await self._allm(budget, self.NOTES_PROMPT.format(sub_question=sub_question, sources=sources))
+            except Exception as e:
+                logger.warning("Research on '%s' failed, keeping %d sources: %s", sub_question, len(evidence), e)
+
+            # Out of LLM budget or failed: hand the sources to the report as they are
+            return Finding(sub_question, searches, evidence,
+                           notes or self._sources(evidence, DEEP_RESEARCH_CONFIG["tokens_per_source"]))
+
+    def _report_prompt(self, query: str, findings: List[Finding]) -> str:
+        notes = "\n\n".join(f"## {finding.sub_question}\n{finding.notes}" for finding in findings)
+        return self.REPORT_PROMPT.format(query=query, notes=notes)
+
+    @staticmethod
+    def _bibliography(report: str, store: EvidenceStore) -> str:
+        """List the sources cited in the report (all sources if it cites none)."""
+        cited = {int(number) for number in _CITATION_PATTERN.findall(report)}
+        evidence = [item for item in store.all() if item.number in cited] or store.all()
+        if not evidence:
+            return ""
+        lines = [f"[{item.number}] {item.result.title} - {item.result.url}" for item in evidence]
+        return "\n\nSources:\n" + "\n".join(lines)
+
+    async def astream(self, query: str) -> AsyncIterator[str]:
+        """
+        Research a question, yielding the report token by token as it is written.
+
+        Args:
+            query: Research question
+
+        Yields:
+            str: Pieces of the report, followed by the list of cited sources
+        """
+        # One LLM call is kept back for the report
+        budget = ResearchBudget(self.max_llm_calls - 1, self.max_searches)
+        store = EvidenceStore()
+
+        sub_questions = await self._plan(query, budget)
+        workers = asyncio.Semaphore(self.max_workers)
+        findings = await asyncio.gather(*(
+            self._research(query, sub_question, store, budget, workers) for sub_question in sub_questions
+        ))
+        remaining = budget.remaining()
+        self._log(f"Research done: {len(store)} sources, {self.max_searches - remaining['searches']} searches, "
+                  f"{self.max_llm_calls - 1 - remaining['llm_calls']} LLM calls; writing report")
+
+        report = []
+        async for chunk in self.llm.astream(self._report_prompt(query, list(findings))):
+            token = self._text(chunk)
+            if token:
+                report.append(token)
+                yield token
+        yield self._bibliography("".join(report), store)
+
+    async def arun(self, query: str) -> str:
+        """Research a question and return the whole report."""
+        return "".join([token async for token in self.astream(query)])
+
+    def stream(self, query: str) -> Iterator[str]:
+        """Blocking counterpart of ``astream``; the research runs on its own event loop in a worker thread."""
+        token_queue: "queue.Queue" = queue.Queue()
+        outcome = {}
+
+        async def produce():
+            try:
+                async for token in self.astream(query):
+                    token_queue.put(token)
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                token_queue.put(_STREAM_END)
+
+        worker = threading.Thread(target=asyncio.run, args=(produce(),), daemon=True)
+        worker.start()
+        while True:
+            token = token_queue.get()
+            if token is _STREAM_END:
+                break
+            yield token
+        worker.join()
+        if "error" in outcome:
+            raise outcome["error"]
+
+    def run(self, query: str) -> str:
+        """Research a question and return the whole report."""
+        return "".join(self.stream(query))
+
+
+def create_deep_researcher(llm_type: str = "ollama", search_engine: str = "auto", verbose: bool = True) -> DeepResearcher:
+    """Create a deep research pipeline with the given LLM and search engine."""
+    from agent import create_llm
+    return DeepResearcher(create_llm(llm_type), search_engine=search_engine, verbose=verbose)
@@ -0,0 +1,118 @@
+# http_client.py
+import asyncio
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+import httpx
+
+
+class AsyncClientPool:
+    """
+    Hands out one shared ``httpx.AsyncClient`` per running event loop.
+
+    httpx clients are bound to the event loop they were first used on, so a
+    long-lived object (a search engine or an LLM client) that may be driven
+    from several loops keeps one pooled client per loop instead of opening a
+    new connection pool for every request.
+    """
+
+    def __init__(self, proxies: Optional[Dict[str, str]] = None, timeout: float = 30,
+                 max_connections: int = 100, max_keepalive_connections: int = 20,
+                 **client_kwargs: Any):
+        """
+        Initialize the pool.
+
+        Args:
+            proxies: Proxy settings in requests style (e.g., {'http': 'http://proxy:port', 'https': 'https://proxy:port'})
+            timeout: Request timeout in seconds
+            max_connections: Maximum number of concurrent connections per client
+            max_keepalive_connections: Maximum number of idle keep-alive connections per client
+            **client_kwargs: Additional arguments passed to ``httpx.AsyncClient``
+        """
+        self.proxies = proxies or {}
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.client_kwargs = client_kwargs
+        self._lock = threading.Lock()
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Close tasks scheduled by close(), kept alive until they finish
+        self._closing = set()
+
+    def _build_client(self) -> httpx.AsyncClient:
+        """Create a new client honoring the configured proxies and limits."""
+        mounts = {
+            f"{scheme}://": httpx.AsyncHTTPTransport(proxy=proxy_url, limits=self.limits)
+            for scheme, proxy_url in self.proxies.items()
+            if proxy_url
+        }
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=self.limits,
+            mounts=mounts or None,
+            **self.client_kwargs
+        )
+
+    def get(self) -> httpx.AsyncClient:
+        """
+        Get the client for the currently running event loop.
+
+        Returns:
+            httpx.AsyncClient: Pooled client bound to the running loop
+
+        Raises:
+            RuntimeError: If called outside of a running event loop
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None or client.is_closed:
+                client = self._build_client()
+                self._clients[loop] = client
+            return client
+
+    async def aclose(self):
+        """Close the client bound to the currently running event loop, if any."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+    def close(self):
+        """
+        Close every pooled client from synchronous code.
+
+        Each client is closed on the loop it belongs to: scheduled on a running
+        loop, or run to completion on a stopped one. Clients of a closed loop
+        are just dropped, since their connections went with the loop.
+        """
+        with self._lock:
+            clients = list(self._clients.items())
+            self._clients.clear()
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+
+        for loop, client in clients:
+            if client.is_closed or loop.is_closed():
+                continue
+            if loop is current_loop:
+                task = loop.create_task(client.aclose())
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+            elif loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            elif current_loop is None:
+                loop.run_until_complete(client.aclose())
+            else:
+                # A thread can't run a second loop while its own is running
+                closer = threading.Thread(target=loop.run_until_complete, args=(client.aclose(),))
+                closer.start()
+                closer.join()
@@ -1,4 +1,10 @@
 # langchain_tools/__init__.py
-from .search_tools import SearchTool, create_search_tool
+from .search_tools import SearchTool, create_search_tool, select_search_engine, search_with_failover, asearch_with_failover
+from .formatting import format_search_results, count_tokens, truncate_text
+from .rerank import Reranker, bm25_scores, get_reranker
+from .fetch_tools import FetchPagesTool, FetchedPage, PageFetcher, create_fetch_tool, extract_text, get_page_fetcher
 
-__all__ = ["SearchTool", "create_search_tool"]
+__all__ = ["SearchTool", "create_search_tool", "select_search_engine", "search_with_failover", "asearch_with_failover",
+           "format_search_results", "count_tokens", "truncate_text",
+           "FetchPagesTool", "FetchedPage", "PageFetcher", "create_fetch_tool", "extract_text", "get_page_fetcher",
+           "Reranker", "bm25_scores", "get_reranker"]
@@ -0,0 +1,520 @@
+# langchain_tools/fetch_tools.py
+import asyncio
+import ipaddress
+import logging
+import re
+import socket
+import threading
+from collections import defaultdict
+from html.parser import HTMLParser
+from typing import AsyncIterator, Iterable, List, Optional, Type
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+from langchain.tools import BaseTool
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun, CallbackManagerForToolRun
+from pydantic import BaseModel, Field
+
+from config import PAGE_FETCH_CONFIG
+from http_client import AsyncClientPool
+from .formatting import count_tokens, truncate_text
+from .rerank import get_reranker
+from .search_tools import asearch_with_failover, search_with_failover
+
+logger = logging.getLogger(__name__)
+
+
+_URL_PATTERN = re.compile(r"https?://[^\s,<>\"']+")
+
+# Content types worth extracting text from
+_TEXT_TYPES = {"text/html", "application/xhtml+xml", "text/plain"}
+
+_REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+
+class _NonPublicPeer(Exception):
+    """Raised when a connection turns out to lead to a non-public address."""
+
+
+class _TextExtractor(HTMLParser):
+    """
+    Collects the readable text of an HTML page.
+
+    Scripts, styles and page chrome (navigation, headers, footers, forms) are
+    skipped. Text inside <main> or <article> is also collected separately, as
+    it is usually the page's main content.
+    """
+
+    SKIP_TAGS = {"script", "style", "noscript", "svg", "template", "iframe", "form", "button", "select",
+                 "nav", "header", "footer", "aside"}
+    MAIN_TAGS = {"main", "article"}
+    BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "tr", "table", "section", "pre", "blockquote",
+                  "h1", "h2", "h3", "h4", "h5", "h6", "dt", "dd", "figcaption"} | MAIN_TAGS
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title_parts: List[str] = []
+        self.parts: List[str] = []
+        self.main_parts: List[str] = []
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._in_title = False
+
+    def _append(self, text: str):
+        self.parts.append(text)
+        if self._main_depth:
+            self.main_parts.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        elif tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.MAIN_TAGS:
+            self._main_depth += 1
+        if tag in self.BLOCK_TAGS and not self._skip_depth:
+            self._append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in self.BLOCK_TAGS and not self._skip_depth:
+            self._append("\n")
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        elif tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.MAIN_TAGS:
+            self._main_depth = max(0, self._main_depth - 1)
+        if tag in self.BLOCK_TAGS and not self._skip_depth:
+            self._append("\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title_parts.append(data)
+        elif not self._skip_depth:
+            self._append(data)
+
+
+def _clean_text(parts: List[str]) -> str:
+    """Join text parts, collapsing whitespace and dropping empty lines."""
+    lines = (" ".join(line.split()) for line in "".join(parts).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def extract_text(html: str, min_main_chars: int = 200):
+    """
+    Extract the title and main text of an HTML page.
+
+    Args:
+        html: Page source
+        min_main_chars: Length the <main>/<article> text needs to be preferred over the whole page
+
+    Returns:
+        Tuple[str, str]: The page title and its text
+    """
+    extractor = _TextExtractor()
+    try:
+        extractor.feed(html)
+        extractor.close()
+    except Exception:
+        # Keep whatever was parsed before the markup broke the parser
+        pass
+    title = " ".join("".join(extractor.title_parts).split())
+    main_text = _clean_text(extractor.main_parts)
+    if len(main_text) >= min_main_chars:
+        return title, main_text
+    return title, _clean_text(extractor.parts)
+
+
+def extract_urls(text: str) -> List[str]:
+    """Get the http(s) URLs in a text, in order and without duplicates."""
+    return list(dict.fromkeys(url.rstrip(".;)") for url in _URL_PATTERN.findall(text)))
+
+
+class FetchedPage:
+    """
+    Text extracted from a downloaded page.
+
+    Attributes:
+        url: Requested URL
+        title: Page title
+        text: Extracted text
+        status: HTTP status code, if a response was received
+        error: Why the page could not be read, if it couldn't
+        truncated: Whether the download was cut off at the size limit
+    """
+
+    __slots__ = ("url", "title", "text", "status", "error", "truncated")
+
+    def __init__(self, url: str, title: str = "", text: str = "", status: Optional[int] = None,
+                 error: Optional[str] = None, truncated: bool = False):
+        self.url = url
+        self.title = title
+        self.text = text
+        self.status = status
+        self.error = error
+        self.truncated = truncated
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        return f"FetchedPage(url={self.url!r}, status={self.status!r}, chars={len(self.text)}, error={self.error!r})"
+
+
+class PageFetcher:
+    """
+    Downloads pages concurrently and extracts their text.
+
+    Downloads share one pooled ``httpx.AsyncClient`` per event loop; blocking
+    ``fetch`` calls run on a long-lived loop of the fetcher's own, so they
+    reuse keep-alive connections too. At most ``max_concurrency`` downloads
+    run at once, and at most ``per_host_limit`` of them against the same host.
+    Each page is read up to ``max_bytes`` and must finish within ``timeout``
+    seconds.
+
+    URLs come from the LLM and from users, so unless ``allow_private_addresses``
+    is set, hosts that resolve to loopback, private, link-local or other
+    non-public addresses are refused, at every redirect hop. Since the HTTP
+    client resolves the host again when it connects, the address actually
+    connected to is checked too, before the request is sent, so a host that
+    re-resolves to an internal address (DNS rebinding) is refused as well.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, per_host_limit: Optional[int] = None,
+                 timeout: Optional[float] = None, max_bytes: Optional[int] = None,
+                 user_agent: Optional[str] = None, allow_private_addresses: Optional[bool] = None,
+                 max_redirects: Optional[int] = None):
+        """
+        Initialize the fetcher.
+
+        Args:
+            max_concurrency: Downloads in flight at once
+            per_host_limit: Downloads in flight at once against one host
+            timeout: Seconds allowed per page, including reading the body
+            max_bytes: Bytes read per page
+            user_agent: User-Agent header sent with each request
+            allow_private_addresses: Fetch from hosts on loopback, private and link-local networks
+            max_redirects: Redirects followed per page
+        """
+        self.max_concurrency = max_concurrency or PAGE_FETCH_CONFIG["max_concurrency"]
+        self.per_host_limit = per_host_limit or PAGE_FETCH_CONFIG["per_host_limit"]
+        self.timeout = timeout or PAGE_FETCH_CONFIG["timeout"]
+        self.max_bytes = max_bytes or PAGE_FETCH_CONFIG["max_bytes"]
+        self.allow_private_addresses = (allow_private_addresses if allow_private_addresses is not None
+                                        else PAGE_FETCH_CONFIG["allow_private_addresses"])
+        self.max_redirects = max_redirects if max_redirects is not None else PAGE_FETCH_CONFIG["max_redirects"]
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        self._clients = AsyncClientPool(
+            timeout=self.timeout,
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+            # Redirects are followed by _download so every hop is checked
+            follow_redirects=False,
+            headers={
+                "User-Agent": user_agent or PAGE_FETCH_CONFIG["user_agent"],
+                "Accept": "text/html,application/xhtml+xml,text/plain;q=0.9,*/*;q=0.1"
+            }
+        )
+
+    async def _resolve(self, host: str, port: int) -> List[str]:
+        """Resolve a host name to its IP addresses."""
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        return [info[4][0] for info in infos]
+
+    async def _check_url(self, url: str) -> Optional[str]:
+        """Get the reason a URL must not be fetched, or None if it may be."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            return f"Unsupported URL scheme {parts.scheme or '(none)'!r}"
+        if not parts.hostname:
+            return "URL has no host"
+        if self.allow_private_addresses:
+            return None
+        try:
+            addresses = [ipaddress.ip_address(parts.hostname)]
+        except ValueError:
+            try:
+                port = parts.port or (443 if parts.scheme == "https" else 80)
+                addresses = [ipaddress.ip_address(address.split("%")[0])
+                             for address in await self._resolve(parts.hostname, port)]
+            except (OSError, ValueError) as e:
+                return f"Could not resolve {parts.hostname}: {e}"
+        for address in addresses:
+            if not address.is_global:
+                return f"Refusing to fetch from non-public address {address} ({parts.hostname})"
+        return None
+
+    @staticmethod
+    async def _check_peer(event_name: str, info: dict):
+        """
+        httpx trace hook: refuse a new connection whose peer is not a public address.
+
+        Runs right after the TCP connection is made and before anything is sent
+        on it. Pooled connections were checked when they were opened.
+        """
+        if event_name != "connection.connect_tcp.complete":
+            return
+        stream = info["return_value"]
+        peer = stream.get_extra_info("server_addr")
+        if peer is None:
+            return
+        address = ipaddress.ip_address(peer[0].split("%")[0])
+        if not address.is_global:
+            await stream.aclose()
+            raise _NonPublicPeer(f"Refusing to fetch from non-public address {address} (resolved on connect)")
+
+    async def _download(self, url: str) -> FetchedPage:
+        client = self._clients.get()
+        extensions = {} if self.allow_private_addresses else {"trace": self._check_peer}
+        target = url
+        for _ in range(self.max_redirects + 1):
+            error = await self._check_url(target)
+            if error is not None:
+                return FetchedPage(url, error=error)
+            try:
+                async with client.stream("GET", target, extensions=extensions) as response:
+                    location = response.headers.get("location")
+                    if response.status_code in _REDIRECT_STATUSES and location:
+                        target = urljoin(target, location)
+                        continue
+                    return await self._read(url, response)
+            except _NonPublicPeer as e:
+                return FetchedPage(url, error=str(e))
+        return FetchedPage(url, error=f"Too many redirects (more than {self.max_redirects})")
+
+    async def _read(self, url: str, response: httpx.Response) -> FetchedPage:
+        """Read the body of a final (non-redirect) response and extract its text."""
+        if response.status_code >= 400:
+            return FetchedPage(url, status=response.status_code, error=f"HTTP {response.status_code}")
+        content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type and content_type not in _TEXT_TYPES:
+            return FetchedPage(url, status=response.status_code, error=f"Unsupported content type {content_type}")
+
+        chunks = []
+        size = 0
+        truncated = False
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                truncated = True
+                break
+        body = b"".join(chunks)[:self.max_bytes]
+        encoding = response.charset_encoding or "utf-8"
+
+        try:
+            content = body.decode(encoding, errors="replace")
+        except LookupError:
+            content = body.decode("utf-8", errors="replace")
+        if content_type == "text/plain":
+            title, text = "", _clean_text([content])
+        else:
+            # Parsing is CPU-bound; keep the event loop free for the other downloads
+            title, text = await asyncio.to_thread(extract_text, content)
+        return FetchedPage(url, title=title, text=text, status=response.status_code, truncated=truncated)
+
+    async def _fetch_one(self, url: str, limit: asyncio.Semaphore,
+                         host_limits: "defaultdict[str, asyncio.Semaphore]") -> FetchedPage:
+        host = urlsplit(url).hostname or ""
+        async with limit, host_limits[host]:
+            try:
+                return await asyncio.wait_for(self._download(url), self.timeout)
+            except asyncio.TimeoutError:
+                return FetchedPage(url, error=f"Timed out after {self.timeout:g}s")
+            except (httpx.HTTPError, httpx.InvalidURL) as e:
+                return FetchedPage(url, error=f"{type(e).__name__}: {e}")
+
+    async def aiter_pages(self, urls: Iterable[str]) -> AsyncIterator[FetchedPage]:
+        """
+        Fetch pages concurrently, yielding each one as soon as it has been read.
+
+        Args:
+            urls: Page URLs
+
+        Yields:
+            FetchedPage: Pages in completion order; failures are reported in ``error``
+        """
+        limit = asyncio.Semaphore(self.max_concurrency)
+        host_limits = defaultdict(lambda: asyncio.Semaphore(self.per_host_limit))
+        tasks = [asyncio.ensure_future(self._fetch_one(url, limit, host_limits)) for url in dict.fromkeys(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # The consumer stopped early or was cancelled
+            for task in tasks:
+                task.cancel()
+
+    async def afetch(self, urls: Iterable[str]) -> List[FetchedPage]:
+        """
+        Fetch pages concurrently.
+
+        Args:
+            urls: Page URLs
+
+        Returns:
+            List[FetchedPage]: One page per distinct URL, in the order given
+        """
+        urls = list(dict.fromkeys(urls))
+        pages = {page.url: page async for page in self.aiter_pages(urls)}
+        return [pages[url] for url in urls]
+
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the fetcher's event loop for blocking callers, starting its thread on first use."""
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="page-fetcher", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def fetch(self, urls: Iterable[str]) -> List[FetchedPage]:
+        """
+        Blocking counterpart of ``afetch``.
+
+        Every call runs on the same background event loop, so its pooled client
+        and keep-alive connections are reused across calls. Safe to call from
+        inside a running event loop, which it blocks until the pages are read.
+        """
+        future = asyncio.run_coroutine_threadsafe(self.afetch(list(urls)), self._background_loop())
+        return future.result()
+
+    def close(self):
+        """Close the background loop's client and stop the loop."""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is None or loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._clients.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+
+_page_fetcher: Optional[PageFetcher] = None
+_page_fetcher_lock = threading.Lock()
+
+
+def get_page_fetcher() -> PageFetcher:
+    """Get the shared page fetcher, configured from PAGE_FETCH_CONFIG."""
+    global _page_fetcher
+    if _page_fetcher is None:
+        with _page_fetcher_lock:
+            if _page_fetcher is None:
+                _page_fetcher = PageFetcher()
+    return _page_fetcher
+
+
+def format_pages(pages: List[FetchedPage], token_budget: Optional[int] = None) -> str:
+    """
+    Format fetched pages for the LLM within a token budget.
+
+    Each page may use its share of the remaining budget, so budget left over
+    by short or failed pages goes to the following ones. Long texts are cut at
+    a sentence boundary.
+
+    Args:
+        pages: Fetched pages, best first
+        token_budget: Maximum tokens of the output; defaults to PAGE_FETCH_CONFIG["token_budget"]
+
+    Returns:
+        str: Formatted page texts
+    """
+    if not pages:
+        return "No pages to fetch."
+    if token_budget is None:
+        token_budget = PAGE_FETCH_CONFIG["token_budget"]
+
+    remaining = token_budget
+    blocks = []
+    for index, page in enumerate(pages):
+        lines = [f"Page {index + 1}: {page.title or page.url}\n", f"  URL: {page.url}\n"]
+        if not page.ok:
+            lines.append(f"  Error: {page.error}\n")
+        elif not page.text:
+            lines.append("  Content: (no text found)\n")
+        else:
+            head_tokens = count_tokens("".join(lines) + "  Content: \n\n")
+            share = remaining // (len(pages) - index)
+            text = truncate_text(page.text, max(share - head_tokens, 0))
+            lines.append(f"  Content: {text}\n" if text else "  Content: (left out, token budget used up)\n")
+        lines.append("\n")
+        block = "".join(lines)
+        blocks.append(block)
+        remaining -= count_tokens(block)
+    return "".join(blocks)
+
+
+class FetchPagesInput(BaseModel):
+    """Input schema for the fetch_pages tool."""
+    target: str = Field(
+        description="One or more URLs separated by spaces, or a search query whose top results should be read"
+    )
+
+
+class FetchPagesTool(BaseTool):
+    """LangChain tool that reads the full text of web pages."""
+
+    name: str = "fetch_pages"
+    description: str = (
+        "Read the full text of web pages. "
+        "Input is one or more URLs (for example from web_search results), or a search query whose top "
+        "results should be read. Use this when search snippets are not detailed enough."
+    )
+    args_schema: Type[BaseModel] = FetchPagesInput
+    engine: str = "auto"  # Search engine used when the input is a query
+    top_n: Optional[int] = None  # Result pages read for a query; None uses PAGE_FETCH_CONFIG
+    token_budget: Optional[int] = None  # Observation size in tokens; None uses PAGE_FETCH_CONFIG
+
+    def _top_n(self) -> int:
+        return self.top_n or PAGE_FETCH_CONFIG["top_n"]
+
+    def _run(self, target: str, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
+        """Fetch the given pages (or the top search results) and return their text."""
+        try:
+            urls = extract_urls(target)
+            if not urls:
+                results, _ = search_with_failover(target, self.engine)
+                reranker = get_reranker()
+                if reranker is not None:
+                    results = reranker.rerank(target, results)
+                urls = [result.url for result in results[:self._top_n()] if result.url]
+            logger.debug("Fetching %d pages", len(urls))
+            return format_pages(get_page_fetcher().fetch(urls), self.token_budget)
+
+        except Exception as e:
+            error_msg = f"Fetching pages failed: {str(e)}"
+            logger.error(error_msg)
+            return error_msg
+
+    async def _arun(self, target: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None) -> str:
+        """Fetch pages without blocking the event loop, streaming each page's text to callbacks as it arrives."""
+        try:
+            urls = extract_urls(target)
+            if not urls:
+                results, _ = await asearch_with_failover(target, self.engine)
+                reranker = get_reranker()
+                if reranker is not None:
+                    results = await reranker.arerank(target, results)
+                urls = [result.url for result in results[:self._top_n()] if result.url]
+            logger.debug("Fetching %d pages", len(urls))
+
+            pages = {}
+            async for page in get_page_fetcher().aiter_pages(urls):
+                pages[page.url] = page
+                if run_manager is not None and page.ok:
+                    await run_manager.on_text(f"{page.url}\n{page.text}\n\n")
+            # The observation lists pages in result order, not arrival order
+            return format_pages([pages[url] for url in dict.fromkeys(urls)], self.token_budget)
+
+        except Exception as e:
+            error_msg = f"Fetching pages failed: {str(e)}"
+            logger.error(error_msg)
+            return error_msg
+
+
+def create_fetch_tool(engine: str = "auto", token_budget: Optional[int] = None) -> FetchPagesTool:
+    """Create a page fetching tool that searches with the given engine when given a query."""
+    return FetchPagesTool(engine=engine, token_budget=token_budget)
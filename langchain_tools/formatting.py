@@ -0,0 +1,165 @@
+# langchain_tools/formatting.py
+import logging
+import re
+import threading
+from typing import Any, Iterable, List, Optional
+from search_engines import SearchResult, to_search_results
+from config import AGENT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+# Encoding matching current OpenAI chat models; a close enough estimate for Llama-family models
+_ENCODING_NAME = "cl100k_base"
+_encoding = None
+_encoding_loading = False
+_encoding_lock = threading.Lock()
+
+# Sentence ends: terminal punctuation (optionally followed by a closing quote/bracket) and whitespace
+_SENTENCE_END = re.compile(r"[.!?][\"')\]]?\s")
+
+
+def _load_encoding():
+    global _encoding
+    try:
+        import tiktoken
+        _encoding = tiktoken.get_encoding(_ENCODING_NAME)
+    except Exception as e:
+        # Not installed, or the encoding file isn't cached and can't be downloaded
+        logger.debug("tiktoken encoding unavailable, estimating token counts: %s", e)
+
+
+def _get_encoding():
+    """
+    Get the tiktoken encoding; None while it is loading or if it is unavailable.
+
+    The first call loads it on a background thread, since tiktoken downloads the
+    encoding file when it isn't cached. Callers never wait for it and use the
+    character estimate until it is ready.
+    """
+    global _encoding_loading
+    if _encoding is None and not _encoding_loading:
+        with _encoding_lock:
+            if not _encoding_loading:
+                _encoding_loading = True
+                threading.Thread(target=_load_encoding, name="tiktoken-loader", daemon=True).start()
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens in a text.
+
+    Uses tiktoken once its encoding is loaded and falls back to an estimate
+    of four characters per token until then or if it is unavailable.
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """
+    Shorten a text to at most ``max_tokens`` tokens.
+
+    The cut is made at the last sentence end that fits, or at the last word
+    boundary (marked with "...") when the first sentence alone is too long.
+
+    Args:
+        text: Text to shorten
+        max_tokens: Token budget for the text
+
+    Returns:
+        str: The text, shortened if needed
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    # Start from a character estimate and shrink until the count fits
+    limit = min(len(text), max_tokens * 4)
+    while limit > 0:
+        candidate = text[:limit]
+        sentence_ends = [match.end() for match in _SENTENCE_END.finditer(candidate + " ")]
+        if sentence_ends:
+            candidate = candidate[:sentence_ends[-1]].rstrip()
+        else:
+            candidate = candidate.rsplit(" ", 1)[0].rstrip(" ,;:") + "..."
+        if count_tokens(candidate) <= max_tokens:
+            return candidate
+        limit = int(limit * 0.8)
+    return ""
+
+
+def _ordered(results: Iterable[Any]) -> List[SearchResult]:
+    """Order results best first: by rank where engines provided one, keeping ties stable."""
+    results = to_search_results(results)
+    return sorted(results, key=lambda result: result.rank if result.rank is not None else float("inf"))
+
+
+def format_search_results(results: Iterable[Any], query: str, token_budget: Optional[int] = None,
+                          min_snippet_tokens: int = 12) -> str:
+    """
+    Format search results for the LLM within a token budget.
+
+    Results are packed best first. Each result may use its fair share of the
+    remaining budget (budget / results left), so short snippets leave room for
+    longer ones further down; snippets over their share are cut at a sentence
+    boundary. Results that no longer fit with a minimal snippet are dropped.
+
+    Args:
+        results: Search results (SearchResult objects or dicts)
+        query: The search query
+        token_budget: Maximum tokens of the output; defaults to AGENT_CONFIG["observation_token_budget"]
+        min_snippet_tokens: Smallest snippet worth including
+
+    Returns:
+        str: Formatted results
+    """
+    results = _ordered(results)
+    if not results:
+        return f"No search results found for query: '{query}'"
+    if token_budget is None:
+        token_budget = AGENT_CONFIG["observation_token_budget"]
+
+    header = f"Found {len(results)} search results for '{query}':\n\n"
+    # Reserve room for the longer header used when results are left out
+    short_header = f"Found {len(results)} search results for '{query}' (showing the top {len(results)}):\n\n"
+    remaining = token_budget - count_tokens(short_header)
+    snippet_overhead = count_tokens("  Snippet: \n")
+    blocks = []
+
+    for index, result in enumerate(results):
+        lines = [f"Result {index + 1}:\n"]
+        if result.title:
+            lines.append(f"  Title: {result.title}\n")
+        if result.url:
+            lines.append(f"  URL: {result.url}\n")
+        head = "".join(lines)
+        # The blank line closing the block counts towards the head
+        head_tokens = count_tokens(head + "\n")
+
+        snippet = ""
+        if result.snippet:
+            fixed = head_tokens + snippet_overhead
+            if fixed + min_snippet_tokens > remaining:
+                break
+            share = remaining // (len(results) - index)
+            allowed = min(max(share - fixed, min_snippet_tokens), remaining - fixed)
+            snippet = truncate_text(result.snippet, allowed)
+            if snippet:
+                snippet = f"  Snippet: {snippet}\n"
+        elif head_tokens > remaining:
+            break
+
+        block = head + snippet + "\n"
+        blocks.append(block)
+        remaining -= count_tokens(block)
+
+    if len(blocks) < len(results):
+        header = f"Found {len(results)} search results for '{query}' (showing the top {len(blocks)}):\n\n"
+    return header + "".join(blocks)
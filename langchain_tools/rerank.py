@@ -0,0 +1,217 @@
+# langchain_tools/rerank.py
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from search_engines import SearchResult, to_search_results
+from config import RERANK_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split a text into lowercase word tokens."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def bm25_scores(query: str, documents: Sequence[str], k1: float = 1.5, b: float = 0.75) -> np.ndarray:
+    """
+    Score documents against a query with Okapi BM25.
+
+    Only the query's terms can contribute to a score, so the term frequency
+    matrix has one column per distinct query term and the scoring is a few
+    array operations over it. Document frequencies come from the documents
+    themselves.
+
+    Args:
+        query: Search query
+        documents: Texts to score
+        k1: Term frequency saturation
+        b: Document length normalization
+
+    Returns:
+        np.ndarray: One score per document
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not documents or not terms:
+        return np.zeros(len(documents))
+
+    columns = {term: column for column, term in enumerate(terms)}
+    frequencies = np.zeros((len(documents), len(terms)))
+    lengths = np.zeros(len(documents))
+    for row, document in enumerate(documents):
+        tokens = tokenize(document)
+        lengths[row] = len(tokens)
+        for token, count in Counter(tokens).items():
+            column = columns.get(token)
+            if column is not None:
+                frequencies[row, column] = count
+
+    document_frequency = (frequencies > 0).sum(axis=0)
+    idf = np.log1p((len(documents) - document_frequency + 0.5) / (document_frequency + 0.5))
+    average_length = lengths.mean() or 1.0
+    norm = k1 * (1 - b + b * lengths / average_length)
+    return ((frequencies * (k1 + 1)) / (frequencies + norm[:, None]) * idf).sum(axis=1)
+
+
+def cosine_scores(query_embedding: Sequence[float], embeddings: Sequence[Sequence[float]]) -> np.ndarray:
+    """Get the cosine similarity between a query embedding and each document embedding."""
+    matrix = np.asarray(embeddings, dtype=float)
+    query_vector = np.asarray(query_embedding, dtype=float)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vector)
+    return matrix @ query_vector / np.where(norms == 0, 1.0, norms)
+
+
+def _normalize(scores: np.ndarray) -> np.ndarray:
+    """Scale scores to [0, 1]; all-equal scores become zeros."""
+    spread = scores.max() - scores.min() if len(scores) else 0.0
+    if spread <= 0:
+        return np.zeros(len(scores))
+    return (scores - scores.min()) / spread
+
+
+class Reranker:
+    """
+    Orders search results by relevance to the query.
+
+    Every result is scored with BM25 over its title and snippet. With
+    embeddings enabled, the query and all candidates are embedded by Ollama in
+    one batched request and the cosine similarity is blended in. Results with
+    equal scores keep the engine's order.
+    """
+
+    def __init__(self, top_k: Optional[int] = None, use_embeddings: Optional[bool] = None,
+                 embedding_weight: Optional[float] = None, embedding_client=None):
+        """
+        Initialize the reranker.
+
+        Args:
+            top_k: Results kept after reranking; 0 keeps them all
+            use_embeddings: Blend in Ollama embedding similarity
+            embedding_weight: Weight of the embedding similarity against BM25
+            embedding_client: Client with ``embed``/``aembed`` methods; defaults to an OllamaClient
+        """
+        self.top_k = top_k if top_k is not None else RERANK_CONFIG["top_k"]
+        self.use_embeddings = use_embeddings if use_embeddings is not None else RERANK_CONFIG["use_embeddings"]
+        self.embedding_weight = embedding_weight if embedding_weight is not None else RERANK_CONFIG["embedding_weight"]
+        self._embedding_client = embedding_client
+        self._embeddings_paused_until = 0.0
+
+    def _get_embedding_client(self):
+        if self._embedding_client is None:
+            from llm_clients import OllamaClient
+            self._embedding_client = OllamaClient()
+        return self._embedding_client
+
+    def _wants_embeddings(self) -> bool:
+        return self.use_embeddings and time.monotonic() >= self._embeddings_paused_until
+
+    def _embedding_failed(self):
+        # Don't slow every search down while the embedding model is unavailable
+        retry_after = RERANK_CONFIG["embedding_retry_after"]
+        self._embeddings_paused_until = time.monotonic() + retry_after
+        logger.warning("Reranking without embeddings for the next %gs", retry_after)
+
+    def _combine(self, query: str, texts: List[str], embeddings: Optional[List]) -> np.ndarray:
+        scores = _normalize(bm25_scores(query, texts))
+        if embeddings is None:
+            return scores
+        if len(embeddings) != len(texts) + 1:
+            self._embedding_failed()
+            return scores
+        similarity = _normalize(cosine_scores(embeddings[0], embeddings[1:]))
+        return (1 - self.embedding_weight) * scores + self.embedding_weight * similarity
+
+    def score_texts(self, query: str, texts: Sequence[str]) -> np.ndarray:
+        """
+        Score texts (snippets or page passages) against a query.
+
+        Args:
+            query: Search query
+            texts: Texts to score
+
+        Returns:
+            np.ndarray: One score in [0, 1] per text
+        """
+        texts = list(texts)
+        embeddings = None
+        if texts and self._wants_embeddings():
+            embeddings = self._get_embedding_client().embed([query] + texts)
+            if embeddings is None:
+                self._embedding_failed()
+        return self._combine(query, texts, embeddings)
+
+    async def ascore_texts(self, query: str, texts: Sequence[str]) -> np.ndarray:
+        """Non-blocking counterpart of ``score_texts``."""
+        texts = list(texts)
+        embeddings = None
+        if texts and self._wants_embeddings():
+            embeddings = await self._get_embedding_client().aembed([query] + texts)
+            if embeddings is None:
+                self._embedding_failed()
+        return self._combine(query, texts, embeddings)
+
+    @staticmethod
+    def _result_text(result: SearchResult) -> str:
+        return f"{result.title}\n{result.snippet}"
+
+    def _order(self, results: List[SearchResult], scores: np.ndarray) -> List[SearchResult]:
+        # Stable sort: equal scores keep the engine's order
+        order = np.argsort(-scores, kind="stable")
+        if self.top_k:
+            order = order[:self.top_k]
+        reranked = []
+        for rank, index in enumerate(order, 1):
+            # Copies, so results held by caches are not changed
+            result = results[index].copy()
+            result.score = float(scores[index])
+            result.rank = rank
+            reranked.append(result)
+        return reranked
+
+    def rerank(self, query: str, results: Iterable) -> List[SearchResult]:
+        """
+        Order results by relevance to the query.
+
+        Args:
+            query: Search query
+            results: Search results
+
+        Returns:
+            List[SearchResult]: The best ``top_k`` results with ``score`` and ``rank`` set
+        """
+        results = to_search_results(results)
+        if not results:
+            return []
+        return self._order(results, self.score_texts(query, [self._result_text(result) for result in results]))
+
+    async def arerank(self, query: str, results: Iterable) -> List[SearchResult]:
+        """Non-blocking counterpart of ``rerank``."""
+        results = to_search_results(results)
+        if not results:
+            return []
+        return self._order(results, await self.ascore_texts(query, [self._result_text(result) for result in results]))
+
+
+_reranker: Optional[Reranker] = None
+_reranker_lock = threading.Lock()
+
+
+def get_reranker() -> Optional[Reranker]:
+    """Get the shared reranker configured from RERANK_CONFIG, or None if reranking is disabled."""
+    global _reranker
+    if not RERANK_CONFIG["enabled"]:
+        return None
+    if _reranker is None:
+        with _reranker_lock:
+            if _reranker is None:
+                _reranker = Reranker()
+    return _reranker
@@ -1,8 +1,100 @@
 # langchain_tools/search_tools.py
-from typing import Type, Dict, Any, List
+import logging
+from typing import Type, Dict, Any, List, Optional, Tuple
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
-from search_engines import create_search_engine, get_default_search_engine, list_available_engines
+from search_engines import BaseSearch, get_search_engine, get_default_search_engine_name, list_available_engines, CachedSearch, TracedSearch
+from search_engines import EngineUnavailableError, SearchResult, get_fallback_search_engine_names, to_search_results
+from config import SEARCH_CACHE_CONFIG, SEARCH_HEDGE_CONFIG
+from semantic_cache import get_semantic_cache
+from tracing import get_metrics, set_attribute, tracing_enabled
+from .formatting import format_search_results
+from .rerank import get_reranker
+
+logger = logging.getLogger(__name__)
+
+
+def select_search_engine(engine: str = "auto") -> Tuple[BaseSearch, str]:
+    """
+    Resolve an engine name to a ready-to-use search engine.
+    
+    Args:
+        engine: Engine name, or 'auto' for the default engine
+        
+    Returns:
+        Tuple[BaseSearch, str]: The pooled engine (wrapped with the result cache
+        and tracing when enabled) and the resolved engine name
+    """
+    if engine == "auto":
+        # Hedging wraps the default engine and picks a second one itself
+        engine_name = "hedged" if SEARCH_HEDGE_CONFIG["enabled"] else get_default_search_engine_name()
+        logger.debug("Auto-selecting search engine: %s", engine_name)
+    else:
+        engine_name = engine
+    search_engine = get_search_engine(engine_name)
+    
+    if SEARCH_CACHE_CONFIG["enabled"]:
+        search_engine = CachedSearch(search_engine, engine_name)
+    if tracing_enabled():
+        search_engine = TracedSearch(search_engine, engine_name)
+    return search_engine, engine_name
+
+
+def _next_engine(engine_name: str, error: EngineUnavailableError, tried: List[str]) -> str:
+    """Pick the engine to fail over to, re-raising the error when none is left."""
+    tried.append(engine_name)
+    fallbacks = get_fallback_search_engine_names(exclude=tried)
+    if not fallbacks:
+        raise error
+    logger.warning("%s unavailable (%s); failing over to %s", engine_name, error, fallbacks[0],
+                   extra={"engine": engine_name})
+    return fallbacks[0]
+
+
+def search_with_failover(query: str, engine: str = "auto") -> Tuple[List[SearchResult], str]:
+    """
+    Search with the selected engine, moving on to the next available engine
+    when one is rate limited or out of quota.
+
+    Args:
+        query: The search query
+        engine: Engine name, or 'auto' for the default engine
+
+    Returns:
+        Tuple[List[SearchResult], str]: The results and the name of the engine that produced them
+
+    Raises:
+        EngineUnavailableError: If no engine is left to fail over to
+    """
+    search_engine, engine_name = select_search_engine(engine)
+    tried: List[str] = []
+    while True:
+        logger.debug("Searching with %s engine for: '%s'", engine_name, query,
+                     extra={"engine": engine_name, "query": query})
+        try:
+            return to_search_results(search_engine.search(query), engine_name), engine_name
+        except EngineUnavailableError as e:
+            search_engine, engine_name = select_search_engine(_next_engine(engine_name, e, tried))
+
+
+async def asearch_with_failover(query: str, engine: str = "auto") -> Tuple[List[SearchResult], str]:
+    """Non-blocking counterpart of ``search_with_failover``."""
+    search_engine, engine_name = select_search_engine(engine)
+    tried: List[str] = []
+    while True:
+        logger.debug("Searching with %s engine for: '%s'", engine_name, query,
+                     extra={"engine": engine_name, "query": query})
+        try:
+            return to_search_results(await search_engine.asearch(query), engine_name), engine_name
+        except EngineUnavailableError as e:
+            search_engine, engine_name = select_search_engine(_next_engine(engine_name, e, tried))
+
+
+def _log_semantic_hit(query: str, hit) -> None:
+    logger.debug("Semantic cache hit for '%s' (cached query: '%s', similarity %.2f)", query, hit.query,
+                 hit.similarity, extra={"query": query})
+    set_attribute("cache.hit", "semantic")
+    get_metrics().inc("cache_hits_total", cache="search_semantic")
 
 
 class SearchInput(BaseModel):
@@ -25,6 +117,7 @@ class SearchTool(BaseTool):
     )
     args_schema: Type[BaseModel] = SearchInput
     default_engine: str = "auto"  # Define as a proper Pydantic field
+    token_budget: Optional[int] = None  # Observation size in tokens; None uses AGENT_CONFIG
     
     def __init__(self, default_engine: str = "auto", **kwargs):
         super().__init__(default_engine=default_engine, **kwargs)
@@ -32,23 +125,49 @@ class SearchTool(BaseTool):
         if not hasattr(SearchTool, '_available_engines'):
             SearchTool._available_engines = list_available_engines()
     
+    def _resolve_engine(self, engine: str) -> str:
+        """Fall back to the engine the tool was created with."""
+        return self.default_engine if engine == "auto" else engine
+
+    def _search(self, query: str, engine: str) -> List[SearchResult]:
+        """Search, reusing the results of a similar earlier query when the semantic cache is enabled."""
+        engine = self._resolve_engine(engine)
+        cache = get_semantic_cache("search")
+        hit = cache.lookup(query, context=engine) if cache is not None else None
+        if hit is not None:
+            _log_semantic_hit(query, hit)
+            return [SearchResult.from_row(row) for row in hit.value]
+
+        # Execute search, failing over to other engines when rate limited
+        results, _ = search_with_failover(query, engine)
+        if cache is not None and results:
+            cache.store(query, [result.to_row() for result in results], context=engine)
+        return results
+
+    async def _asearch(self, query: str, engine: str) -> List[SearchResult]:
+        """Non-blocking counterpart of ``_search``."""
+        engine = self._resolve_engine(engine)
+        cache = get_semantic_cache("search")
+        hit = await cache.alookup(query, context=engine) if cache is not None else None
+        if hit is not None:
+            _log_semantic_hit(query, hit)
+            return [SearchResult.from_row(row) for row in hit.value]
+
+        results, _ = await asearch_with_failover(query, engine)
+        if cache is not None and results:
+            await cache.astore(query, [result.to_row() for result in results], context=engine)
+        return results
+
     def _run(self, query: str, engine: str = "auto") -> str:
         """Execute a web search and return formatted results."""
         try:
-            # Select search engine
-            if engine == "auto":
-                search_engine = get_default_search_engine()
-                engine_name = search_engine.__class__.__name__.lower().replace('search', '')
-                print(f"--- Auto-selecting search engine: {engine_name} ---")
-            else:
-                search_engine = create_search_engine(engine)
-                engine_name = engine
-            
-            print(f"--- Searching with {engine_name} engine for: '{query}' ---")
-            
-            # Execute search
-            results = search_engine.search(query)
-            
+            results = self._search(query, engine)
+
+            # Put the most relevant results first and drop the rest
+            reranker = get_reranker()
+            if reranker is not None:
+                results = reranker.rerank(query, results)
+
             # Format results for LLM consumption
             formatted_results = self._format_search_results(results, query)
             
@@ -56,35 +175,28 @@ class SearchTool(BaseTool):
             
         except Exception as e:
             error_msg = f"Search failed: {str(e)}"
-            print(f"Error: {error_msg}")
+            logger.error(error_msg)
             return error_msg
     
-    def _format_search_results(self, results: List[Dict[str, Any]], query: str) -> str:
-        """Format search results into a readable string for the LLM."""
-        if not results:
-            return f"No search results found for query: '{query}'"
-        
-        formatted = f"Found {len(results)} search results for '{query}':\n\n"
-        
-        for i, result in enumerate(results, 1):
-            formatted += f"Result {i}:\n"
-            
-            if 'title' in result and result['title']:
-                formatted += f"  Title: {result['title']}\n"
-            
-            if 'link' in result and result['link']:
-                formatted += f"  URL: {result['link']}\n"
-            
-            if 'snippet' in result and result['snippet']:
-                # Truncate long snippets for readability
-                snippet = result['snippet']
-                if len(snippet) > 300:
-                    snippet = snippet[:300] + "..."
-                formatted += f"  Snippet: {snippet}\n"
+    async def _arun(self, query: str, engine: str = "auto") -> str:
+        """Execute a web search without blocking the event loop."""
+        try:
+            results = await self._asearch(query, engine)
+
+            reranker = get_reranker()
+            if reranker is not None:
+                results = await reranker.arerank(query, results)
+
+            return self._format_search_results(results, query)
             
-            formatted += "\n"
-        
-        return formatted
+        except Exception as e:
+            error_msg = f"Search failed: {str(e)}"
+            logger.error(error_msg)
+            return error_msg
+    
+    def _format_search_results(self, results: List[SearchResult], query: str) -> str:
+        """Format search results into a readable string for the LLM, within the observation token budget."""
+        return format_search_results(results, query, token_budget=self.token_budget)
     
     def get_available_engines(self) -> List[str]:
         """Get list of available search engines."""
@@ -92,9 +204,9 @@ class SearchTool(BaseTool):
 
 
 # Convenience function to create search tools
-def create_search_tool(engine: str = "auto") -> SearchTool:
-    """Create a search tool with specified engine."""
-    return SearchTool(default_engine=engine)
+def create_search_tool(engine: str = "auto", token_budget: Optional[int] = None) -> SearchTool:
+    """Create a search tool with specified engine and observation token budget."""
+    return SearchTool(default_engine=engine, token_budget=token_budget)
 
 
 def get_available_search_tools() -> List[str]:
@@ -1,3 +1,3 @@
 # llm_clients/__init__.py
-from .ollama_client import OllamaClient
+from .ollama_client import OllamaClient, OllamaError
 from .openai_client import OpenAIClient
@@ -1,12 +1,134 @@
 # llm_clients/ollama_client.py
+import asyncio
+import httpx
+import logging
 import requests
 import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from config import OLLAMA_CONFIG
+from http_client import AsyncClientPool
+
+logger = logging.getLogger(__name__)
+
+
+class OllamaError(RuntimeError):
+    """Raised when Ollama reports an error in the middle of a streamed response."""
+
 
 class OllamaClient:
-    def __init__(self):
+    # Server errors worth retrying; Ollama returns these while a model is (re)loading
+    RETRY_STATUSES = (500, 502, 503, 504)
+
+    def __init__(self, pool_size: int = None, connect_timeout: float = None, read_timeout: float = None,
+                 max_retries: int = None, retry_backoff: float = None, keep_alive: str = None):
+        """
+        Initialize the Ollama client with a pooled, keep-alive HTTP session.
+
+        Args:
+            pool_size: Maximum number of pooled connections to the Ollama host
+            connect_timeout: Connection timeout in seconds
+            read_timeout: Timeout in seconds between bytes received from Ollama
+            max_retries: Retries on connection failures and 5xx responses (read timeouts are not retried)
+            retry_backoff: Base delay in seconds for exponential backoff between retries
+            keep_alive: How long Ollama keeps the model loaded after a request (e.g. "30m")
+
+        Unset arguments default to the values in OLLAMA_CONFIG.
+        """
         self.host = OLLAMA_CONFIG["host"]
         self.model = OLLAMA_CONFIG["model"]
+        self.pool_size = pool_size if pool_size is not None else OLLAMA_CONFIG["pool_size"]
+        self.connect_timeout = connect_timeout if connect_timeout is not None else OLLAMA_CONFIG["connect_timeout"]
+        self.read_timeout = read_timeout if read_timeout is not None else OLLAMA_CONFIG["read_timeout"]
+        self.max_retries = max_retries if max_retries is not None else OLLAMA_CONFIG["max_retries"]
+        self.retry_backoff = retry_backoff if retry_backoff is not None else OLLAMA_CONFIG["retry_backoff"]
+        self.keep_alive = keep_alive if keep_alive is not None else OLLAMA_CONFIG["keep_alive"]
+
+        # Only failures before the request reached Ollama are retried: after a read
+        # timeout the model may still be generating, and resending would start over
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=0,
+            other=0,
+            backoff_factor=self.retry_backoff,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset({"POST"}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.timeout = (self.connect_timeout, self.read_timeout)
+
+        self._async_clients = AsyncClientPool(
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            max_connections=self.pool_size,
+            max_keepalive_connections=self.pool_size
+        )
+
+    def _build_payload(self, prompt: str, model: str = None, stream: bool = False):
+        payload = {
+            "model": model if model else self.model,
+            "prompt": prompt,
+            "stream": stream
+        }
+        if self.keep_alive:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    @staticmethod
+    def _parse_stream_line(line) -> dict:
+        """
+        Decode one line of a streamed response.
+
+        Returns:
+            dict: The chunk, or an empty dict for a malformed line (logged and skipped)
+
+        Raises:
+            OllamaError: If the chunk carries an ``error`` (e.g. the model failed to load)
+        """
+        try:
+            chunk = json.loads(line)
+        except ValueError:
+            logger.warning("Skipping malformed line in Ollama stream: %.200r", line)
+            return {}
+        if not isinstance(chunk, dict):
+            logger.warning("Skipping unexpected line in Ollama stream: %.200r", line)
+            return {}
+        if chunk.get("error"):
+            raise OllamaError(f"Ollama failed while streaming: {chunk['error']}")
+        return chunk
+
+    def _backoff(self, attempt: int) -> float:
+        return self.retry_backoff * (2 ** attempt)
+
+    async def _asend(self, url: str, payload: dict, stream: bool = False) -> httpx.Response:
+        """
+        Post to Ollama, retrying connection failures and 5xx responses with exponential backoff.
+
+        Read timeouts and dropped responses are raised at once rather than resending a
+        generation Ollama may still be working on.
+
+        With ``stream=True`` the body is not read; the caller must close the response.
+        """
+        client = self._async_clients.get()
+        for attempt in range(self.max_retries + 1):
+            try:
+                request = client.build_request("POST", url, json=payload)
+                response = await client.send(request, stream=stream)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code in self.RETRY_STATUSES and attempt < self.max_retries:
+                await response.aclose()
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            return response
 
     def generate(self, prompt: str, model: str = None):
         """
@@ -14,22 +136,158 @@ class OllamaClient:
         """
         try:
             url = f"{self.host}/api/generate"
-            payload = {
-                "model": model if model else self.model,
-                "prompt": prompt,
-                "stream": False
-            }
-            response = requests.post(url, json=payload)
+            payload = self._build_payload(prompt, model)
+            response = self.session.post(url, json=payload, timeout=self.timeout)
             response.raise_for_status()
-            
+
             # Process the response line by line if it's streaming-like
             response_data = response.json()
             return response_data.get("response", "").strip()
 
         except requests.exceptions.RequestException as e:
-            print(f"Error connecting to Ollama: {e}")
+            logger.error("Error connecting to Ollama: %s", e)
+            return None
+
+    async def agenerate(self, prompt: str, model: str = None):
+        """
+        Generate a response from the Ollama model without blocking the event loop.
+        """
+        try:
+            url = f"{self.host}/api/generate"
+            payload = self._build_payload(prompt, model)
+            response = await self._asend(url, payload)
+            response.raise_for_status()
+
+            response_data = response.json()
+            return response_data.get("response", "").strip()
+
+        except httpx.HTTPError as e:
+            logger.error("Error connecting to Ollama: %s", e)
+            return None
+
+    def stream_generate(self, prompt: str, model: str = None):
+        """
+        Generate a response from the Ollama model, yielding tokens as they arrive.
+
+        Ollama streams newline-delimited JSON objects, each carrying the next
+        piece of the response, until one is marked ``done``.
+
+        Raises:
+            OllamaError: If Ollama reports an error part way through the stream
+        """
+        try:
+            url = f"{self.host}/api/generate"
+            payload = self._build_payload(prompt, model, stream=True)
+            with self.session.post(url, json=payload, stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = self._parse_stream_line(line)
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        break
+
+        except requests.exceptions.RequestException as e:
+            logger.error("Error connecting to Ollama: %s", e)
+
+    async def astream_generate(self, prompt: str, model: str = None):
+        """
+        Generate a response from the Ollama model, yielding tokens as they arrive,
+        without blocking the event loop.
+        """
+        try:
+            url = f"{self.host}/api/generate"
+            payload = self._build_payload(prompt, model, stream=True)
+            response = await self._asend(url, payload, stream=True)
+            try:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = self._parse_stream_line(line)
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        break
+            finally:
+                await response.aclose()
+
+        except httpx.HTTPError as e:
+            logger.error("Error connecting to Ollama: %s", e)
+
+    def _build_embed_payload(self, texts, model: str = None):
+        payload = {"model": model or OLLAMA_CONFIG["embed_model"], "input": list(texts)}
+        if self.keep_alive:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def embed(self, texts, model: str = None):
+        """
+        Get embeddings for several texts in one request.
+
+        Uses the batched ``/api/embed`` endpoint, falling back to one
+        ``/api/embeddings`` request per text on Ollama versions without it.
+
+        Args:
+            texts: Texts to embed
+            model: Embedding model; defaults to OLLAMA_EMBED_MODEL
+
+        Returns:
+            List[List[float]]: One embedding per text, or None if the request failed
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        try:
+            payload = self._build_embed_payload(texts, model)
+            response = self.session.post(f"{self.host}/api/embed", json=payload, timeout=self.timeout)
+            if response.status_code == 404:
+                embeddings = []
+                for text in texts:
+                    legacy = {"model": payload["model"], "prompt": text}
+                    response = self.session.post(f"{self.host}/api/embeddings", json=legacy, timeout=self.timeout)
+                    response.raise_for_status()
+                    embeddings.append(response.json()["embedding"])
+                return embeddings
+            response.raise_for_status()
+            return response.json()["embeddings"]
+
+        except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+            logger.error("Error getting embeddings from Ollama: %s", e)
             return None
 
+    async def aembed(self, texts, model: str = None):
+        """
+        Get embeddings for several texts in one request without blocking the event loop.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        try:
+            payload = self._build_embed_payload(texts, model)
+            response = await self._asend(f"{self.host}/api/embed", payload)
+            if response.status_code == 404:
+                responses = await asyncio.gather(*(
+                    self._asend(f"{self.host}/api/embeddings", {"model": payload["model"], "prompt": text})
+                    for text in texts
+                ))
+                for legacy_response in responses:
+                    legacy_response.raise_for_status()
+                return [legacy_response.json()["embedding"] for legacy_response in responses]
+            response.raise_for_status()
+            return response.json()["embeddings"]
+
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            logger.error("Error getting embeddings from Ollama: %s", e)
+            return None
+
+    def close(self):
+        """Close the pooled HTTP session and the async clients."""
+        self.session.close()
+        self._async_clients.close()
+
 if __name__ == '__main__':
     # Example usage
     client = OllamaClient()
@@ -38,3 +296,8 @@ if __name__ == '__main__':
     if response:
         print("Response from Ollama:")
         print(response)
+
+    print("Streaming response from Ollama:")
+    for token in client.stream_generate(prompt):
+        print(token, end="", flush=True)
+    print()
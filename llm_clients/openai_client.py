@@ -1,7 +1,11 @@
 # llm_clients/openai_client.py
+import logging
 import openai
 from config import OPENAI_API_CONFIG
 
+logger = logging.getLogger(__name__)
+
+
 class OpenAIClient:
     def __init__(self):
         self.api_key = OPENAI_API_CONFIG["api_key"]
@@ -13,6 +17,11 @@ class OpenAIClient:
             api_key=self.api_key,
             base_url=self.base_url
         )
+        # Async client for the non-blocking streaming API
+        self.async_client = openai.AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url
+        )
 
     def generate(self, prompt: str, model: str = None):
         """
@@ -28,9 +37,45 @@ class OpenAIClient:
             )
             return response.choices[0].message.content.strip()
         except Exception as e:
-            print(f"Error connecting to OpenAI API: {e}")
+            logger.error("Error connecting to OpenAI API: %s", e)
             return None
 
+    def _build_stream_request(self, prompt: str, model: str = None):
+        return {
+            "model": model if model else self.model,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": 150,
+            "stream": True
+        }
+
+    def stream_generate(self, prompt: str, model: str = None):
+        """
+        Generate a response from an OpenAI-compatible model, yielding tokens
+        from the server-sent event chunks as they arrive.
+        """
+        try:
+            stream = self.client.chat.completions.create(**self._build_stream_request(prompt, model))
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            logger.error("Error connecting to OpenAI API: %s", e)
+
+    async def astream_generate(self, prompt: str, model: str = None):
+        """
+        Generate a response from an OpenAI-compatible model, yielding tokens as
+        they arrive, without blocking the event loop.
+        """
+        try:
+            stream = await self.async_client.chat.completions.create(**self._build_stream_request(prompt, model))
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            logger.error("Error connecting to OpenAI API: %s", e)
+
 if __name__ == '__main__':
     # Example usage
     # Make sure to set your API key in config.py
@@ -0,0 +1,244 @@
+# logging_setup.py
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Dict, Optional, Union
+
+from config import LOGGING_CONFIG
+from tracing import current_span
+
+
+# Attributes every LogRecord has; any other attribute came from ``extra=`` and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+# Third-party loggers that log every HTTP request at INFO
+_QUIET_LOGGERS = ("httpx", "httpcore", "urllib3")
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_exception_formatter = logging.Formatter()
+_setup_lock = threading.Lock()
+_handler: Optional["NonBlockingQueueHandler"] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_configured_loggers = []
+_atexit_registered = False
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object per line.
+
+    Every record has ``time`` (UTC, ISO 8601), ``level``, ``logger`` and
+    ``message``. Fields passed with ``extra=``, the trace and span id of the
+    step that logged it, and the formatted exception, if any, are added.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Keeps a random ``rate`` fraction of DEBUG records; records of higher levels always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self._random = random.Random()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or self.rate >= 1 or self._random.random() < self.rate
+
+
+class TraceContextFilter(logging.Filter):
+    """Adds the current span's trace and span id to records, in the thread or task that logged them."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        span = current_span()
+        if span is not None:
+            record.trace_id = span.trace_id
+            record.span_id = span.span_id
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to a background writer thread.
+
+    Logging call sites never wait for the output: when the queue is full the
+    record is dropped and counted in ``dropped`` instead.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message now, while its arguments still hold the values they had when logged.
+        # Unlike the base class this keeps extra fields and leaves formatting to the writer.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_level(level: Union[str, int]) -> int:
+    """
+    Convert a level name such as "debug" or "WARNING", or a number, to a logging level.
+
+    Raises:
+        ValueError: If the name is not a logging level
+    """
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(level.strip().upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Unknown log level: {level!r}")
+    return value
+
+
+def parse_module_levels(spec: str) -> Dict[str, int]:
+    """
+    Parse per-module levels written as "module=LEVEL" pairs separated by commas.
+
+    Args:
+        spec: For example "search_engines=DEBUG,langchain_tools.rerank=WARNING"
+
+    Returns:
+        Dict[str, int]: Logger name -> level
+    """
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, separator, level = item.partition("=")
+        if not separator or not name.strip():
+            raise ValueError(f"Invalid module log level {item!r}; expected module=LEVEL")
+        levels[name.strip()] = parse_level(level)
+    return levels
+
+
+def _output_handler(output: str) -> logging.Handler:
+    if output in ("stderr", "stdout"):
+        return logging.StreamHandler(getattr(sys, output))
+    path = os.path.expanduser(output)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return logging.FileHandler(path, encoding="utf-8")
+
+
+def setup_logging(level: Union[str, int, None] = None, log_format: Optional[str] = None,
+                  module_levels: Union[str, Dict[str, Union[str, int]], None] = None,
+                  debug_sample_rate: Optional[float] = None,
+                  output: Optional[str] = None) -> NonBlockingQueueHandler:
+    """
+    Send log records of every module through a background writer.
+
+    The root logger gets a queue handler, and a listener thread formats the
+    records and writes them to the output. A logging call costs a level check
+    and a queue put, and never waits for a slow stdout, pipe or disk. Calling
+    this again replaces the previous setup. Unset arguments come from
+    LOGGING_CONFIG.
+
+    Args:
+        level: Level of the root logger
+        log_format: "text" or "json" (one JSON object per line)
+        module_levels: Levels of individual loggers, as a dict or a LOG_LEVELS string
+        debug_sample_rate: Fraction of DEBUG records kept
+        output: "stderr", "stdout" or a file path
+
+    Returns:
+        NonBlockingQueueHandler: The handler installed on the root logger
+    """
+    global _handler, _listener, _atexit_registered
+    level = parse_level(level if level is not None else LOGGING_CONFIG["level"])
+    log_format = log_format or LOGGING_CONFIG["format"]
+    if log_format not in ("text", "json"):
+        raise ValueError(f"Unknown log format: {log_format!r}; expected 'text' or 'json'")
+    if module_levels is None:
+        module_levels = LOGGING_CONFIG["module_levels"]
+    if isinstance(module_levels, str):
+        module_levels = parse_module_levels(module_levels)
+    levels = {name: logging.WARNING for name in _QUIET_LOGGERS}
+    levels.update({name: parse_level(value) for name, value in module_levels.items()})
+    rate = debug_sample_rate if debug_sample_rate is not None else LOGGING_CONFIG["debug_sample_rate"]
+
+    output_handler = _output_handler(output or LOGGING_CONFIG["output"])
+    output_handler.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+    with _setup_lock:
+        _shutdown()
+        handler = NonBlockingQueueHandler(queue.Queue(LOGGING_CONFIG["queue_size"]))
+        handler.addFilter(DebugSampler(rate))
+        handler.addFilter(TraceContextFilter())
+        root = logging.getLogger()
+        root.addHandler(handler)
+        root.setLevel(level)
+        for name, module_level in levels.items():
+            logging.getLogger(name).setLevel(module_level)
+            _configured_loggers.append(name)
+
+        _listener = logging.handlers.QueueListener(handler.queue, output_handler)
+        _listener.start()
+        _handler = handler
+        if not _atexit_registered:
+            atexit.register(shutdown_logging)
+            _atexit_registered = True
+    return handler
+
+
+def _shutdown():
+    global _handler, _listener
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_handler)
+    root.setLevel(logging.WARNING)
+    while _configured_loggers:
+        logging.getLogger(_configured_loggers.pop()).setLevel(logging.NOTSET)
+
+    # Write what is still queued, then report records lost to a full queue
+    _listener.stop()
+    for output_handler in _listener.handlers:
+        if _handler.dropped:
+            output_handler.handle(logging.makeLogRecord({
+                "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": f"Dropped {_handler.dropped} log records because the log queue was full"
+            }))
+        output_handler.close()
+    _handler = None
+    _listener = None
+
+
+def shutdown_logging():
+    """Flush queued records, stop the writer thread and restore the default logging setup."""
+    with _setup_lock:
+        _shutdown()
@@ -1,20 +1,90 @@
 # main.py - LangChain Optimized Version
 import argparse
-from agent import create_search_agent
+import json
+import logging
+import os
+import time
 from search_engines import (
     list_available_engines,
     check_engine_availability
 )
-from config import OPENAI_API_CONFIG
+from config import OPENAI_API_CONFIG, AGENT_CONFIG
+from logging_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def read_batch_queries(batch_file: str, records: dict):
+    """
+    Lazily read queries from a JSONL file.
+
+    Each line is either a JSON object with a "query" field (other fields, such
+    as "id", are copied to the output) or a bare JSON string. Blank lines are
+    skipped. Every yielded query's record is stored in ``records`` under its
+    position so results can be matched back to their input.
+    """
+    position = 0
+    with open(batch_file, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning("Skipping line %d: invalid JSON (%s)", line_number, e)
+                continue
+            if isinstance(record, str):
+                record = {"query": record}
+            if not isinstance(record, dict) or not record.get("query"):
+                logger.warning("Skipping line %d: no query found", line_number)
+                continue
+
+            record.setdefault("id", line_number)
+            records[position] = record
+            position += 1
+            yield record["query"]
+
+
+def run_batch_file(agent, batch_file: str, output_file: str, concurrency: int):
+    """Run every query in a JSONL file and append each result to a JSONL output as it completes."""
+    records = {}
+    completed = 0
+    started = time.monotonic()
+
+    with open(output_file, "w", encoding="utf-8") as out:
+        for position, query, answer in agent.iter_batch(read_batch_queries(batch_file, records), concurrency):
+            result = dict(records.pop(position))
+            result["answer"] = answer
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            completed += 1
+
+    elapsed = time.monotonic() - started
+    print(f"Completed {completed} queries in {elapsed:.1f}s; results written to {output_file}")
+
 
 def main():
     parser = argparse.ArgumentParser(description="Ollama Search Agent - LangChain Optimized")
     parser.add_argument("--llm", type=str, default="ollama", help="LLM to use (ollama or openai)")
-    parser.add_argument("--search-engine", type=str, default="auto", help="Search engine to use (auto, placeholder, brave, google, bing, custom_google). Use 'auto' for automatic selection.")
+    parser.add_argument("--search-engine", type=str, default="auto", help="Search engine to use (auto, placeholder, brave, google, bing, customgoogle, fanout, hedged). Use 'auto' for automatic selection.")
+    parser.add_argument("--agent-mode", type=str, choices=["react", "plan"], default=None, help="react: one search per LLM step; plan: plan all searches up front and run them in parallel (default: AGENT_MODE)")
+    parser.add_argument("--deep-research", action="store_true", help="Research the query in depth: split it into sub-questions, research them in parallel and stream a cited report")
     parser.add_argument("--list-engines", action="store_true", help="List all available search engines and their status")
+    parser.add_argument("--stream", action="store_true", help="Stream the final answer token by token as it is generated")
+    parser.add_argument("--batch-file", type=str, help="Run every query in this JSONL file (one {\"query\": ...} object or JSON string per line)")
+    parser.add_argument("--output", type=str, help="JSONL file for --batch-file results (default: <batch-file>.results.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=AGENT_CONFIG["batch_concurrency"], help="Number of batch queries run at the same time")
+    parser.add_argument("--serve", action="store_true", help="Run the HTTP API server (/search, /ask) instead of answering a single query")
+    parser.add_argument("--host", type=str, default=None, help="Host for --serve (default: SERVER_HOST)")
+    parser.add_argument("--port", type=int, default=None, help="Port for --serve (default: SERVER_PORT)")
+    parser.add_argument("--log-level", type=str, default=None, help="Level of diagnostic logs written to stderr, e.g. DEBUG to see every search (default: LOG_LEVEL)")
     parser.add_argument("query", type=str, nargs="?", default="", help="Search query")
     args = parser.parse_args()
 
+    # Diagnostics go through the logging queue; answers below are printed to stdout
+    setup_logging(level=args.log_level)
+
     # List available engines if requested
     if args.list_engines:
         print("Available Search Engines:")
@@ -28,14 +98,43 @@ def main():
                     print(f"    {key}: {'✓' if value else '✗'}")
         return
 
+    # Serve requests from one long-running, warm process
+    if args.serve:
+        from server import serve
+        serve(host=args.host, port=args.port)
+        return
+
     # Validate OpenAI configuration if selected
     if args.llm == "openai" and not OPENAI_API_CONFIG["api_key"]:
         print("Please configure your OPENAI_API_KEY in the .env file.")
         return
 
+    # Deep research writes a report instead of running the search agent
+    if args.deep_research:
+        from deep_research import create_deep_researcher
+        query = args.query or input("Please enter your research question: ")
+        researcher = create_deep_researcher(llm_type=args.llm, search_engine=args.search_engine)
+        print_header = True
+        for token in researcher.stream(query):
+            if print_header:
+                print("\n--- Research Report ---")
+                print_header = False
+            print(token, end="", flush=True)
+        print()
+        return
+
+    # Imported here so --list-engines doesn't load LangChain
+    from agent import create_search_agent
+
     # Create LangChain search agent
     try:
-        agent = create_search_agent(llm_type=args.llm, search_engine=args.search_engine)
+        # Interleaved reasoning traces of concurrent batch queries are unreadable
+        agent = create_search_agent(
+            llm_type=args.llm,
+            search_engine=args.search_engine,
+            verbose=not args.batch_file,
+            agent_mode=args.agent_mode
+        )
         print(f"Created LangChain agent with {args.llm} LLM and {args.search_engine} search engine")
     except Exception as e:
         import traceback
@@ -44,12 +143,28 @@ def main():
         print("Available engines:", ", ".join(list_available_engines()))
         return
 
+    # Run a batch of queries in this process instead of one per invocation
+    if args.batch_file:
+        output_file = args.output or f"{os.path.splitext(args.batch_file)[0]}.results.jsonl"
+        run_batch_file(agent, args.batch_file, output_file, args.concurrency)
+        return
+
     # Get query from user
     query = args.query
     if not query:
         query = input("Please enter your search query: ")
 
     # Execute agent
+    if args.stream:
+        print_header = True
+        for token in agent.stream(query):
+            if print_header:
+                print("\n--- Final Answer ---")
+                print_header = False
+            print(token, end="", flush=True)
+        print()
+        return
+
     result = agent.run(query)
     
     print("\n--- Final Answer ---")
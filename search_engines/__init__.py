@@ -1,16 +1,47 @@
 # search_engines/__init__.py
+import importlib
+
 from .base_search import BaseSearch
 from .placeholder_search import PlaceholderSearch
-from .brave_search import BraveSearch
-from .google_search import GoogleSearch
-from .bing_search import BingSearch
-from .custom_google_search import CustomGoogleSearch, CustomGoogleSearchAPIWrapper
+from .result import SearchResult, to_search_results
+from .merging import normalize_url, reciprocal_rank_fusion
+from .cache import CachedSearch, TieredCache, get_search_cache
+from .traced_search import TracedSearch
+from .errors import EngineUnavailableError, QuotaExceededError
+from .rate_limit import RateLimiter, TokenBucket, QuotaTracker, get_rate_limiter
+from .resilience import CircuitBreaker, CircuitOpenError, EngineResilience, get_circuit_breaker
+from .latency import LatencyHistogram, get_latency_histogram, get_latency_stats, record_latency
 from .factory import (
     SearchEngineFactory,
     create_search_engine,
+    get_search_engine,
+    invalidate_search_engines,
     get_default_search_engine,
+    get_default_search_engine_name,
+    get_fallback_search_engine_names,
     list_available_engines,
     check_engine_availability,
     register_search_engine,
     get_engine_info
 )
+
+# Engine classes whose modules pull in third-party clients are imported on
+# first attribute access, so importing the package stays cheap.
+_LAZY_ATTRIBUTES = {
+    "BraveSearch": ".brave_search",
+    "GoogleSearch": ".google_search",
+    "BingSearch": ".bing_search",
+    "CustomGoogleSearch": ".custom_google_search",
+    "CustomGoogleSearchAPIWrapper": ".custom_google_search",
+    "FanoutSearch": ".fanout_search",
+    "HedgedSearch": ".hedged_search",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
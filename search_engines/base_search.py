@@ -1,7 +1,26 @@
 # search_engines/base_search.py
+import asyncio
 from abc import ABC, abstractmethod
 
 class BaseSearch(ABC):
     @abstractmethod
     def search(self, query: str):
         pass
+
+    async def asearch(self, query: str, **kwargs):
+        """
+        Asynchronously execute a search.
+
+        The default implementation runs the blocking ``search`` in a worker
+        thread so the event loop is never blocked. Engines with a native
+        non-blocking HTTP client override this.
+        """
+        return await asyncio.to_thread(self.search, query, **kwargs)
+
+    def close(self):
+        """
+        Release network resources held by the engine.
+
+        Called when a pooled instance is invalidated. The default does nothing.
+        """
+        pass
@@ -1,8 +1,16 @@
 # search_engines/bing_search.py
+import logging
 from langchain_community.utilities import BingSearchAPIWrapper
 from .base_search import BaseSearch
+from .errors import EngineUnavailableError
+from .rate_limit import get_rate_limiter
+from .resilience import EngineResilience
+from .result import to_search_results
 from config import SEARCH_ENGINES
 
+logger = logging.getLogger(__name__)
+
+
 class BingSearch(BaseSearch):
     def __init__(self):
         self.api_key = SEARCH_ENGINES.get("bing", {}).get("api_key")
@@ -12,13 +20,22 @@ class BingSearch(BaseSearch):
         self.search_wrapper = BingSearchAPIWrapper(
             bing_subscription_key=self.api_key
         )
+        self._resilience = EngineResilience("bing")
+
+    def _results_once(self, query: str, num_results: int):
+        get_rate_limiter().acquire("bing")
+        return self.search_wrapper.results(query, num_results)
 
-    def search(self, query: str):
+    def search(self, query: str, num_results: int = 10):
         try:
-            results = self.search_wrapper.run(query)
-            return [{"snippet": results}]
+            items = self._resilience.call(self._results_once, query, num_results)
+            # Without results the wrapper returns a single {"Result": "No good ..."} entry
+            return to_search_results([item for item in items if item.get("link")], "bing")
+        except EngineUnavailableError:
+            # Let the caller fail over to another engine
+            raise
         except Exception as e:
-            print(f"Error calling Bing Search API with LangChain: {e}")
+            logger.error("Error calling Bing Search API with LangChain: %s", e)
             return []
 
 if __name__ == '__main__':
@@ -1,41 +1,103 @@
 # search_engines/brave_search.py
+import httpx
+import logging
 import requests
 from .base_search import BaseSearch
+from .rate_limit import get_rate_limiter, parse_retry_after
+from .resilience import EngineResilience
+from .result import SearchResult
 from config import SEARCH_ENGINES
+from http_client import AsyncClientPool
+
+logger = logging.getLogger(__name__)
+
 
 class BraveSearch(BaseSearch):
-    def __init__(self):
+    def __init__(self, timeout: float = 10.0):
         self.api_key = SEARCH_ENGINES.get("brave", {}).get("api_key")
         if not self.api_key:
             raise ValueError("Brave API key not found in config. Please set BRAVE_API_KEY in your .env file.")
-        self.base_url = "https://api.search.brave.com/res/v1/web/search"
+        self.base_url = SEARCH_ENGINES.get("brave", {}).get("base_url") \
+            or "https://api.search.brave.com/res/v1/web/search"
+        # Reused across searches so TCP/TLS connections are kept alive
+        self.session = requests.Session()
+        self.timeout = timeout
+        self._async_clients = AsyncClientPool(timeout=timeout)
+        # Retries transient errors and fails fast while the API is down
+        self._resilience = EngineResilience("brave")
 
-    def search(self, query: str):
-        headers = {
+    def _headers(self):
+        return {
             "Accept": "application/json",
             "X-Subscription-Token": self.api_key,
         }
+
+    def _format_results(self, results):
+        # Format results to a consistent format
+        formatted_results = []
+        for rank, item in enumerate(results.get("web", {}).get("results", []), 1):
+            formatted_results.append(SearchResult(
+                title=item.get("title"),
+                url=item.get("url"),
+                snippet=item.get("description"),
+                display_host=(item.get("meta_url") or {}).get("hostname"),
+                rank=rank,
+                engine="brave"
+            ))
+        return formatted_results
+
+    def _handle_rate_limited(self, response):
+        # X-RateLimit-Remaining / -Reset list the per-second window first and the
+        # monthly quota second, e.g. "0, 1500"
+        rate_limiter = get_rate_limiter()
+        remaining = [value.strip() for value in response.headers.get("X-RateLimit-Remaining", "").split(",")]
+        if len(remaining) > 1 and remaining[1] == "0":
+            raise rate_limiter.report_quota_exhausted("brave")
+        reset = response.headers.get("X-RateLimit-Reset", "").split(",")[0].strip()
+        rate_limiter.report_rate_limited("brave", parse_retry_after(response.headers.get("Retry-After") or reset))
+
+    def _request_once(self, params):
+        get_rate_limiter().acquire("brave")
+        response = self.session.get(self.base_url, headers=self._headers(), params=params, timeout=self.timeout)
+        if response.status_code == 429:
+            self._handle_rate_limited(response)
+        response.raise_for_status()
+        return response.json()
+
+    async def _arequest_once(self, params):
+        await get_rate_limiter().aacquire("brave")
+        client = self._async_clients.get()
+        response = await client.get(self.base_url, headers=self._headers(), params=params)
+        if response.status_code == 429:
+            self._handle_rate_limited(response)
+        response.raise_for_status()
+        return response.json()
+
+    def search(self, query: str, **kwargs):
         params = {"q": query}
-        
+
         try:
-            response = requests.get(self.base_url, headers=headers, params=params)
-            response.raise_for_status()
-            results = response.json()
-            
-            # Format results to a consistent format
-            formatted_results = []
-            for item in results.get("web", {}).get("results", []):
-                formatted_results.append({
-                    "title": item.get("title"),
-                    "link": item.get("url"),
-                    "snippet": item.get("description"),
-                })
-            return formatted_results
+            return self._format_results(self._resilience.call(self._request_once, params))
 
         except requests.exceptions.RequestException as e:
-            print(f"Error calling Brave Search API: {e}")
+            logger.error("Error calling Brave Search API: %s", e)
             return []
 
+    async def asearch(self, query: str, **kwargs):
+        params = {"q": query}
+
+        try:
+            return self._format_results(await self._resilience.acall(self._arequest_once, params))
+
+        except (httpx.HTTPError, ValueError) as e:
+            # ValueError: the body was not JSON (requests reports that as a RequestException)
+            logger.error("Error calling Brave Search API: %s", e)
+            return []
+
+    def close(self):
+        self.session.close()
+        self._async_clients.close()
+
 if __name__ == '__main__':
     # Example usage
     # Make sure to set your BRAVE_API_KEY in a .env file
@@ -43,6 +105,6 @@ if __name__ == '__main__':
         brave_search = BraveSearch()
         search_results = brave_search.search("latest AI advancements")
         for result in search_results:
-            print(f"Title: {result['title']}\nLink: {result['link']}\nSnippet: {result['snippet']}\n")
+            print(f"Title: {result.title}\nLink: {result.url}\nSnippet: {result.snippet}\n")
     else:
         print("Please set your BRAVE_API_KEY in a .env file to run this example.")
@@ -0,0 +1,283 @@
+# search_engines/cache.py
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Any, Dict, List, Optional
+from .base_search import BaseSearch
+from .result import SearchResult, to_search_results
+from config import SEARCH_CACHE_CONFIG
+from tracing import get_metrics, set_attribute
+
+logger = logging.getLogger(__name__)
+
+
+CacheEntry = namedtuple("CacheEntry", ["value", "stored_at", "expires_at"])
+
+
+class TieredCache:
+    """
+    Two-tier key/value cache with per-entry TTLs.
+
+    The first tier is an in-memory LRU of at most ``memory_max_entries``
+    entries. The optional second tier is a SQLite database that survives
+    restarts and is shared by every process pointing at the same file; it is
+    trimmed to ``disk_max_entries`` by evicting the least recently used rows.
+    Values must be JSON-serializable. All methods are thread-safe.
+    """
+
+    # Trim the disk tier every N writes rather than on every write
+    _DISK_TRIM_INTERVAL = 100
+
+    def __init__(self, path: Optional[str] = None, memory_max_entries: int = 1024,
+                 disk_max_entries: int = 100000, table: str = "cache_entries"):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite database file for the disk tier; None or "" keeps the cache in memory only
+            memory_max_entries: Maximum number of entries held in memory
+            disk_max_entries: Maximum number of entries kept on disk
+            table: Table name, so several caches can share one database file
+        """
+        self.memory_max_entries = memory_max_entries
+        self.disk_max_entries = disk_max_entries
+        self.table = table
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_trim = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        self._db = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_accessed_at ON {self.table} (accessed_at)"
+            )
+            with self._lock:
+                self._trim_disk()
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        """
+        Look up an entry, including its storage timestamps.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            CacheEntry if a live entry exists, otherwise None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT value, stored_at, expires_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[2] > now:
+                    self._db.execute(
+                        f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+                    )
+                    entry = CacheEntry(json.loads(row[0]), row[1], row[2])
+                    self._remember(key, entry)
+                    self._stats["disk_hits"] += 1
+                    return entry
+
+            self._stats["misses"] += 1
+            return None
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None on a miss or expired entry
+        """
+        entry = self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    def set(self, key: str, value: Any, ttl: float):
+        """
+        Store a value.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            ttl: Time to live in seconds
+        """
+        now = time.time()
+        entry = CacheEntry(value, now, now + ttl)
+        with self._lock:
+            self._remember(key, entry)
+            self._stats["writes"] += 1
+
+            if self._db is not None:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, json.dumps(value), entry.stored_at, entry.expires_at, now)
+                )
+                self._writes_since_trim += 1
+                if self._writes_since_trim >= self._DISK_TRIM_INTERVAL:
+                    self._trim_disk()
+
+    def delete(self, key: str):
+        """Remove a key from both tiers."""
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self.table}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss statistics.
+
+        Returns:
+            Dict[str, Any]: Counters plus the current memory size and overall hit rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def _remember(self, key: str, entry: CacheEntry):
+        """Insert into the memory tier, evicting the least recently used entries. Caller holds the lock."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _trim_disk(self):
+        """Drop expired rows and enforce the disk size cap. Caller holds the lock."""
+        self._writes_since_trim = 0
+        self._db.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+        count = self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        overflow = count - self.disk_max_entries
+        if overflow > 0:
+            self._db.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,)
+            )
+            self._stats["evictions"] += overflow
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache lookups (case and whitespace insensitive)."""
+    return " ".join(query.lower().split())
+
+
+class CachedSearch(BaseSearch):
+    """
+    Wraps any search engine with a result cache.
+
+    Results are keyed by (engine name, normalized query, num_results) and
+    stored as SearchResult rows (tuples), which take far less memory than
+    dicts. Empty result lists are not cached because engines return them on errors.
+    """
+
+    def __init__(self, engine: BaseSearch, engine_name: str, cache: Optional[TieredCache] = None,
+                 ttl: Optional[float] = None):
+        """
+        Initialize the wrapper.
+
+        Args:
+            engine: Search engine to wrap
+            engine_name: Engine name used in cache keys and for the per-engine TTL
+            cache: Cache to use; defaults to the shared search result cache
+            ttl: Time to live in seconds; defaults to the engine's configured TTL
+        """
+        self.engine = engine
+        self.engine_name = engine_name
+        self.cache = cache if cache is not None else get_search_cache()
+        if ttl is None:
+            ttl = SEARCH_CACHE_CONFIG["engine_ttls"].get(engine_name, SEARCH_CACHE_CONFIG["default_ttl"])
+        self.ttl = ttl
+
+    def _cache_key(self, query: str, num_results: Optional[int]) -> str:
+        return "\x1f".join([self.engine_name, normalize_query(query), str(num_results)])
+
+    def _from_cache(self, rows: List[Any]) -> List[SearchResult]:
+        set_attribute("cache.hit", True)
+        get_metrics().inc("cache_hits_total", cache="search")
+        # Rows come back as lists from the disk tier; entries written before
+        # results were typed are dicts
+        return [SearchResult.coerce(row, self.engine_name) for row in rows]
+
+    def search(self, query: str, **kwargs):
+        key = self._cache_key(query, kwargs.get("num_results"))
+        rows = self.cache.get(key)
+        if rows is not None:
+            logger.debug("Cache hit for %s query: '%s'", self.engine_name, query,
+                         extra={"engine": self.engine_name, "query": query})
+            return self._from_cache(rows)
+
+        results = to_search_results(self.engine.search(query, **kwargs), self.engine_name)
+        if results:
+            self.cache.set(key, [result.to_row() for result in results], self.ttl)
+        return results
+
+    async def asearch(self, query: str, **kwargs):
+        key = self._cache_key(query, kwargs.get("num_results"))
+        rows = await asyncio.to_thread(self.cache.get, key)
+        if rows is not None:
+            logger.debug("Cache hit for %s query: '%s'", self.engine_name, query,
+                         extra={"engine": self.engine_name, "query": query})
+            return self._from_cache(rows)
+
+        results = to_search_results(await self.engine.asearch(query, **kwargs), self.engine_name)
+        if results:
+            await asyncio.to_thread(self.cache.set, key, [result.to_row() for result in results], self.ttl)
+        return results
+
+
+_search_cache: Optional[TieredCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> TieredCache:
+    """Get the process-wide search result cache, creating it from config on first use."""
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = TieredCache(
+                    path=SEARCH_CACHE_CONFIG["path"],
+                    memory_max_entries=SEARCH_CACHE_CONFIG["memory_max_entries"],
+                    disk_max_entries=SEARCH_CACHE_CONFIG["disk_max_entries"],
+                    table="search_results"
+                )
+    return _search_cache
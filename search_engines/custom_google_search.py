@@ -1,12 +1,23 @@
 # search_engines/custom_google_search.py
+import logging
 import os
+import asyncio
+import httpx
 import requests
 import json
-import time
-from typing import List, Dict, Optional, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Any, Tuple
 from urllib.parse import urlencode
 from search_engines.base_search import BaseSearch
+from search_engines.errors import EngineUnavailableError
+from search_engines.result import SearchResult, to_search_results
+from search_engines.rate_limit import get_rate_limiter, parse_retry_after
+from search_engines.resilience import EngineResilience
 from config import SEARCH_ENGINES
+from http_client import AsyncClientPool
+
+logger = logging.getLogger(__name__)
 
 
 class CustomGoogleSearchAPIWrapper:
@@ -17,7 +28,9 @@ class CustomGoogleSearchAPIWrapper:
     
     def __init__(self, google_api_key: str, google_cse_id: str, 
                  proxies: Optional[Dict] = None, timeout: int = 30, 
-                 max_retries: int = 3, retry_delay: float = 1.0):
+                 max_retries: int = 3, retry_delay: float = 1.0,
+                 concurrent_pages: bool = True, max_page_workers: int = 5,
+                 engine_name: str = "customgoogle", base_url: Optional[str] = None):
         """
         Initialize the custom Google Search wrapper.
         
@@ -26,8 +39,12 @@ class CustomGoogleSearchAPIWrapper:
             google_cse_id: Google Custom Search Engine ID
             proxies: Dictionary of proxy settings (e.g., {'http': 'http://proxy:port', 'https': 'https://proxy:port'})
             timeout: Request timeout in seconds
-            max_retries: Maximum number of retry attempts
-            retry_delay: Delay between retries in seconds
+            max_retries: Maximum number of attempts per API request
+            retry_delay: Backoff before the first retry in seconds, doubled for each further retry
+            concurrent_pages: Fetch result pages concurrently instead of one after another
+            max_page_workers: Maximum number of pages fetched at the same time
+            engine_name: Engine name requests are rate limited and counted under
+            base_url: API endpoint; defaults to GOOGLE_CSE_BASE_URL
         """
         self.google_api_key = google_api_key
         self.google_cse_id = google_cse_id
@@ -35,16 +52,161 @@ class CustomGoogleSearchAPIWrapper:
         self.timeout = timeout
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.concurrent_pages = concurrent_pages
+        self.max_page_workers = max(1, max_page_workers)
+        self.base_url = base_url or SEARCH_ENGINES.get("custom_google", {}).get("base_url") \
+            or "https://www.googleapis.com/customsearch/v1"
+        self.engine_name = engine_name
+        self._resilience = EngineResilience(engine_name, max_attempts=max_retries, base_delay=retry_delay)
         
         # Create session with proxy support
         self.session = requests.Session()
         if self.proxies:
             self.session.proxies.update(self.proxies)
+        # Keep one pooled connection per concurrent page worker
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(10, self.max_page_workers))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._page_executor: Optional[ThreadPoolExecutor] = None
+        self._page_executor_lock = threading.Lock()
+
+        # Non-blocking clients for the async API, one per event loop
+        self._async_clients = AsyncClientPool(proxies=self.proxies, timeout=self.timeout)
+
+    def _build_params(self, query: str, num_results: int, start_index: int) -> Dict[str, Any]:
+        """Build the query parameters for a single API request."""
+        return {
+            'key': self.google_api_key,
+            'cx': self.google_cse_id,
+            'q': query,
+            'num': min(num_results, 10),  # Google API max is 10 per request
+            'start': start_index
+        }
+
+    @staticmethod
+    def _plan_pages(num_results: int) -> List[Tuple[int, int]]:
+        """
+        Compute the (start_index, batch_size) of every page needed for ``num_results``.
+        
+        Pages hold at most 10 results and the API never returns results past index 100,
+        so every offset is known before the first request is sent.
+        """
+        pages = []
+        remaining_results = num_results
+        start_index = 1
+        while remaining_results > 0 and start_index <= 91:  # Google API limit: max 100 results
+            batch_size = min(remaining_results, 10)
+            pages.append((start_index, batch_size))
+            remaining_results -= batch_size
+            start_index += batch_size
+        return pages
+
+    @staticmethod
+    def _page_cutoff(index: int, items: List[Dict[str, Any]], batch_size: int, cutoff: int) -> int:
+        """
+        Update the index of the first page past the end of the results.
+        
+        An empty page is itself past the end; a short page is the last one.
+        """
+        if not items:
+            return min(cutoff, index)
+        if len(items) < batch_size:
+            return min(cutoff, index + 1)
+        return cutoff
+
+    def _get_page_executor(self) -> ThreadPoolExecutor:
+        with self._page_executor_lock:
+            if self._page_executor is None:
+                self._page_executor = ThreadPoolExecutor(
+                    max_workers=self.max_page_workers,
+                    thread_name_prefix="google-pages"
+                )
+            return self._page_executor
+
+    def close(self):
+        """Close the HTTP sessions and stop the page workers."""
+        self.session.close()
+        self._async_clients.close()
+        with self._page_executor_lock:
+            if self._page_executor is not None:
+                self._page_executor.shutdown(wait=False)
+                self._page_executor = None
+
+    def _format_items(self, items: List[Dict[str, Any]]) -> List[SearchResult]:
+        """Convert raw API items into search results (ranked later, once pages are assembled)."""
+        return [
+            SearchResult(
+                title=item.get('title', ''),
+                url=item.get('link', ''),
+                snippet=item.get('snippet', ''),
+                display_host=item.get('displayLink'),
+                engine=self.engine_name
+            )
+            for item in items
+        ]
+
+    @staticmethod
+    def _format_as_text(results: List[SearchResult]) -> str:
+        """Render structured results as the numbered text used by ``run``."""
+        if not results:
+            return "No results found."
+
+        formatted_results = []
+        for i, result in enumerate(results, 1):
+            formatted_results.append(
+                f"{i}. {result.title or 'No title'}\n"
+                f"   {result.url or 'No link'}\n"
+                f"   {result.snippet or 'No snippet'}"
+            )
+
+        return "\n\n".join(formatted_results)
+
+    def _handle_rate_limited(self, response):
+        """
+        React to an HTTP 429 response.
+        
+        Google reports both per-minute and per-day limits as 429; a used up
+        daily quota is raised as QuotaExceededError, otherwise the engine's
+        rate limiter is paused before the request is retried.
+        """
+        rate_limiter = get_rate_limiter()
+        try:
+            message = response.json().get("error", {}).get("message", "")
+        except ValueError:
+            message = ""
+        if "per day" in message.lower():
+            raise rate_limiter.report_quota_exhausted(self.engine_name)
+        rate_limiter.report_rate_limited(self.engine_name, parse_retry_after(response.headers.get("Retry-After")))
+
+    def _request_once(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a single API request; retries are handled by ``_resilience``."""
+        get_rate_limiter().acquire(self.engine_name)
+        response = self.session.get(
+            self.base_url,
+            params=params,
+            timeout=self.timeout
+        )
+        if response.status_code == 429:
+            self._handle_rate_limited(response)
+        response.raise_for_status()
+        return response.json()
+
+    async def _arequest_once(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Non-blocking counterpart of ``_request_once``."""
+        await get_rate_limiter().aacquire(self.engine_name)
+        response = await self._async_clients.get().get(self.base_url, params=params)
+        if response.status_code == 429:
+            self._handle_rate_limited(response)
+        response.raise_for_status()
+        return response.json()
 
     def _make_api_request(self, query: str, num_results: int = 10, start_index: int = 1) -> Dict[str, Any]:
         """
         Make direct API request to Google Custom Search API.
         
+        Transient errors (connection errors, timeouts, 429 and 5xx) are retried
+        with exponential backoff; other errors are raised right away.
+        
         Args:
             query: Search query string
             num_results: Number of results to return (max 10 per request)
@@ -53,40 +215,23 @@ class CustomGoogleSearchAPIWrapper:
         Returns:
             Raw API response as dictionary
         """
-        base_url = "https://www.googleapis.com/customsearch/v1"
-        
-        params = {
-            'key': self.google_api_key,
-            'cx': self.google_cse_id,
-            'q': query,
-            'num': min(num_results, 10),  # Google API max is 10 per request
-            'start': start_index
-        }
-        
-        for attempt in range(self.max_retries):
-            try:
-                response = self.session.get(
-                    base_url,
-                    params=params,
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
-                return response.json()
-                
-            except requests.exceptions.RequestException as e:
-                print(f"Request error (attempt {attempt + 1}/{self.max_retries}): {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay)
-                    continue
-                raise
-            except Exception as e:
-                print(f"Unexpected error (attempt {attempt + 1}/{self.max_retries}): {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay)
-                    continue
-                raise
+        params = self._build_params(query, num_results, start_index)
+        return self._resilience.call(self._request_once, params)
+
+    async def _amake_api_request(self, query: str, num_results: int = 10, start_index: int = 1) -> Dict[str, Any]:
+        """
+        Non-blocking counterpart of ``_make_api_request``.
         
-        return {}
+        Args:
+            query: Search query string
+            num_results: Number of results to return (max 10 per request)
+            start_index: Start index for pagination
+            
+        Returns:
+            Raw API response as dictionary
+        """
+        params = self._build_params(query, num_results, start_index)
+        return await self._resilience.acall(self._arequest_once, params)
 
     def run(self, query: str) -> str:
         """
@@ -100,24 +245,37 @@ class CustomGoogleSearchAPIWrapper:
         """
         try:
             results = self.results(query, num_results=5)
-            if not results:
-                return "No results found."
+            return self._format_as_text(results)
             
-            formatted_results = []
-            for i, result in enumerate(results, 1):
-                formatted_results.append(
-                    f"{i}. {result.get('title', 'No title')}\n"
-                    f"   {result.get('link', 'No link')}\n"
-                    f"   {result.get('snippet', 'No snippet')}"
-                )
+        except EngineUnavailableError:
+            # Let the caller fail over to another engine
+            raise
+        except Exception as e:
+            logger.error("Error in run method: %s", e)
+            return f"Error performing search: {e}"
+
+    async def arun(self, query: str) -> str:
+        """
+        Non-blocking counterpart of ``run``.
+        
+        Args:
+            query: Search query string
             
-            return "\n\n".join(formatted_results)
+        Returns:
+            Formatted search results as string
+        """
+        try:
+            results = await self.aresults(query, num_results=5)
+            return self._format_as_text(results)
             
+        except EngineUnavailableError:
+            # Let the caller fail over to another engine
+            raise
         except Exception as e:
-            print(f"Error in run method: {e}")
+            logger.error("Error in arun method: %s", e)
             return f"Error performing search: {e}"
 
-    def results(self, query: str, num_results: int = 10) -> List[Dict]:
+    def results(self, query: str, num_results: int = 10) -> List[SearchResult]:
         """
         Get structured search results.
         
@@ -126,9 +284,13 @@ class CustomGoogleSearchAPIWrapper:
             num_results: Number of results to return
             
         Returns:
-            List of structured result dictionaries
+            List of search results
         """
         try:
+            pages = self._plan_pages(num_results)
+            if self.concurrent_pages and len(pages) > 1:
+                return to_search_results(self._results_concurrently(query, pages)[:num_results])
+            
             all_results = []
             remaining_results = num_results
             start_index = 1
@@ -148,14 +310,7 @@ class CustomGoogleSearchAPIWrapper:
                     break  # No more results
                 
                 # Format results
-                for item in items:
-                    formatted_result = {
-                        'title': item.get('title', ''),
-                        'link': item.get('link', ''),
-                        'snippet': item.get('snippet', ''),
-                        'displayLink': item.get('displayLink', '')
-                    }
-                    all_results.append(formatted_result)
+                all_results.extend(self._format_items(items))
                 
                 # Update counters
                 remaining_results -= len(items)
@@ -165,12 +320,160 @@ class CustomGoogleSearchAPIWrapper:
                 if len(all_results) >= num_results:
                     break
             
-            return all_results[:num_results]  # Ensure we don't exceed requested number
+            return to_search_results(all_results[:num_results])  # Ensure we don't exceed requested number
             
+        except EngineUnavailableError:
+            raise
         except Exception as e:
-            print(f"Error getting structured results: {e}")
+            logger.error("Error getting structured results: %s", e)
             return []
 
+    async def aresults(self, query: str, num_results: int = 10) -> List[SearchResult]:
+        """
+        Non-blocking counterpart of ``results``.
+        
+        Args:
+            query: Search query string
+            num_results: Number of results to return
+            
+        Returns:
+            List of search results
+        """
+        try:
+            pages = self._plan_pages(num_results)
+            if self.concurrent_pages and len(pages) > 1:
+                return to_search_results((await self._aresults_concurrently(query, pages))[:num_results])
+            
+            all_results = []
+            remaining_results = num_results
+            start_index = 1
+            
+            while remaining_results > 0 and start_index <= 91:  # Google API limit: max 100 results
+                current_batch_size = min(remaining_results, 10)  # Max 10 per request
+                
+                api_response = await self._amake_api_request(
+                    query=query,
+                    num_results=current_batch_size,
+                    start_index=start_index
+                )
+                
+                items = api_response.get('items', [])
+                if not items:
+                    break  # No more results
+                
+                all_results.extend(self._format_items(items))
+                
+                remaining_results -= len(items)
+                start_index += len(items)
+                
+                if len(all_results) >= num_results:
+                    break
+            
+            return to_search_results(all_results[:num_results])
+            
+        except EngineUnavailableError:
+            raise
+        except Exception as e:
+            logger.error("Error getting structured results: %s", e)
+            return []
+
+    def _results_concurrently(self, query: str, pages: List[Tuple[int, int]]) -> List[SearchResult]:
+        """
+        Fetch all pages at once on the bounded page pool and reassemble them in order.
+        
+        When a page comes back empty or short, every page after it is cancelled.
+        
+        Args:
+            query: Search query string
+            pages: (start_index, batch_size) of each page, in order
+            
+        Returns:
+            List of search results
+        """
+        executor = self._get_page_executor()
+        futures = {
+            executor.submit(self._make_api_request, query, batch_size, start_index): index
+            for index, (start_index, batch_size) in enumerate(pages)
+        }
+        page_items: Dict[int, List[Dict[str, Any]]] = {}
+        cutoff = len(pages)
+        
+        try:
+            for future in as_completed(futures):
+                index = futures[future]
+                if index >= cutoff or future.cancelled():
+                    continue
+                
+                items = future.result().get('items', [])
+                page_items[index] = items
+                
+                new_cutoff = self._page_cutoff(index, items, pages[index][1], cutoff)
+                if new_cutoff < cutoff:
+                    cutoff = new_cutoff
+                    for other, other_index in futures.items():
+                        if other_index >= cutoff:
+                            other.cancel()
+        finally:
+            # On errors, don't leave queued pages behind
+            for future in futures:
+                future.cancel()
+        
+        all_results = []
+        for index in range(cutoff):
+            all_results.extend(self._format_items(page_items.get(index, [])))
+        return all_results
+
+    async def _aresults_concurrently(self, query: str, pages: List[Tuple[int, int]]) -> List[SearchResult]:
+        """
+        Non-blocking counterpart of ``_results_concurrently``.
+        
+        Args:
+            query: Search query string
+            pages: (start_index, batch_size) of each page, in order
+            
+        Returns:
+            List of search results
+        """
+        semaphore = asyncio.Semaphore(self.max_page_workers)
+        
+        async def fetch_page(start_index: int, batch_size: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._amake_api_request(query, batch_size, start_index)
+        
+        tasks = {
+            asyncio.ensure_future(fetch_page(start_index, batch_size)): index
+            for index, (start_index, batch_size) in enumerate(pages)
+        }
+        page_items: Dict[int, List[Dict[str, Any]]] = {}
+        cutoff = len(pages)
+        pending = set(tasks)
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = tasks[task]
+                    if index >= cutoff or task.cancelled():
+                        continue
+                    
+                    items = task.result().get('items', [])
+                    page_items[index] = items
+                    
+                    new_cutoff = self._page_cutoff(index, items, pages[index][1], cutoff)
+                    if new_cutoff < cutoff:
+                        cutoff = new_cutoff
+                        for other in pending:
+                            if tasks[other] >= cutoff:
+                                other.cancel()
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        all_results = []
+        for index in range(cutoff):
+            all_results.extend(self._format_items(page_items.get(index, [])))
+        return all_results
+
     def search_info(self, query: str) -> Dict[str, Any]:
         """
         Get search metadata and statistics.
@@ -192,7 +495,7 @@ class CustomGoogleSearchAPIWrapper:
             }
             
         except Exception as e:
-            print(f"Error getting search info: {e}")
+            logger.error("Error getting search info: %s", e)
             return {}
 
 
@@ -201,7 +504,8 @@ class CustomGoogleSearch(BaseSearch):
     Enhanced Google Search implementation using the custom wrapper.
     """
     
-    def __init__(self, use_proxy: bool = True, timeout: int = 30, max_retries: int = 3):
+    def __init__(self, use_proxy: bool = True, timeout: int = 30, max_retries: int = 3,
+                 concurrent_pages: bool = True, max_page_workers: int = 5):
         self.api_key = SEARCH_ENGINES.get("custom_google", {}).get("api_key")
         self.cse_id = SEARCH_ENGINES.get("custom_google", {}).get("cse_id")
         if not self.api_key or not self.cse_id:
@@ -222,7 +526,9 @@ class CustomGoogleSearch(BaseSearch):
             google_cse_id=self.cse_id,
             proxies=proxies if proxies else None,
             timeout=timeout,
-            max_retries=max_retries
+            max_retries=max_retries,
+            concurrent_pages=concurrent_pages,
+            max_page_workers=max_page_workers
         )
 
     def search(self, query: str, structured: bool = True, num_results: int = 10):
@@ -243,10 +549,39 @@ class CustomGoogleSearch(BaseSearch):
                 return results
             else:
                 result = self.search_wrapper.run(query)
-                return [{"snippet": result}]
+                return [SearchResult(snippet=result, rank=1, engine=self.search_wrapper.engine_name)]
                 
+        except EngineUnavailableError:
+            # Let the caller fail over to another engine
+            raise
         except Exception as e:
-            print(f"Error in CustomGoogleSearch: {e}")
+            logger.error("Error in CustomGoogleSearch: %s", e)
+            return []
+
+    async def asearch(self, query: str, structured: bool = True, num_results: int = 10):
+        """
+        Execute search without blocking the event loop.
+        
+        Args:
+            query: Search query string
+            structured: Whether to return structured results or string
+            num_results: Number of results to return (for structured results)
+            
+        Returns:
+            Search results in requested format
+        """
+        try:
+            if structured:
+                return await self.search_wrapper.aresults(query, num_results)
+            else:
+                result = await self.search_wrapper.arun(query)
+                return [SearchResult(snippet=result, rank=1, engine=self.search_wrapper.engine_name)]
+                
+        except EngineUnavailableError:
+            # Let the caller fail over to another engine
+            raise
+        except Exception as e:
+            logger.error("Error in CustomGoogleSearch: %s", e)
             return []
 
     def health_check(self) -> bool:
@@ -261,7 +596,7 @@ class CustomGoogleSearch(BaseSearch):
             test_results = self.search_wrapper.results("test", num_results=1)
             return len(test_results) > 0 or True  # Even if no results, API is accessible
         except Exception as e:
-            print(f"Health check failed: {e}")
+            logger.warning("Health check failed: %s", e)
             return False
 
     def get_search_stats(self, query: str) -> Dict[str, Any]:
@@ -276,6 +611,9 @@ class CustomGoogleSearch(BaseSearch):
         """
         return self.search_wrapper.search_info(query)
 
+    def close(self):
+        self.search_wrapper.close()
+
 
 if __name__ == '__main__':
     # Example usage and testing
@@ -295,15 +633,15 @@ if __name__ == '__main__':
         print("\nTesting structured search:")
         structured_results = custom_search.search("latest AI developments", structured=True, num_results=3)
         for i, result in enumerate(structured_results, 1):
-            print(f"{i}. {result.get('title', 'No title')}")
-            print(f"   Link: {result.get('link', 'No link')}")
-            print(f"   Snippet: {result.get('snippet', 'No snippet')[:100]}...")
+            print(f"{i}. {result.title or 'No title'}")
+            print(f"   Link: {result.url or 'No link'}")
+            print(f"   Snippet: {result.snippet[:100]}...")
             print()
         
         # Test search with string results
         print("Testing string search:")
         string_results = custom_search.search("what is machine learning", structured=False)
-        print(f"String result preview: {string_results[0]['snippet'][:200]}...")
+        print(f"String result preview: {string_results[0].snippet[:200]}...")
         
         # Test search statistics
         print("\nTesting search statistics:")
@@ -0,0 +1,26 @@
+# search_engines/errors.py
+from typing import Optional
+
+
+class EngineUnavailableError(Exception):
+    """
+    Raised when a search engine cannot serve requests for now.
+
+    Unlike ordinary search errors (which engines report as an empty result
+    list), this propagates to the caller so it can fail over to another engine.
+    """
+
+    def __init__(self, engine_name: str, message: str, retry_after: Optional[float] = None):
+        """
+        Args:
+            engine_name: Engine (or quota group) that is unavailable
+            message: Human-readable reason
+            retry_after: Seconds until the engine is expected to be usable again, if known
+        """
+        super().__init__(message)
+        self.engine_name = engine_name
+        self.retry_after = retry_after
+
+
+class QuotaExceededError(EngineUnavailableError):
+    """Raised when a search engine's daily request quota is used up."""
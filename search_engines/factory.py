@@ -1,59 +1,143 @@
 # search_engines/factory.py
-from typing import Dict, Type, Optional, List, Any
+from typing import Dict, Type, Optional, List, Any, Tuple
 import importlib
 import inspect
+import logging
 import os
+import threading
 from .base_search import BaseSearch
+from .manifest import ENGINE_MANIFEST
+from .rate_limit import get_rate_limiter
 from config import SEARCH_ENGINES
 
+logger = logging.getLogger(__name__)
+
 
 class SearchEngineFactory:
     """Factory class for dynamically creating search engine instances."""
     
     _engines: Dict[str, Dict[str, Any]] = {}
+    _discovered = False
+    _discovering = False
+    # Guards discovery and lazy class imports; reentrant because importing an
+    # engine module may register or look up engines
+    _load_lock = threading.RLock()
+    
+    # Long-lived engine instances keyed by engine name + constructor kwargs.
+    # Reentrant because meta engines create their member engines while pooled.
+    _instances: Dict[Tuple, BaseSearch] = {}
+    _instances_lock = threading.RLock()
+    
+    # Memoized availability, valid while the configuration signature is unchanged
+    _availability: Dict[str, bool] = {}
+    _engine_preference: Optional[List[str]] = None
+    _config_signature: Optional[Tuple] = None
     _search_engines_path = "search_engines"
     
+    # Modules that never define a concrete, self-configuring engine
+    _NON_ENGINE_MODULES = {'__init__.py', 'factory.py', 'base_search.py', 'manifest.py', 'merging.py', 'cache.py',
+                          'errors.py', 'rate_limit.py', 'resilience.py',
+                          'latency.py', 'result.py', 'traced_search.py'}
+    
+    # Engines that combine other engines and are never picked automatically
+    META_ENGINES = {"fanout", "hedged"}
+    
     @classmethod
     def _discover_engines(cls):
-        """Dynamically discover all search engine classes in the search_engines directory."""
-        if cls._engines:
+        """
+        Discover all search engines.
+        
+        Built-in engines come from the manifest and are not imported here. Any
+        other module in the search_engines directory is imported and scanned for
+        classes inheriting from BaseSearch, so dropped-in engines keep working.
+        """
+        # Engines registered before discovery must not suppress it
+        if cls._discovered:
             return
+        
+        with cls._load_lock:
+            # A module imported below may look up engines; don't start over
+            if cls._discovered or cls._discovering:
+                return
+            cls._discovering = True
             
-        # Get all Python files in the search_engines directory
-        try:
-            search_engines_dir = os.path.join(os.path.dirname(__file__))
-            for filename in os.listdir(search_engines_dir):
-                if filename.endswith('.py') and filename != '__init__.py' and filename != 'factory.py' and filename != 'base_search.py':
-                    module_name = filename[:-3]  # Remove .py extension
+            for engine_name, spec in ENGINE_MANIFEST.items():
+                cls._engines.setdefault(engine_name, {
+                    'module': spec.module,
+                    'class_name': spec.class_name,
+                    'class': None,  # Imported on first create()
+                    'config_section': spec.config_section,
+                    'required_config': spec.required_config
+                })
+            manifest_modules = {spec.module for spec in ENGINE_MANIFEST.values()}
+            
+            # Get all Python files in the search_engines directory
+            try:
+                search_engines_dir = os.path.join(os.path.dirname(__file__))
+                for filename in os.listdir(search_engines_dir):
+                    if filename.endswith('.py') and filename not in cls._NON_ENGINE_MODULES:
+                        module_name = filename[:-3]  # Remove .py extension
+                        module_path = f"search_engines.{module_name}"
+                        if module_path in manifest_modules:
+                            continue
                     
-                    try:
-                        # Dynamically import the module
-                        module = importlib.import_module(f".{module_name}", package="search_engines")
+                        try:
+                            # Dynamically import the module
+                            module = importlib.import_module(module_path)
                         
-                        # Find all classes in the module that inherit from BaseSearch
-                        for name, obj in inspect.getmembers(module, inspect.isclass):
-                            if (issubclass(obj, BaseSearch) and 
-                                obj != BaseSearch and 
-                                obj.__module__ == module.__name__):
+                            # Find all classes in the module that inherit from BaseSearch
+                            for name, obj in inspect.getmembers(module, inspect.isclass):
+                                if (issubclass(obj, BaseSearch) and 
+                                    obj != BaseSearch and 
+                                    obj.__module__ == module.__name__):
                                 
-                                # Use class name without 'Search' suffix as engine name
-                                engine_name = name.lower().replace('search', '')
-                                if engine_name.endswith('_'):
-                                    engine_name = engine_name[:-1]
+                                    # Use class name without 'Search' suffix as engine name
+                                    engine_name = name.lower().replace('search', '')
+                                    if engine_name.endswith('_'):
+                                        engine_name = engine_name[:-1]
                                 
-                                # Store module and class information
-                                cls._engines[engine_name] = {
-                                    'module': module_name,
-                                    'class_name': name,
-                                    'class': obj
-                                }
+                                    # Store module and class information, keeping explicit registrations
+                                    cls._engines.setdefault(engine_name, {
+                                        'module': module_path,
+                                        'class_name': name,
+                                        'class': obj
+                                    })
                                 
-                    except ImportError as e:
-                        print(f"Warning: Failed to import module {module_name}: {e}")
-                        continue
+                        except ImportError as e:
+                            logger.warning("Failed to import module %s: %s", module_name, e)
+                            continue
                         
-        except Exception as e:
-            print(f"Error discovering search engines: {e}")
+            except Exception as e:
+                logger.error("Error discovering search engines: %s", e)
+            
+            # Only now may other threads skip the lock and read the engines
+            cls._discovered = True
+            cls._discovering = False
+    
+    @classmethod
+    def _load_engine_class(cls, engine_name: str) -> Type[BaseSearch]:
+        """
+        Get the class of a discovered engine, importing its module on first use.
+        
+        Args:
+            engine_name: Name of the search engine
+            
+        Returns:
+            Type[BaseSearch]: The search engine class
+        """
+        engine_info = cls._engines[engine_name]
+        engine_class = engine_info['class']
+        if engine_class is not None:
+            return engine_class
+        
+        with cls._load_lock:
+            if engine_info['class'] is None:
+                module = importlib.import_module(engine_info['module'])
+                engine_class = getattr(module, engine_info['class_name'])
+                if not issubclass(engine_class, BaseSearch):
+                    raise ValueError(f"Class {engine_info['class_name']} must inherit from BaseSearch")
+                engine_info['class'] = engine_class
+            return engine_info['class']
     
     @classmethod
     def register_engine(cls, engine_name: str, module_path: str, class_name: str):
@@ -72,11 +156,15 @@ class SearchEngineFactory:
             if not issubclass(engine_class, BaseSearch):
                 raise ValueError(f"Class {class_name} must inherit from BaseSearch")
             
-            cls._engines[engine_name.lower()] = {
-                'module': module_path,
-                'class_name': class_name,
-                'class': engine_class
-            }
+            with cls._load_lock:
+                cls._engines[engine_name.lower()] = {
+                    'module': module_path,
+                    'class_name': class_name,
+                    'class': engine_class
+                }
+            # Pooled instances of a previous class under this name are stale
+            cls.invalidate(engine_name)
+            cls.invalidate_availability()
             
         except (ImportError, AttributeError) as e:
             raise ValueError(f"Failed to register engine {engine_name}: {e}")
@@ -106,16 +194,69 @@ class SearchEngineFactory:
                 f"Available engines: {available_engines}"
             )
         
-        engine_info = cls._engines[engine_name]
-        engine_class = engine_info['class']
-        
         try:
+            engine_class = cls._load_engine_class(engine_name)
             return engine_class(**kwargs)
         except Exception as e:
             raise RuntimeError(
                 f"Failed to create search engine '{engine_name}': {str(e)}"
             ) from e
     
+    @staticmethod
+    def _instance_key(engine_name: str, kwargs: Dict[str, Any]) -> Tuple:
+        return (engine_name.lower(), tuple(sorted((key, repr(value)) for key, value in kwargs.items())))
+    
+    @classmethod
+    def get_instance(cls, engine_name: str, **kwargs) -> BaseSearch:
+        """
+        Get a shared, long-lived search engine instance, creating it on first use.
+        
+        Instances are pooled per engine name and constructor arguments, so their
+        HTTP sessions (and the TCP/TLS connections kept alive in them) are reused
+        across searches and threads.
+        
+        Args:
+            engine_name: Name of the search engine
+            **kwargs: Additional arguments to pass to the search engine constructor
+            
+        Returns:
+            BaseSearch: Pooled instance of the requested search engine
+        """
+        key = cls._instance_key(engine_name, kwargs)
+        instance = cls._instances.get(key)
+        if instance is not None:
+            return instance
+        
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = cls.create(engine_name, **kwargs)
+                cls._instances[key] = instance
+            return instance
+    
+    @classmethod
+    def invalidate(cls, engine_name: Optional[str] = None):
+        """
+        Drop pooled engine instances and close their connections.
+        
+        Args:
+            engine_name: Only drop instances of this engine; None drops all of them
+        """
+        with cls._instances_lock:
+            # Meta engines hold on to their member engines, so drop them too
+            names = None if engine_name is None else {engine_name.lower()} | cls.META_ENGINES
+            keys = [
+                key for key in cls._instances
+                if names is None or key[0] in names
+            ]
+            instances = [cls._instances.pop(key) for key in keys]
+        
+        for instance in instances:
+            try:
+                instance.close()
+            except Exception as e:
+                logger.warning("Failed to close search engine instance: %s", e)
+    
     @classmethod
     def create_from_config(cls, engine_name: str) -> BaseSearch:
         """
@@ -150,20 +291,50 @@ class SearchEngineFactory:
         engine_name = engine_name.lower()
         
         if engine_name not in cls._engines:
-            print(f"DEBUG: Engine '{engine_name}' not in _engines.")
+            logger.debug("Engine '%s' not in _engines.", engine_name)
             return {}
         
-        config = SEARCH_ENGINES.get(engine_name, {})
+        engine_info = cls._engines[engine_name]
+        config_section = engine_info.get('config_section', engine_name)
+        config = SEARCH_ENGINES.get(config_section, {}) if config_section else {}
+        # Engines without a manifest entry require every key in their section
+        required_config = engine_info.get('required_config')
+        if required_config is None:
+            required_config = list(config)
         status = {}
         
-        print(f"DEBUG: Checking config status for '{engine_name}'. Config: {config}")
         # Check each required configuration key
-        for key, value in config.items():
+        for key in required_config:
+            value = config.get(key)
             status[key] = value is not None and value != ""
-            print(f"DEBUG:   Key '{key}': Value present = {status[key]}")
+        logger.debug("Config status for '%s': %s", engine_name, status)
         
         return status
     
+    @staticmethod
+    def _current_config_signature() -> Tuple:
+        """Summarize which configuration values are present, to detect config changes."""
+        return tuple(
+            (section, tuple((key, value is not None and value != "") for key, value in values.items()))
+            for section, values in SEARCH_ENGINES.items()
+        )
+    
+    @classmethod
+    def _check_config_signature(cls):
+        """Drop memoized availability if the configuration changed since it was computed."""
+        signature = cls._current_config_signature()
+        if signature != cls._config_signature:
+            cls._availability = {}
+            cls._engine_preference = None
+            cls._config_signature = signature
+    
+    @classmethod
+    def invalidate_availability(cls):
+        """Force engine availability and the default engine to be resolved again."""
+        cls._availability = {}
+        cls._engine_preference = None
+        cls._config_signature = None
+    
     @classmethod
     def is_engine_available(cls, engine_name: str) -> bool:
         """
@@ -176,21 +347,26 @@ class SearchEngineFactory:
             bool: True if the engine is available, False otherwise
         """
         cls._discover_engines()
+        cls._check_config_signature()
         engine_name = engine_name.lower()
         
+        cached = cls._availability.get(engine_name)
+        if cached is not None:
+            return cached
+        
         if engine_name not in cls._engines:
-            print(f"DEBUG: is_engine_available: Engine '{engine_name}' not registered.")
+            logger.debug("is_engine_available: Engine '%s' not registered.", engine_name)
             return False
         
         # Placeholder is always available
         if engine_name == "placeholder":
-            print(f"DEBUG: is_engine_available: '{engine_name}' is placeholder, always available.")
-            return True
+            is_available = True
+        else:
+            # Check if required configuration is present
+            is_available = all(cls.get_engine_config_status(engine_name).values())
         
-        # Check if required configuration is present
-        config_status = cls.get_engine_config_status(engine_name)
-        is_available = all(config_status.values())
-        print(f"DEBUG: is_engine_available: '{engine_name}' config status: {config_status}, all values present: {is_available}")
+        logger.debug("is_engine_available: '%s' available: %s", engine_name, is_available)
+        cls._availability[engine_name] = is_available
         return is_available
     
     @classmethod
@@ -198,30 +374,78 @@ class SearchEngineFactory:
         """
         Get the default search engine based on available configuration.
         
+        The returned instance is pooled and shared with other callers.
+        
         Returns:
             BaseSearch: Instance of the default search engine
             
         Raises:
             RuntimeError: If no search engine is available
         """
+        return cls.get_instance(cls.get_default_engine_name())
+    
+    @classmethod
+    def _get_engine_preference(cls) -> List[str]:
+        """
+        Get the configured, non-meta engines in the order they are picked by default.
+        
+        The order is computed once and reused until the configuration changes,
+        an engine is registered, or ``invalidate_availability`` is called.
+        """
         cls._discover_engines()
+        cls._check_config_signature()
+        
+        engine_preference = cls._engine_preference
+        if engine_preference is not None:
+            return engine_preference
         
-        # Get all available engines (excluding placeholder)
-        available_engines = [
+        # Get all available engines (excluding placeholder and meta engines)
+        engine_preference = [
             engine_name for engine_name in cls.get_available_engines()
-            if cls.is_engine_available(engine_name) and engine_name != "placeholder"
+            if engine_name != "placeholder" and engine_name not in cls.META_ENGINES
+            and cls.is_engine_available(engine_name)
         ]
         
-        # Prioritize Custom Google, then Google
-        if "customgoogle" in available_engines:
-            return cls.create("customgoogle")
+        # Prioritize Custom Google, then the other engines in discovery order
+        if "customgoogle" in engine_preference:
+            engine_preference.remove("customgoogle")
+            engine_preference.insert(0, "customgoogle")
+        
+        logger.debug("Search engine preference resolved to %s", engine_preference)
+        cls._engine_preference = engine_preference
+        return engine_preference
+    
+    @classmethod
+    def get_default_engine_name(cls) -> str:
+        """
+        Get the name of the default search engine.
+        
+        This is the first configured engine whose daily quota is not used up,
+        falling back to the placeholder engine.
         
-        if available_engines:
-            # Return the first available engine
-            return cls.create(available_engines[0])
+        Returns:
+            str: Name of the default search engine
+        """
+        fallbacks = cls.get_fallback_engine_names()
+        return fallbacks[0] if fallbacks else "placeholder"
+    
+    @classmethod
+    def get_fallback_engine_names(cls, exclude: Optional[List[str]] = None) -> List[str]:
+        """
+        Get the engines to fail over to, in order of preference.
         
-        # Fallback to placeholder if nothing else is available
-        return cls.create("placeholder")
+        Args:
+            exclude: Engine names to leave out (e.g. the ones already tried)
+            
+        Returns:
+            List[str]: Configured, non-meta engines whose daily quota is not used up
+        """
+        excluded = {engine_name.lower() for engine_name in exclude or []}
+        rate_limiter = get_rate_limiter()
+        return [
+            engine_name for engine_name in cls._get_engine_preference()
+            if engine_name not in excluded and not rate_limiter.is_exhausted(engine_name)
+        ]
     
     @classmethod
     def get_engine_info(cls, engine_name: str) -> Dict[str, Any]:
@@ -244,6 +468,8 @@ class SearchEngineFactory:
         # Remove the class object to make it serializable
         if 'class' in engine_info:
             del engine_info['class']
+        if engine_info.get('required_config') is not None:
+            engine_info['required_config'] = list(engine_info['required_config'])
         
         engine_info['available'] = cls.is_engine_available(engine_name)
         engine_info['config_status'] = cls.get_engine_config_status(engine_name)
@@ -257,11 +483,31 @@ def create_search_engine(engine_name: str, **kwargs) -> BaseSearch:
     return SearchEngineFactory.create(engine_name, **kwargs)
 
 
+def get_search_engine(engine_name: str, **kwargs) -> BaseSearch:
+    """Convenience function to get a pooled, long-lived search engine instance."""
+    return SearchEngineFactory.get_instance(engine_name, **kwargs)
+
+
+def invalidate_search_engines(engine_name: Optional[str] = None):
+    """Convenience function to drop pooled search engine instances."""
+    SearchEngineFactory.invalidate(engine_name)
+
+
 def get_default_search_engine() -> BaseSearch:
     """Convenience function to get the default search engine."""
     return SearchEngineFactory.get_default_engine()
 
 
+def get_default_search_engine_name() -> str:
+    """Convenience function to get the name of the default search engine."""
+    return SearchEngineFactory.get_default_engine_name()
+
+
+def get_fallback_search_engine_names(exclude: Optional[List[str]] = None) -> List[str]:
+    """Convenience function to get the engines to fail over to."""
+    return SearchEngineFactory.get_fallback_engine_names(exclude)
+
+
 def list_available_engines() -> List[str]:
     """Convenience function to list available search engines."""
     return SearchEngineFactory.get_available_engines()
@@ -0,0 +1,133 @@
+# search_engines/fanout_search.py
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+from .base_search import BaseSearch
+from .factory import SearchEngineFactory
+from .merging import reciprocal_rank_fusion
+from .resilience import get_circuit_breaker
+from .result import SearchResult
+from config import SEARCH_FANOUT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class FanoutSearch(BaseSearch):
+    """
+    Meta search engine that queries several engines concurrently.
+
+    Every engine gets the same query at the same time; engines that have not
+    answered within the latency budget are cut off, and the remaining results
+    are merged with reciprocal-rank fusion and URL-based deduplication.
+    """
+
+    def __init__(self, engines: Optional[List[str]] = None, latency_budget: Optional[float] = None,
+                 rrf_k: Optional[int] = None, max_results: Optional[int] = None):
+        """
+        Initialize the fan-out search.
+
+        Args:
+            engines: Engine names to query; defaults to SEARCH_FANOUT_ENGINES or every configured engine
+            latency_budget: Seconds to wait for engines before merging what has arrived
+            rrf_k: Reciprocal-rank fusion damping constant
+            max_results: Maximum number of merged results to return
+        """
+        self.latency_budget = latency_budget if latency_budget is not None else SEARCH_FANOUT_CONFIG["latency_budget"]
+        self.rrf_k = rrf_k if rrf_k is not None else SEARCH_FANOUT_CONFIG["rrf_k"]
+        self.max_results = max_results if max_results is not None else SEARCH_FANOUT_CONFIG["max_results"]
+
+        engine_names = engines or SEARCH_FANOUT_CONFIG["engines"] or self._configured_engines()
+        self.engines: Dict[str, BaseSearch] = {}
+        for engine_name in engine_names:
+            try:
+                self.engines[engine_name] = SearchEngineFactory.get_instance(engine_name)
+            except (ValueError, RuntimeError) as e:
+                logger.warning("Skipping engine '%s' in fan-out search: %s", engine_name, e)
+
+        if not self.engines:
+            raise ValueError("No search engines available for fan-out search.")
+
+        # Engines cut off by the latency budget keep their worker busy until
+        # they return, so leave headroom for the next calls.
+        self._executor = ThreadPoolExecutor(
+            max_workers=4 * len(self.engines),
+            thread_name_prefix="fanout-search"
+        )
+
+    @staticmethod
+    def _configured_engines() -> List[str]:
+        """Get every configured, non-meta engine, falling back to the placeholder."""
+        excluded = SearchEngineFactory.META_ENGINES | {"placeholder"}
+        engine_names = [
+            engine_name for engine_name in SearchEngineFactory.get_available_engines()
+            if engine_name not in excluded and SearchEngineFactory.is_engine_available(engine_name)
+        ]
+
+        # Both Google engines hit the same Custom Search backend; "google" is
+        # only a fallback for "customgoogle".
+        if "customgoogle" in engine_names and "google" in engine_names:
+            engine_names.remove("google")
+
+        return engine_names or ["placeholder"]
+
+    def close(self):
+        # Member engines are pooled and owned by the factory. Searches still
+        # queued behind cut-off engines are dropped rather than run.
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _merge(self, ranked_lists: Dict[str, List[SearchResult]]) -> List[SearchResult]:
+        # Keep the configured engine order so RRF ties are deterministic
+        ordered = {name: ranked_lists[name] for name in self.engines if name in ranked_lists}
+        return reciprocal_rank_fusion(ordered, k=self.rrf_k)[:self.max_results]
+
+    def _healthy_engines(self) -> Dict[str, BaseSearch]:
+        """Get the member engines whose circuit breaker is not open."""
+        return {
+            engine_name: engine for engine_name, engine in self.engines.items()
+            if not get_circuit_breaker(engine_name).is_open
+        }
+
+    def search(self, query: str, **kwargs):
+        futures = {
+            self._executor.submit(engine.search, query, **kwargs): engine_name
+            for engine_name, engine in self._healthy_engines().items()
+        }
+        done, not_done = wait(futures, timeout=self.latency_budget)
+
+        for future in not_done:
+            future.cancel()
+            logger.info("Fan-out: '%s' exceeded the %ss budget, skipping", futures[future], self.latency_budget)
+
+        ranked_lists = {}
+        for future in done:
+            engine_name = futures[future]
+            try:
+                ranked_lists[engine_name] = future.result() or []
+            except Exception as e:
+                logger.error("Error in fan-out search with '%s': %s", engine_name, e)
+
+        return self._merge(ranked_lists)
+
+    async def asearch(self, query: str, **kwargs):
+        tasks = {
+            asyncio.ensure_future(engine.asearch(query, **kwargs)): engine_name
+            for engine_name, engine in self._healthy_engines().items()
+        }
+        if not tasks:
+            return []
+        done, pending = await asyncio.wait(tasks, timeout=self.latency_budget)
+
+        for task in pending:
+            task.cancel()
+            logger.info("Fan-out: '%s' exceeded the %ss budget, skipping", tasks[task], self.latency_budget)
+
+        ranked_lists = {}
+        for task in done:
+            engine_name = tasks[task]
+            try:
+                ranked_lists[engine_name] = task.result() or []
+            except Exception as e:
+                logger.error("Error in fan-out search with '%s': %s", engine_name, e)
+
+        return self._merge(ranked_lists)
@@ -1,9 +1,17 @@
 # search_engines/google_search.py
+import logging
 import os
 from langchain_google_community import GoogleSearchAPIWrapper
 from search_engines.base_search import BaseSearch
+from search_engines.errors import EngineUnavailableError
+from search_engines.rate_limit import get_rate_limiter
+from search_engines.resilience import EngineResilience
+from search_engines.result import to_search_results
 from config import SEARCH_ENGINES
 
+logger = logging.getLogger(__name__)
+
+
 class GoogleSearch(BaseSearch):
     def __init__(self):
         self.api_key = SEARCH_ENGINES.get("google", {}).get("api_key")
@@ -27,16 +35,30 @@ class GoogleSearch(BaseSearch):
             # We would need to extend it or use a different approach.
             # For now, let's assume a direct connection and document this limitation.
         )
+        self._resilience = EngineResilience("google")
+
+    def _results_once(self, query: str, num_results: int):
+        rate_limiter = get_rate_limiter()
+        rate_limiter.acquire("google")
+        try:
+            return self.search_wrapper.results(query, num_results)
+        except Exception as e:
+            # The daily quota is reported as a 429 too, but retrying won't help
+            if "per day" in str(e).lower():
+                raise rate_limiter.report_quota_exhausted("google") from e
+            raise
 
-    def search(self, query: str):
+    def search(self, query: str, num_results: int = 10):
         try:
-            # The run method returns a string, which we need to parse if we want structured data.
-            # For simplicity, we'll return the raw string result.
-            results = self.search_wrapper.run(query)
-            # Langchain's wrapper returns a string. To maintain consistency, we'll format it.
-            return [{"snippet": results}]
+            # The Custom Search API returns at most 10 results per request
+            items = self._resilience.call(self._results_once, query, min(num_results, 10))
+            # Without results the wrapper returns a single {"Result": "No good ..."} entry
+            return to_search_results([item for item in items if item.get("link")], "google")
+        except EngineUnavailableError:
+            # Let the caller fail over to another engine
+            raise
         except Exception as e:
-            print(f"Error calling Google Search API with LangChain: {e}")
+            logger.error("Error calling Google Search API with LangChain: %s", e)
             return []
 
 if __name__ == '__main__':
@@ -0,0 +1,200 @@
+# search_engines/hedged_search.py
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+from .base_search import BaseSearch
+from .errors import EngineUnavailableError
+from .factory import SearchEngineFactory
+from .latency import get_latency_histogram, record_latency
+from .rate_limit import quota_group
+from config import SEARCH_HEDGE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class HedgedSearch(BaseSearch):
+    """
+    Meta search engine that hedges slow searches with a second engine.
+
+    The query goes to the primary engine first. If it has not answered within
+    the hedge delay (a percentile of the primary's recent latency), the same
+    query is sent to the secondary engine and the first usable answer wins.
+    A primary that fails or comes back empty is hedged immediately.
+    """
+
+    def __init__(self, primary: Optional[str] = None, secondary: Optional[str] = None,
+                 percentile: Optional[float] = None, min_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, default_delay: Optional[float] = None,
+                 min_samples: Optional[int] = None, max_workers: Optional[int] = None):
+        """
+        Initialize the hedged search.
+
+        Args:
+            primary: Engine queried first; defaults to SEARCH_HEDGE_PRIMARY or the default engine
+            secondary: Engine used as the hedge; defaults to SEARCH_HEDGE_SECONDARY or the next available engine
+            percentile: Latency percentile of the primary engine after which the hedge is sent
+            min_delay: Lower bound of the hedge delay in seconds
+            max_delay: Upper bound of the hedge delay in seconds
+            default_delay: Hedge delay used until enough latencies have been recorded
+            min_samples: Recorded latencies needed before the percentile is used
+            max_workers: Threads running blocking searches, shared by every caller of this instance
+        """
+        self.percentile = percentile if percentile is not None else SEARCH_HEDGE_CONFIG["percentile"]
+        self.min_delay = min_delay if min_delay is not None else SEARCH_HEDGE_CONFIG["min_delay"]
+        self.max_delay = max_delay if max_delay is not None else SEARCH_HEDGE_CONFIG["max_delay"]
+        self.default_delay = default_delay if default_delay is not None else SEARCH_HEDGE_CONFIG["default_delay"]
+        self.min_samples = min_samples if min_samples is not None else SEARCH_HEDGE_CONFIG["min_samples"]
+
+        self.primary_name = primary or SEARCH_HEDGE_CONFIG["primary"] or SearchEngineFactory.get_default_engine_name()
+        self.secondary_name = secondary or SEARCH_HEDGE_CONFIG["secondary"] or self._pick_secondary(self.primary_name)
+        self.primary = SearchEngineFactory.get_instance(self.primary_name)
+        self.secondary = SearchEngineFactory.get_instance(self.secondary_name) if self.secondary_name else None
+        if self.secondary is None:
+            logger.warning("No secondary engine for hedged search; using '%s' alone", self.primary_name)
+
+        # Shared by every caller of the pooled instance; losing searches keep
+        # their worker busy until they return
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers if max_workers is not None else SEARCH_HEDGE_CONFIG["max_workers"],
+            thread_name_prefix="hedged-search"
+        )
+        self._stats = {"searches": 0, "hedged": 0, "secondary_wins": 0}
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def _pick_secondary(primary: str) -> Optional[str]:
+        """Get the next available engine that does not share the primary's backend."""
+        for engine_name in SearchEngineFactory.get_fallback_engine_names(exclude=[primary]):
+            if quota_group(engine_name) != quota_group(primary):
+                return engine_name
+        return None
+
+    def close(self):
+        # Member engines are pooled and owned by the factory. Searches still
+        # queued behind cut-off engines are dropped rather than run.
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def hedge_delay(self) -> float:
+        """Get the seconds to wait for the primary engine before sending the hedge."""
+        histogram = get_latency_histogram(self.primary_name)
+        delay = None
+        if histogram.count >= self.min_samples:
+            delay = histogram.percentile(self.percentile)
+        if delay is None:
+            delay = self.default_delay
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get the number of searches, hedges sent and searches won by the secondary engine."""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    @staticmethod
+    def _timed(engine_name: str, engine: BaseSearch, query: str, kwargs: dict,
+               started: Optional[threading.Event] = None):
+        if started is not None:
+            started.set()
+        start = time.monotonic()
+        results = engine.search(query, **kwargs)
+        record_latency(engine_name, time.monotonic() - start)
+        return results
+
+    @staticmethod
+    async def _atimed(engine_name: str, engine: BaseSearch, query: str, kwargs: dict):
+        start = time.monotonic()
+        # A cancelled loser's latency is only a lower bound and would drag the
+        # percentile (and with it the hedge delay) down, so it is not recorded
+        results = await engine.asearch(query, **kwargs)
+        record_latency(engine_name, time.monotonic() - start)
+        return results
+
+    @staticmethod
+    def _usable(future) -> bool:
+        """A finished search is usable if it returned results."""
+        return not future.cancelled() and future.exception() is None and bool(future.result())
+
+    @staticmethod
+    def _fallback_result(futures: List):
+        """Pick the outcome to report when no search returned results."""
+        errors = [future.exception() for future in futures if not future.cancelled() and future.exception()]
+        if len(errors) == len(futures):
+            # Prefer an unavailability error so callers can fail over
+            for error in errors:
+                if isinstance(error, EngineUnavailableError):
+                    raise error
+            raise errors[0]
+        return []
+
+    def _log_hedge(self, reason: str):
+        self._count("hedged")
+        logger.debug("Hedging: '%s' %s, also querying '%s'", self.primary_name, reason, self.secondary_name)
+
+    def search(self, query: str, **kwargs):
+        self._count("searches")
+        if self.secondary is None:
+            return self._timed(self.primary_name, self.primary, query, kwargs)
+
+        delay = self.hedge_delay()
+        started = threading.Event()
+        primary_future = self._executor.submit(self._timed, self.primary_name, self.primary, query, kwargs, started)
+        # Time the engine, not the wait for a free worker under load
+        started.wait()
+        done, _ = wait([primary_future], timeout=delay)
+        if done and self._usable(primary_future):
+            return primary_future.result()
+
+        self._log_hedge("failed" if done else f"took more than {delay:.2f}s")
+        secondary_future = self._executor.submit(self._timed, self.secondary_name, self.secondary, query, kwargs)
+        futures: Dict[Future, str] = {primary_future: self.primary_name, secondary_future: self.secondary_name}
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if self._usable(future):
+                    # A running loser can't be interrupted; its result is dropped
+                    for other in pending:
+                        other.cancel()
+                    if future is secondary_future:
+                        self._count("secondary_wins")
+                    return future.result()
+
+        return self._fallback_result(list(futures))
+
+    async def asearch(self, query: str, **kwargs):
+        self._count("searches")
+        if self.secondary is None:
+            return await self._atimed(self.primary_name, self.primary, query, kwargs)
+
+        delay = self.hedge_delay()
+        primary_task = asyncio.ensure_future(self._atimed(self.primary_name, self.primary, query, kwargs))
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        if done and self._usable(primary_task):
+            return primary_task.result()
+
+        self._log_hedge("failed" if done else f"took more than {delay:.2f}s")
+        secondary_task = asyncio.ensure_future(self._atimed(self.secondary_name, self.secondary, query, kwargs))
+        tasks = [primary_task, secondary_task]
+
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if self._usable(task):
+                        if task is secondary_task:
+                            self._count("secondary_wins")
+                        return task.result()
+        finally:
+            # Cancel the loser (or both, if the caller was cancelled)
+            for task in pending:
+                task.cancel()
+
+        return self._fallback_result(tasks)
@@ -0,0 +1,109 @@
+# search_engines/latency.py
+import math
+import threading
+from typing import Dict, Optional
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram with gradual decay.
+
+    Bucket bounds grow geometrically from ``min_latency`` by ``growth`` per
+    bucket, so percentiles are accurate to within one growth step at any
+    scale. Once ``max_samples`` observations are held, every count is halved,
+    so recent behaviour outweighs old behaviour. Thread-safe.
+    """
+
+    def __init__(self, min_latency: float = 0.001, max_latency: float = 120.0, growth: float = 1.2,
+                 max_samples: int = 2000):
+        """
+        Args:
+            min_latency: Upper bound in seconds of the first bucket
+            max_latency: Latencies above this land in the last bucket
+            growth: Ratio between consecutive bucket bounds
+            max_samples: Observation count at which all counts are halved
+        """
+        self.min_latency = min_latency
+        self.growth = growth
+        self.max_samples = max_samples
+        bucket_count = int(math.ceil(math.log(max_latency / min_latency, growth))) + 1
+        self.bounds = [min_latency * growth ** i for i in range(bucket_count)]
+        self._counts = [0.0] * bucket_count
+        self._total = 0.0
+        self._lock = threading.Lock()
+
+    def _bucket(self, seconds: float) -> int:
+        if seconds <= self.min_latency:
+            return 0
+        return min(len(self.bounds) - 1, int(math.ceil(math.log(seconds / self.min_latency, self.growth))))
+
+    def record(self, seconds: float):
+        """Record one observed latency in seconds."""
+        index = self._bucket(seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._total += 1
+            if self._total >= self.max_samples:
+                self._counts = [count / 2 for count in self._counts]
+                self._total /= 2
+
+    @property
+    def count(self) -> float:
+        """Number of (decayed) observations."""
+        return self._total
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """
+        Estimate a latency percentile.
+
+        Args:
+            percentile: Percentile between 0 and 100
+
+        Returns:
+            Optional[float]: Upper bound of the bucket holding the percentile, or None without observations
+        """
+        with self._lock:
+            if self._total == 0:
+                return None
+            target = self._total * percentile / 100.0
+            cumulative = 0.0
+            for bound, count in zip(self.bounds, self._counts):
+                cumulative += count
+                if cumulative >= target:
+                    return bound
+            return self.bounds[-1]
+
+    def get_stats(self) -> Dict[str, Optional[float]]:
+        """Get the observation count and the p50, p95 and p99 latencies."""
+        return {
+            "count": self.count,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+_histograms: Dict[str, LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def get_latency_histogram(engine_name: str) -> LatencyHistogram:
+    """Get the process-wide latency histogram of an engine, creating it on first use."""
+    with _histograms_lock:
+        histogram = _histograms.get(engine_name)
+        if histogram is None:
+            histogram = LatencyHistogram()
+            _histograms[engine_name] = histogram
+        return histogram
+
+
+def record_latency(engine_name: str, seconds: float):
+    """Record the latency of one search on an engine."""
+    get_latency_histogram(engine_name).record(seconds)
+
+
+def get_latency_stats() -> Dict[str, Dict[str, Optional[float]]]:
+    """Get latency statistics for every engine with recorded searches."""
+    with _histograms_lock:
+        histograms = dict(_histograms)
+    return {engine_name: histogram.get_stats() for engine_name, histogram in sorted(histograms.items())}
@@ -0,0 +1,30 @@
+# search_engines/manifest.py
+from collections import namedtuple
+
+
+EngineSpec = namedtuple("EngineSpec", ["module", "class_name", "config_section", "required_config"])
+EngineSpec.__doc__ = """
+Static description of a built-in search engine.
+
+Fields:
+    module: Python module path of the engine class, imported on first use
+    class_name: Name of the search engine class
+    config_section: Key of the engine's section in config.SEARCH_ENGINES, or None if it needs no configuration
+    required_config: Keys in that section that must be set for the engine to be available
+"""
+
+
+# Built-in engines. Listing engines and checking their configuration only reads
+# this table, so heavy client libraries (langchain_community, googleapiclient, ...)
+# are imported only when an engine is actually created.
+ENGINE_MANIFEST = {
+    "placeholder": EngineSpec("search_engines.placeholder_search", "PlaceholderSearch", None, ()),
+    "customgoogle": EngineSpec(
+        "search_engines.custom_google_search", "CustomGoogleSearch", "custom_google", ("api_key", "cse_id")
+    ),
+    "google": EngineSpec("search_engines.google_search", "GoogleSearch", "google", ("api_key", "cse_id")),
+    "bing": EngineSpec("search_engines.bing_search", "BingSearch", "bing", ("api_key",)),
+    "brave": EngineSpec("search_engines.brave_search", "BraveSearch", "brave", ("api_key",)),
+    "fanout": EngineSpec("search_engines.fanout_search", "FanoutSearch", None, ()),
+    "hedged": EngineSpec("search_engines.hedged_search", "HedgedSearch", None, ()),
+}
@@ -0,0 +1,114 @@
+# search_engines/merging.py
+from typing import Dict, List, Any, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from .result import SearchResult
+
+
+# Query parameters that only track the click and never change the page content
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "yclid", "mc_cid", "mc_eid", "ref", "ref_src"}
+
+# Fields filled in from duplicates when the first copy of a result lacks them
+_MERGED_FIELDS = ("title", "url", "display_host")
+
+
+def normalize_url(url: Optional[str]) -> str:
+    """
+    Normalize a URL so the same page reported by different engines compares equal.
+
+    The scheme, ``www.`` prefix, default ports, fragments, tracking parameters
+    and trailing slashes are dropped, and the remaining query parameters are sorted.
+
+    Args:
+        url: URL to normalize
+
+    Returns:
+        str: Normalized URL, or an empty string if no URL was given
+    """
+    if not url:
+        return ""
+
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip("/")
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ))
+
+    return urlunsplit(("", host, path, query, ""))
+
+
+def result_key(result: SearchResult) -> str:
+    """
+    Get the deduplication key of a search result.
+
+    Results are identified by their normalized URL. Results without a URL
+    fall back to their whitespace-normalized snippet.
+    """
+    url_key = normalize_url(result.url)
+    if url_key:
+        return url_key
+    snippet = " ".join(result.snippet.split()).lower()
+    return f"snippet:{snippet}" if snippet else ""
+
+
+def reciprocal_rank_fusion(ranked_lists: Dict[str, List[Any]], k: int = 60) -> List[SearchResult]:
+    """
+    Merge ranked result lists from several engines with reciprocal-rank fusion.
+
+    Each result scores ``1 / (k + rank)`` for every engine that returned it, so
+    pages found by several engines rise to the top. Duplicates are merged into
+    a single result that keeps the first non-empty value of every field and
+    records which engines returned it.
+
+    Args:
+        ranked_lists: Mapping of engine name to that engine's results (SearchResult objects or dicts), best first
+        k: RRF damping constant; larger values flatten the rank contribution
+
+    Returns:
+        List[SearchResult]: Deduplicated results sorted by fused score, with
+        ``score``, ``engines`` and the merged ``rank`` set
+    """
+    fused: Dict[str, SearchResult] = {}
+    scores: Dict[str, float] = {}
+
+    for engine_name, results in ranked_lists.items():
+        seen = set()
+        for rank, result in enumerate(results or [], 1):
+            result = SearchResult.coerce(result, engine_name)
+            key = result_key(result)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+
+            merged = fused.get(key)
+            if merged is None:
+                merged = result.copy()
+                merged.engines = (engine_name,)
+                fused[key] = merged
+                continue
+
+            merged.engines += (engine_name,)
+            for field in _MERGED_FIELDS:
+                value = getattr(result, field)
+                if value and not getattr(merged, field):
+                    setattr(merged, field, value)
+            # Prefer the most descriptive snippet among the duplicates
+            if len(result.snippet) > len(merged.snippet):
+                merged.snippet = result.snippet
+
+    # sorted() is stable, so ties keep the order in which engines reported them
+    ordered_keys = sorted(fused, key=lambda key: scores[key], reverse=True)
+    merged_results = []
+    for rank, key in enumerate(ordered_keys, 1):
+        fused[key].score = scores[key]
+        fused[key].rank = rank
+        merged_results.append(fused[key])
+    return merged_results
@@ -1,18 +1,31 @@
 # search_engines/placeholder_search.py
+import logging
 from .base_search import BaseSearch
+from .result import SearchResult
+
+logger = logging.getLogger(__name__)
+
 
 class PlaceholderSearch(BaseSearch):
-    def search(self, query: str):
-        print(f"--- Searching with Placeholder for query: '{query}' ---")
+    def search(self, query: str, **kwargs):
+        logger.debug("Searching with Placeholder for query: '%s'", query)
         return [
-            {
-                "title": "Placeholder Result 1",
-                "link": "http://example.com/1",
-                "snippet": f"This is a placeholder snippet for the query '{query}'."
-            },
-            {
-                "title": "Placeholder Result 2",
-                "link": "http://example.com/2",
-                "snippet": f"Another placeholder snippet for '{query}'."
-            }
+            SearchResult(
+                title="Placeholder Result 1",
+                url="http://example.com/1",
+                snippet=f"This is a placeholder snippet for the query '{query}'.",
+                rank=1,
+                engine="placeholder"
+            ),
+            SearchResult(
+                title="Placeholder Result 2",
+                url="http://example.com/2",
+                snippet=f"Another placeholder snippet for '{query}'.",
+                rank=2,
+                engine="placeholder"
+            )
         ]
+
+    async def asearch(self, query: str, **kwargs):
+        # No I/O involved, so there is nothing to offload to a thread
+        return self.search(query, **kwargs)
@@ -0,0 +1,471 @@
+# search_engines/rate_limit.py
+import asyncio
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Set, Tuple
+from .errors import EngineUnavailableError, QuotaExceededError
+from config import SEARCH_RATE_LIMIT_CONFIG
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the per-process lock only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+# Engines that bill against the same API quota. Both Google engines call the
+# Custom Search JSON API with the same key.
+QUOTA_GROUPS = {
+    "customgoogle": "google_cse",
+    "google": "google_cse",
+}
+
+
+def quota_group(engine_name: str) -> str:
+    """Get the rate limit / quota group of an engine."""
+    return QUOTA_GROUPS.get(engine_name, engine_name)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value: Either a number of seconds or an HTTP date
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the value is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by threads and async tasks.
+
+    Each request takes one token; tokens refill at ``rate`` per second up to
+    ``capacity``. Callers reserve their token up front and then wait for it,
+    so concurrent callers are served in order instead of polling.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size; defaults to one second worth of tokens (at least 1)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        # Time from which tokens refill; lies in the future while paused
+        self._refill_from = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, max_wait: Optional[float]) -> float:
+        """
+        Take a token and return how many seconds the caller must wait before using it.
+
+        If the wait would exceed ``max_wait`` no token is taken and the required
+        wait is returned negated.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now > self._refill_from:
+                self._tokens = min(self.capacity, self._tokens + (now - self._refill_from) * self.rate)
+                self._refill_from = now
+
+            wait = 0.0
+            if self._tokens < 1:
+                wait = (self._refill_from - now) + (1 - self._tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                return -wait
+            self._tokens -= 1
+            return wait
+
+    def acquire(self, max_wait: Optional[float] = None) -> float:
+        """
+        Block until a token is available.
+
+        Args:
+            max_wait: Give up instead of waiting longer than this many seconds
+
+        Returns:
+            float: Seconds waited, or a negative number (minus the required wait) if the caller gave up
+        """
+        wait = self._reserve(max_wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, max_wait: Optional[float] = None) -> float:
+        """Non-blocking counterpart of ``acquire``."""
+        wait = self._reserve(max_wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for ``seconds`` (e.g. after the API answered 429)."""
+        with self._lock:
+            self._tokens = min(self._tokens, 0.0)
+            self._refill_from = max(self._refill_from, time.monotonic() + seconds)
+
+
+class QuotaTracker:
+    """
+    Counts requests per quota group and day (UTC) and enforces daily limits.
+
+    Requests are counted in memory; a background timer writes the new counts
+    to a JSON file at most every ``flush_interval`` seconds (and at exit), so
+    searches never wait for disk I/O. Each flush takes an exclusive lock on
+    ``<path>.lock``, adds this process's new requests to the counts on disk
+    and replaces the file atomically, so processes sharing the file add up
+    their usage instead of overwriting each other.
+    """
+
+    def __init__(self, daily_quotas: Dict[str, int], path: Optional[str] = None, flush_interval: float = 5.0):
+        """
+        Args:
+            daily_quotas: Requests allowed per day, by quota group
+            path: JSON file to persist counters to; None keeps them in memory
+            flush_interval: Seconds between a change and the write that persists it
+        """
+        self.daily_quotas = dict(daily_quotas)
+        self.path = path or None
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # Serialises flushes within the process; the lock file does so across processes
+        self._flush_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._day = self._today()
+        self._usage: Dict[str, int] = {}
+        # Groups the API itself reported as out of quota for the day
+        self._exhausted: Dict[str, bool] = {}
+        # Changes made since the last flush
+        self._pending: Dict[str, int] = {}
+        self._pending_exhausted: Set[str] = set()
+        self._load()
+        if self.path:
+            atexit.register(self.flush)
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).date().isoformat()
+
+    @staticmethod
+    def seconds_until_reset() -> float:
+        """Seconds until the daily counters reset (midnight UTC)."""
+        now = datetime.now(timezone.utc)
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+        return (tomorrow - now).total_seconds()
+
+    def _read(self) -> dict:
+        """Read the quota file; an unreadable file counts as empty."""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to read search quota file %s: %s", self.path, e)
+            return {}
+
+    def _load(self):
+        if not self.path:
+            return
+        data = self._read()
+        if data.get("day") == self._day:
+            self._usage = {group: int(count) for group, count in data.get("usage", {}).items()}
+            self._exhausted = {group: True for group in data.get("exhausted", [])}
+
+    def _schedule_flush(self):
+        """Start the flush timer unless one is pending. Must be called with the lock held."""
+        if not self.path or self._flush_timer is not None:
+            return
+        self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def _merge_into_file(self, day: str, pending: Dict[str, int],
+                         exhausted: Set[str]) -> Optional[Tuple[Dict[str, int], Set[str]]]:
+        """
+        Add pending changes to the counts on disk under the file lock.
+
+        Returns:
+            Optional[Tuple[Dict[str, int], Set[str]]]: The merged usage and exhausted groups,
+            or None if the file holds no counts for ``day``
+        """
+        if not pending and not exhausted:
+            # Nothing to write; only pick up other processes' counts
+            data = self._read()
+            if data.get("day") != day:
+                return None
+            return ({group: int(count) for group, count in data.get("usage", {}).items()},
+                    set(data.get("exhausted", [])))
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            data = self._read()
+            if data.get("day", "") > day:
+                return None
+            if data.get("day") != day:
+                data = {}
+            usage = {group: int(count) for group, count in data.get("usage", {}).items()}
+            exhausted_groups = set(data.get("exhausted", []))
+            for group, count in pending.items():
+                usage[group] = usage.get(group, 0) + count
+            exhausted_groups |= exhausted
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"day": day, "usage": usage, "exhausted": sorted(exhausted_groups)}, f)
+            os.replace(temp_path, self.path)
+            return usage, exhausted_groups
+
+    def flush(self):
+        """Persist pending changes now and pick up requests counted by other processes."""
+        if not self.path:
+            return
+        with self._flush_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                day = self._day
+                pending, self._pending = self._pending, {}
+                exhausted, self._pending_exhausted = self._pending_exhausted, set()
+            try:
+                merged = self._merge_into_file(day, pending, exhausted)
+            except OSError as e:
+                logger.warning("Failed to write search quota file %s: %s", self.path, e)
+                with self._lock:
+                    # Keep the changes for the next flush
+                    if self._day == day:
+                        for group, count in pending.items():
+                            self._pending[group] = self._pending.get(group, 0) + count
+                        self._pending_exhausted |= exhausted
+                return
+            if merged is None:
+                return
+            usage, exhausted_groups = merged
+            with self._lock:
+                if self._day != day:
+                    return
+                for group, count in usage.items():
+                    self._usage[group] = max(self._usage.get(group, 0), count + self._pending.get(group, 0))
+                for group in exhausted_groups:
+                    self._exhausted[group] = True
+
+    def _roll_over(self):
+        """Reset the counters when the day changed. Must be called with the lock held."""
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._usage = {}
+            self._exhausted = {}
+            self._pending = {}
+            self._pending_exhausted = set()
+
+    def _quota_error(self, group: str) -> QuotaExceededError:
+        limit = self.daily_quotas.get(group)
+        detail = f"{limit} requests" if limit is not None else "provider quota"
+        return QuotaExceededError(
+            group,
+            f"Daily quota for '{group}' is used up ({detail}); resets at midnight UTC",
+            retry_after=self.seconds_until_reset()
+        )
+
+    def is_exhausted(self, group: str) -> bool:
+        """Check whether a quota group has no requests left today."""
+        with self._lock:
+            self._roll_over()
+            if self._exhausted.get(group):
+                return True
+            limit = self.daily_quotas.get(group)
+            return limit is not None and self._usage.get(group, 0) >= limit
+
+    def check(self, group: str):
+        """Raise QuotaExceededError if the group has no requests left today."""
+        if self.is_exhausted(group):
+            raise self._quota_error(group)
+
+    def consume(self, group: str, amount: int = 1):
+        """
+        Count requests against a group's daily quota.
+
+        Raises:
+            QuotaExceededError: If the requests would exceed the quota
+        """
+        with self._lock:
+            self._roll_over()
+            limit = self.daily_quotas.get(group)
+            used = self._usage.get(group, 0)
+            if self._exhausted.get(group) or (limit is not None and used + amount > limit):
+                raise self._quota_error(group)
+            self._usage[group] = used + amount
+            self._pending[group] = self._pending.get(group, 0) + amount
+            self._schedule_flush()
+
+    def mark_exhausted(self, group: str) -> QuotaExceededError:
+        """
+        Record that the provider reported the group's quota as used up.
+
+        Returns:
+            QuotaExceededError: Error for the caller to raise
+        """
+        with self._lock:
+            self._roll_over()
+            self._exhausted[group] = True
+            self._pending_exhausted.add(group)
+            self._schedule_flush()
+        return self._quota_error(group)
+
+    def remaining(self, group: str) -> Optional[int]:
+        """Get the requests left today, or None if the group has no configured quota."""
+        with self._lock:
+            self._roll_over()
+            if self._exhausted.get(group):
+                return 0
+            limit = self.daily_quotas.get(group)
+            if limit is None:
+                return None
+            return max(0, limit - self._usage.get(group, 0))
+
+    def get_usage(self) -> Dict[str, int]:
+        """Get today's request counts by quota group."""
+        with self._lock:
+            self._roll_over()
+            return dict(self._usage)
+
+
+class RateLimiter:
+    """
+    Gate every search API request goes through.
+
+    Combines a token bucket per quota group (request rate) with the daily
+    quota tracker. Groups without a configured rate or quota are not limited.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None, daily_quotas: Optional[Dict[str, int]] = None,
+                 quota_path: Optional[str] = None, max_wait: float = 10.0, quota_flush_interval: float = 5.0):
+        """
+        Args:
+            rates: Sustained requests per second, by engine name or quota group
+            daily_quotas: Requests allowed per day, by engine name or quota group
+            quota_path: JSON file to persist daily counters to
+            max_wait: Longest a request waits for the rate limit before the engine is reported unavailable
+            quota_flush_interval: Seconds between a quota change and the write that persists it
+        """
+        self.buckets = {group: TokenBucket(rate) for group, rate in (rates or {}).items() if rate > 0}
+        self.quota = QuotaTracker(daily_quotas or {}, quota_path, quota_flush_interval)
+        self.max_wait = max_wait
+
+    def _rate_limited_error(self, group: str, wait: float) -> EngineUnavailableError:
+        return EngineUnavailableError(
+            group,
+            f"Rate limit for '{group}' would delay the request by {wait:.1f}s",
+            retry_after=wait
+        )
+
+    def acquire(self, engine_name: str):
+        """
+        Wait until the engine may send a request, and count it against its daily quota.
+
+        Raises:
+            QuotaExceededError: If the daily quota is used up
+            EngineUnavailableError: If the rate limit would delay the request longer than ``max_wait``
+        """
+        group = quota_group(engine_name)
+        self.quota.check(group)
+        bucket = self.buckets.get(group)
+        if bucket is not None:
+            wait = bucket.acquire(self.max_wait)
+            if wait < 0:
+                raise self._rate_limited_error(group, -wait)
+        self.quota.consume(group)
+
+    async def aacquire(self, engine_name: str):
+        """Non-blocking counterpart of ``acquire``."""
+        group = quota_group(engine_name)
+        self.quota.check(group)
+        bucket = self.buckets.get(group)
+        if bucket is not None:
+            wait = await bucket.aacquire(self.max_wait)
+            if wait < 0:
+                raise self._rate_limited_error(group, -wait)
+        self.quota.consume(group)
+
+    def report_rate_limited(self, engine_name: str, retry_after: Optional[float] = None):
+        """
+        Slow down after the API rejected a request with HTTP 429.
+
+        Args:
+            engine_name: Engine that was rate limited
+            retry_after: Seconds the API asked to wait; defaults to one refill interval
+        """
+        group = quota_group(engine_name)
+        # Groups without a configured rate are held to one request per second from now on
+        bucket = self.buckets.setdefault(group, TokenBucket(1.0))
+        bucket.pause(retry_after if retry_after is not None else 1.0 / bucket.rate)
+
+    def report_quota_exhausted(self, engine_name: str) -> QuotaExceededError:
+        """Record that the API reported the daily quota as used up; returns the error to raise."""
+        return self.quota.mark_exhausted(quota_group(engine_name))
+
+    def is_exhausted(self, engine_name: str) -> bool:
+        """Check whether an engine's daily quota is used up."""
+        return self.quota.is_exhausted(quota_group(engine_name))
+
+    def get_usage(self) -> Dict[str, Dict[str, Optional[int]]]:
+        """Get today's usage and remaining quota by quota group."""
+        usage = self.quota.get_usage()
+        groups = set(usage) | set(self.quota.daily_quotas)
+        return {
+            group: {"used": usage.get(group, 0), "remaining": self.quota.remaining(group)}
+            for group in sorted(groups)
+        }
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the process-wide rate limiter, creating it from config on first use."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                if SEARCH_RATE_LIMIT_CONFIG["enabled"]:
+                    _rate_limiter = RateLimiter(
+                        rates=SEARCH_RATE_LIMIT_CONFIG["rates"],
+                        daily_quotas=SEARCH_RATE_LIMIT_CONFIG["daily_quotas"],
+                        quota_path=SEARCH_RATE_LIMIT_CONFIG["quota_path"],
+                        max_wait=SEARCH_RATE_LIMIT_CONFIG["max_wait"],
+                        quota_flush_interval=SEARCH_RATE_LIMIT_CONFIG["quota_flush_interval"]
+                    )
+                else:
+                    # Still tracks quotas the APIs report as exhausted, so failover keeps working
+                    _rate_limiter = RateLimiter()
+    return _rate_limiter
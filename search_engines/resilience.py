@@ -0,0 +1,291 @@
+# search_engines/resilience.py
+import asyncio
+import logging
+import random
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+import httpx
+import requests
+from .errors import EngineUnavailableError
+from .rate_limit import parse_retry_after, quota_group
+from config import SEARCH_RETRY_CONFIG
+from tracing import add_event, get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+# Statuses worth retrying: timeouts, rate limiting and server-side errors
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(EngineUnavailableError):
+    """Raised instead of calling an engine whose circuit breaker is open."""
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    """
+    Get the HTTP status code carried by an exception, if any.
+
+    Understands requests and httpx errors as well as googleapiclient's HttpError.
+    """
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is None:
+        # googleapiclient.errors.HttpError
+        status = getattr(getattr(error, "resp", None), "status", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    Classify an exception raised by a search request.
+
+    Connection errors, timeouts, 429 and 5xx responses are transient. Other 4xx
+    responses (bad API key, malformed query) fail the same way on every attempt.
+    """
+    if isinstance(error, EngineUnavailableError):
+        return False
+    status = error_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return isinstance(error, (
+        requests.exceptions.ConnectionError,
+        requests.exceptions.Timeout,
+        httpx.TransportError,
+        socket.timeout,
+        ConnectionError,
+        TimeoutError
+    ))
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Get the Retry-After delay requested by the response behind an exception."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    return parse_retry_after(headers.get("Retry-After"))
+
+
+class CircuitBreaker:
+    """
+    Stops calling an engine after consecutive failures.
+
+    After ``failure_threshold`` failed requests in a row the circuit opens and
+    calls fail immediately with CircuitOpenError. Once ``recovery_timeout``
+    seconds have passed, a single probe request is let through: success closes
+    the circuit, failure opens it again. Thread-safe.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        """
+        Args:
+            name: Engine (or quota group) the breaker protects
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds the circuit stays open before a probe request is allowed
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _open_error(self, retry_after: float) -> CircuitOpenError:
+        return CircuitOpenError(
+            self.name,
+            f"Circuit breaker for '{self.name}' is open after {self._failures} consecutive failures",
+            retry_after=retry_after
+        )
+
+    @property
+    def is_open(self) -> bool:
+        """Check whether calls would currently be rejected."""
+        with self._lock:
+            if self.state == self.OPEN:
+                return time.monotonic() - self._opened_at < self.recovery_timeout
+            return self.state == self.HALF_OPEN and self._probe_in_flight
+
+    def before_call(self):
+        """
+        Admit a request, or raise CircuitOpenError if the circuit is open.
+
+        Every admitted request must be followed by ``record_success``,
+        ``record_failure`` or ``release``.
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.recovery_timeout - time.monotonic()
+                if remaining > 0:
+                    raise self._open_error(remaining)
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    raise self._open_error(self.recovery_timeout)
+                self._probe_in_flight = True
+
+    def record_success(self):
+        """Record that the engine answered; closes the circuit."""
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        """Record a failed request; opens the circuit at the threshold or when a probe fails."""
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Circuit breaker for '%s' opened after %d consecutive failures",
+                                   self.name, self._failures, extra={"engine": self.name})
+                    add_event("circuit_opened", engine=self.name, failures=self._failures)
+                    get_metrics().inc("search_circuit_opened_total", engine=self.name)
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """Finish an admitted request that says nothing about the engine's health."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def reset(self):
+        """Close the circuit and forget past failures."""
+        self.record_success()
+
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(engine_name: str) -> CircuitBreaker:
+    """
+    Get the process-wide circuit breaker of an engine.
+
+    Engines that call the same backend (see ``quota_group``) share a breaker.
+    """
+    group = quota_group(engine_name)
+    with _circuit_breakers_lock:
+        breaker = _circuit_breakers.get(group)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                group,
+                failure_threshold=SEARCH_RETRY_CONFIG["failure_threshold"],
+                recovery_timeout=SEARCH_RETRY_CONFIG["recovery_timeout"]
+            )
+            _circuit_breakers[group] = breaker
+        return breaker
+
+
+class EngineResilience:
+    """
+    Retry policy plus circuit breaker for the requests of one search engine.
+
+    ``call`` / ``acall`` run a single-attempt request function, retrying
+    transient errors with exponential backoff and full jitter (or the delay
+    from the response's Retry-After header), and fail fast while the engine's
+    circuit breaker is open. Non-retryable errors are raised immediately.
+    """
+
+    def __init__(self, engine_name: str, max_attempts: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, breaker: Optional[CircuitBreaker] = None):
+        """
+        Args:
+            engine_name: Engine the requests belong to
+            max_attempts: Attempts per request, including the first one
+            base_delay: Backoff before the first retry, doubled for each further retry
+            max_delay: Upper bound of a single backoff; longer Retry-After values are not waited for
+            breaker: Circuit breaker to use; defaults to the engine's shared breaker
+
+        Unset arguments default to the values in SEARCH_RETRY_CONFIG.
+        """
+        self.engine_name = engine_name
+        self.max_attempts = max(1, max_attempts if max_attempts is not None else SEARCH_RETRY_CONFIG["max_attempts"])
+        self.base_delay = base_delay if base_delay is not None else SEARCH_RETRY_CONFIG["base_delay"]
+        self.max_delay = max_delay if max_delay is not None else SEARCH_RETRY_CONFIG["max_delay"]
+        self.breaker = breaker if breaker is not None else get_circuit_breaker(engine_name)
+
+    def _retry_delay(self, attempt: int, error: BaseException) -> Optional[float]:
+        """Get the delay before the next attempt, or None if the error should be raised."""
+        if attempt >= self.max_attempts - 1:
+            return None
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _on_error(self, attempt: int, error: BaseException) -> Optional[float]:
+        """Update the breaker after a failed attempt and decide whether to retry."""
+        if isinstance(error, EngineUnavailableError):
+            # Rate limiter or quota, not a statement about the engine's health
+            self.breaker.release()
+            return None
+        if not is_retryable_error(error):
+            # The engine answered; the request itself is at fault
+            self.breaker.record_success()
+            return None
+
+        if error_status(error) == 429:
+            self.breaker.release()
+        else:
+            self.breaker.record_failure()
+        delay = self._retry_delay(attempt, error)
+        if delay is not None:
+            logger.info("%s: %s; retrying in %.2fs (attempt %d/%d)", self.engine_name, error, delay,
+                        attempt + 1, self.max_attempts, extra={"engine": self.engine_name})
+            add_event("retry", engine=self.engine_name, attempt=attempt + 1, error=str(error), delay=delay)
+            get_metrics().inc("search_retries_total", engine=self.engine_name)
+        return delay
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call ``func(*args, **kwargs)`` with retries.
+
+        Raises:
+            CircuitOpenError: If the engine's circuit breaker is open
+            Exception: The last error, when it is not retryable or retries are used up
+        """
+        for attempt in range(self.max_attempts):
+            self.breaker.before_call()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                delay = self._on_error(attempt, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def acall(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Non-blocking counterpart of ``call`` for coroutine functions."""
+        for attempt in range(self.max_attempts):
+            self.breaker.before_call()
+            try:
+                result = await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                delay = self._on_error(attempt, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
@@ -0,0 +1,152 @@
+# search_engines/result.py
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+
+class SearchResult:
+    """
+    One search result with normalized fields.
+
+    Attributes:
+        title: Result title
+        url: Result URL
+        snippet: Text excerpt shown by the engine
+        display_host: Host name shown for the result (derived from the URL if not given)
+        rank: 1-based position in the engine's (or merged) result list
+        engine: Engine that produced the result
+        score: Ranking score, when the result was merged or reranked
+        engines: Every engine that returned the result, when merged
+
+    Instances use ``__slots__`` and are stored as plain tuples in caches (see
+    ``to_row``). For code written against the earlier dict results, ``get``
+    and ``[]`` accept field names as well as the old ``link`` and
+    ``displayLink`` keys.
+    """
+
+    __slots__ = ("title", "url", "snippet", "display_host", "rank", "engine", "score", "engines")
+
+    # Keys of the dict results engines used to return
+    _ALIASES = {"link": "url", "displayLink": "display_host"}
+
+    def __init__(self, title: str = "", url: str = "", snippet: str = "", display_host: Optional[str] = None,
+                 rank: Optional[int] = None, engine: Optional[str] = None, score: Optional[float] = None,
+                 engines: Sequence[str] = ()):
+        self.title = title or ""
+        self.url = url or ""
+        self.snippet = snippet or ""
+        if display_host is None and self.url:
+            display_host = urlsplit(self.url).hostname
+        self.display_host = display_host or ""
+        self.rank = rank
+        self.engine = engine
+        self.score = score
+        self.engines = tuple(engines)
+
+    def _field(self, key: str) -> str:
+        field = self._ALIASES.get(key, key)
+        if field not in self.__slots__:
+            raise KeyError(key)
+        return field
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, self._field(key))
+
+    def __setitem__(self, key: str, value: Any):
+        setattr(self, self._field(key), value)
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            self._field(key)
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style field access; unknown keys return ``default``."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, SearchResult):
+            return NotImplemented
+        return self.to_row() == other.to_row()
+
+    def __repr__(self) -> str:
+        return f"SearchResult(title={self.title!r}, url={self.url!r}, rank={self.rank!r}, engine={self.engine!r})"
+
+    def copy(self) -> "SearchResult":
+        return SearchResult(*self.to_row())
+
+    def to_row(self) -> Tuple:
+        """Get the fields as a tuple, the compact form used for caching."""
+        return (self.title, self.url, self.snippet, self.display_host, self.rank, self.engine, self.score,
+                self.engines)
+
+    @classmethod
+    def from_row(cls, row: Sequence) -> "SearchResult":
+        """Rebuild a result from ``to_row`` output (a JSON round trip turns it into a list)."""
+        return cls(*row)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the fields as a JSON-serializable dict, leaving out empty optional fields."""
+        data = {"title": self.title, "url": self.url, "snippet": self.snippet, "display_host": self.display_host}
+        if self.rank is not None:
+            data["rank"] = self.rank
+        if self.engine is not None:
+            data["engine"] = self.engine
+        if self.score is not None:
+            data["score"] = self.score
+        if self.engines:
+            data["engines"] = list(self.engines)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], engine: Optional[str] = None) -> "SearchResult":
+        """
+        Build a result from a dict, accepting both field names and the old dict keys.
+
+        Args:
+            data: Result dict (``url``/``link``, ``display_host``/``displayLink``, ...)
+            engine: Engine name to use when the dict names none
+        """
+        return cls(
+            title=data.get("title"),
+            url=data.get("url") or data.get("link"),
+            snippet=data.get("snippet") or data.get("description"),
+            display_host=data.get("display_host") or data.get("displayLink"),
+            rank=data.get("rank"),
+            engine=data.get("engine") or engine,
+            score=data.get("score"),
+            engines=data.get("engines") or ()
+        )
+
+    @classmethod
+    def coerce(cls, value: Any, engine: Optional[str] = None) -> "SearchResult":
+        """Convert a result in any supported form (instance, dict or row) to a SearchResult."""
+        if isinstance(value, SearchResult):
+            return value
+        if isinstance(value, dict):
+            return cls.from_dict(value, engine)
+        return cls.from_row(value)
+
+
+def to_search_results(results: Optional[Iterable[Any]], engine: Optional[str] = None) -> List[SearchResult]:
+    """
+    Convert an engine's results to SearchResult objects and number them.
+
+    Args:
+        results: Results as SearchResult objects, dicts or rows
+        engine: Engine name for results that name none
+
+    Returns:
+        List[SearchResult]: The results, with ``rank`` set where missing
+    """
+    converted = []
+    for rank, result in enumerate(results or [], 1):
+        result = SearchResult.coerce(result, engine)
+        if result.rank is None:
+            result.rank = rank
+        converted.append(result)
+    return converted
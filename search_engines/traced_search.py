@@ -0,0 +1,53 @@
+# search_engines/traced_search.py
+import time
+from .base_search import BaseSearch
+from .result import to_search_results
+from tracing import get_metrics, get_tracer
+
+
+class TracedSearch(BaseSearch):
+    """
+    Wraps any search engine with a span and latency metrics per search.
+
+    Wrap the outermost engine (i.e. around CachedSearch), so cache hits show
+    up as fast searches with a ``cache.hit`` attribute, and cache hits,
+    retries and circuit breaker events recorded by inner layers land on the
+    search's span.
+    """
+
+    def __init__(self, engine: BaseSearch, engine_name: str):
+        self.engine = engine
+        self.engine_name = engine_name
+
+    def _attributes(self, query: str):
+        return {"search.engine": self.engine_name, "search.query": query, "cache.hit": False}
+
+    def _record(self, span, started: float, status: str):
+        metrics = get_metrics()
+        metrics.inc("search_requests_total", engine=self.engine_name, status=status)
+        metrics.observe("search_request_duration_seconds", time.perf_counter() - started, engine=self.engine_name,
+                        cache="hit" if span.attributes.get("cache.hit") else "miss")
+
+    def search(self, query: str, **kwargs):
+        started = time.perf_counter()
+        with get_tracer().span(f"search {self.engine_name}", self._attributes(query), kind="CLIENT") as span:
+            try:
+                results = to_search_results(self.engine.search(query, **kwargs), self.engine_name)
+            except Exception:
+                self._record(span, started, "error")
+                raise
+            span.set_attribute("search.results", len(results))
+            self._record(span, started, "ok")
+            return results
+
+    async def asearch(self, query: str, **kwargs):
+        started = time.perf_counter()
+        with get_tracer().span(f"search {self.engine_name}", self._attributes(query), kind="CLIENT") as span:
+            try:
+                results = to_search_results(await self.engine.asearch(query, **kwargs), self.engine_name)
+            except Exception:
+                self._record(span, started, "error")
+                raise
+            span.set_attribute("search.results", len(results))
+            self._record(span, started, "ok")
+            return results
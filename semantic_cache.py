@@ -0,0 +1,369 @@
+# semantic_cache.py
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import SEMANTIC_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+SemanticHit = namedtuple("SemanticHit", ["value", "query", "similarity"])
+
+_Entry = namedtuple("_Entry", ["query", "value", "context", "expires_at"])
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _unit(vector: Sequence[float]) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class NumpyVectorIndex:
+    """
+    Brute-force cosine similarity index.
+
+    Unit vectors are kept in one preallocated matrix, so a lookup is a single
+    matrix-vector product. Removing a key moves the last row into its place.
+    Fast enough for tens of thousands of entries.
+    """
+
+    def __init__(self, dim: int, capacity: int = 256):
+        self.dim = dim
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._keys: List[str] = []
+        self._positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str, vector: np.ndarray):
+        position = self._positions.get(key)
+        if position is None:
+            position = len(self._keys)
+            if position == len(self._vectors):
+                grown = np.zeros((2 * len(self._vectors), self.dim), dtype=np.float32)
+                grown[:position] = self._vectors
+                self._vectors = grown
+            self._keys.append(key)
+            self._positions[key] = position
+        self._vectors[position] = vector
+
+    def remove(self, key: str):
+        position = self._positions.pop(key, None)
+        if position is None:
+            return
+        last_key = self._keys.pop()
+        if last_key != key:
+            self._vectors[position] = self._vectors[len(self._keys)]
+            self._keys[position] = last_key
+            self._positions[last_key] = position
+
+    def search(self, vector: np.ndarray, k: int = 1) -> List[Tuple[str, float]]:
+        count = len(self._keys)
+        if count == 0:
+            return []
+        similarities = self._vectors[:count] @ vector
+        k = min(k, count)
+        best = np.argpartition(-similarities, k - 1)[:k]
+        best = best[np.argsort(-similarities[best])]
+        return [(self._keys[index], float(similarities[index])) for index in best]
+
+
+class HNSWVectorIndex:
+    """
+    Approximate nearest-neighbour index backed by ``hnswlib``.
+
+    Lookups stay fast for caches too large to scan. Removed keys are marked
+    deleted and their slots reused.
+    """
+
+    def __init__(self, dim: int, capacity: int):
+        import hnswlib
+
+        self.dim = dim
+        self._index = hnswlib.Index(space="cosine", dim=dim)
+        self._index.init_index(max_elements=capacity, ef_construction=200, M=16, allow_replace_deleted=True)
+        self._index.set_ef(64)
+        self._capacity = capacity
+        self._labels: Dict[str, int] = {}
+        self._keys: Dict[int, str] = {}
+        self._next_label = 0
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def add(self, key: str, vector: np.ndarray):
+        self.remove(key)
+        if len(self._labels) >= self._capacity:
+            self._capacity *= 2
+            self._index.resize_index(self._capacity)
+        label = self._next_label
+        self._next_label += 1
+        self._index.add_items(vector[None, :], [label], replace_deleted=True)
+        self._labels[key] = label
+        self._keys[label] = key
+
+    def remove(self, key: str):
+        label = self._labels.pop(key, None)
+        if label is not None:
+            del self._keys[label]
+            self._index.mark_deleted(label)
+
+    def search(self, vector: np.ndarray, k: int = 1) -> List[Tuple[str, float]]:
+        k = min(k, len(self._labels))
+        if k == 0:
+            return []
+        labels, distances = self._index.knn_query(vector[None, :], k=k)
+        return [(self._keys[int(label)], 1.0 - float(distance))
+                for label, distance in zip(labels[0], distances[0]) if int(label) in self._keys]
+
+
+def create_vector_index(dim: int, kind: str = "auto", capacity: int = 1024):
+    """
+    Create a vector index.
+
+    Args:
+        dim: Vector dimension
+        kind: "numpy", "hnsw", or "auto" (HNSW for large caches when hnswlib is installed)
+        capacity: Expected number of entries
+
+    Returns:
+        NumpyVectorIndex or HNSWVectorIndex
+    """
+    if kind == "hnsw" or (kind == "auto" and capacity >= SEMANTIC_CACHE_CONFIG["hnsw_min_entries"]):
+        try:
+            return HNSWVectorIndex(dim, capacity)
+        except ImportError:
+            if kind == "hnsw":
+                logger.warning("hnswlib is not installed; using the brute-force vector index")
+    return NumpyVectorIndex(dim, min(capacity, 1024))
+
+
+class SemanticCache:
+    """
+    Cache keyed by the meaning of a query rather than its exact text.
+
+    Queries are embedded with Ollama and stored in a vector index, one per
+    context (e.g. the search engine or LLM model the value depends on). A
+    lookup returns the value of the most similar unexpired query in the same
+    context if the cosine similarity reaches ``threshold``. Exact repeats are
+    answered without embedding. Entries expire after their TTL, and the least
+    recently used are evicted beyond ``max_entries``. All methods are thread-safe.
+    """
+
+    # Query embeddings remembered between a missed lookup and the following store
+    _EMBEDDING_MEMO_SIZE = 256
+
+    def __init__(self, threshold: Optional[float] = None, ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None, index: Optional[str] = None, embedding_client=None):
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            ttl: Default time to live in seconds
+            max_entries: Maximum number of entries before the least recently used are evicted
+            index: Vector index kind: "numpy", "hnsw" or "auto"
+            embedding_client: Client with ``embed``/``aembed`` methods; defaults to an OllamaClient
+        """
+        self.threshold = threshold if threshold is not None else SEMANTIC_CACHE_CONFIG["threshold"]
+        self.ttl = ttl if ttl is not None else SEMANTIC_CACHE_CONFIG["search_ttl"]
+        self.max_entries = max_entries if max_entries is not None else SEMANTIC_CACHE_CONFIG["max_entries"]
+        self.index_kind = index or SEMANTIC_CACHE_CONFIG["index"]
+        self._embedding_client = embedding_client
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._indexes: Dict[str, Any] = {}
+        self._embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._embeddings_paused_until = 0.0
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _get_embedding_client(self):
+        if self._embedding_client is None:
+            from llm_clients import OllamaClient
+            self._embedding_client = OllamaClient()
+        return self._embedding_client
+
+    @staticmethod
+    def _key(query: str, context: str) -> str:
+        return f"{context}\x1f{_normalize_query(query)}"
+
+    def _remembered_embedding(self, query: str) -> Optional[np.ndarray]:
+        with self._lock:
+            return self._embeddings.get(_normalize_query(query))
+
+    def _remember_embedding(self, query: str, embeddings: Optional[List]) -> Optional[np.ndarray]:
+        if not embeddings:
+            # Don't slow every request down while the embedding model is unavailable
+            retry_after = SEMANTIC_CACHE_CONFIG["embedding_retry_after"]
+            self._embeddings_paused_until = time.monotonic() + retry_after
+            logger.warning("Semantic cache lookups paused for %gs", retry_after)
+            return None
+        vector = _unit(embeddings[0])
+        with self._lock:
+            self._embeddings[_normalize_query(query)] = vector
+            while len(self._embeddings) > self._EMBEDDING_MEMO_SIZE:
+                self._embeddings.popitem(last=False)
+        return vector
+
+    def _embed(self, query: str) -> Optional[np.ndarray]:
+        vector = self._remembered_embedding(query)
+        if vector is None and time.monotonic() >= self._embeddings_paused_until:
+            vector = self._remember_embedding(query, self._get_embedding_client().embed([query]))
+        return vector
+
+    async def _aembed(self, query: str) -> Optional[np.ndarray]:
+        vector = self._remembered_embedding(query)
+        if vector is None and time.monotonic() >= self._embeddings_paused_until:
+            vector = self._remember_embedding(query, await self._get_embedding_client().aembed([query]))
+        return vector
+
+    def _drop(self, key: str):
+        """Remove an entry and its vector. Caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry.context in self._indexes:
+            self._indexes[entry.context].remove(key)
+
+    def _exact(self, query: str, context: str) -> Optional[SemanticHit]:
+        key = self._key(query, context)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            self._stats["exact_hits"] += 1
+            return SemanticHit(entry.value, entry.query, 1.0)
+
+    def _nearest(self, vector: Optional[np.ndarray], context: str) -> Optional[SemanticHit]:
+        with self._lock:
+            index = self._indexes.get(context)
+            if vector is not None and index is not None and index.dim == len(vector):
+                now = time.time()
+                # A few neighbours, in case the closest ones have expired
+                for key, similarity in index.search(vector, k=4):
+                    if similarity < self.threshold:
+                        break
+                    entry = self._entries[key]
+                    if entry.expires_at <= now:
+                        self._drop(key)
+                        continue
+                    self._entries.move_to_end(key)
+                    self._stats["semantic_hits"] += 1
+                    return SemanticHit(entry.value, entry.query, similarity)
+            self._stats["misses"] += 1
+            return None
+
+    def lookup(self, query: str, context: str = "") -> Optional[SemanticHit]:
+        """
+        Find the cached value of the most similar query.
+
+        Args:
+            query: Query to look up
+            context: What the value depends on besides the query (engine, model, ...)
+
+        Returns:
+            SemanticHit (value, cached query, similarity), or None on a miss
+        """
+        hit = self._exact(query, context)
+        if hit is not None:
+            return hit
+        return self._nearest(self._embed(query), context)
+
+    async def alookup(self, query: str, context: str = "") -> Optional[SemanticHit]:
+        """Non-blocking counterpart of ``lookup``."""
+        hit = self._exact(query, context)
+        if hit is not None:
+            return hit
+        return self._nearest(await self._aembed(query), context)
+
+    def _store(self, query: str, value: Any, context: str, ttl: Optional[float], vector: Optional[np.ndarray]):
+        if vector is None:
+            return
+        key = self._key(query, context)
+        with self._lock:
+            index = self._indexes.get(context)
+            if index is None or index.dim != len(vector):
+                # New context, or the embedding model changed
+                for stale_key in [k for k, entry in self._entries.items() if entry.context == context]:
+                    del self._entries[stale_key]
+                index = self._indexes[context] = create_vector_index(len(vector), self.index_kind, self.max_entries)
+            index.add(key, vector)
+            self._entries[key] = _Entry(query, value, context, time.time() + (ttl if ttl is not None else self.ttl))
+            self._entries.move_to_end(key)
+            self._stats["writes"] += 1
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def store(self, query: str, value: Any, context: str = "", ttl: Optional[float] = None):
+        """
+        Cache a value for a query.
+
+        Args:
+            query: Query the value answers
+            value: Value to cache
+            context: What the value depends on besides the query (engine, model, ...)
+            ttl: Time to live in seconds; defaults to the cache's TTL
+        """
+        self._store(query, value, context, ttl, self._embed(query))
+
+    async def astore(self, query: str, value: Any, context: str = "", ttl: Optional[float] = None):
+        """Non-blocking counterpart of ``store``."""
+        self._store(query, value, context, ttl, await self._aembed(query))
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._indexes.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss statistics.
+
+        Returns:
+            Dict[str, Any]: Counters plus the current size and overall hit rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        hits = stats["exact_hits"] + stats["semantic_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
+
+
+_semantic_caches: Dict[str, SemanticCache] = {}
+_semantic_caches_lock = threading.Lock()
+
+
+def get_semantic_cache(name: str) -> Optional[SemanticCache]:
+    """
+    Get a process-wide semantic cache.
+
+    Args:
+        name: "search" for search results or "answers" for final agent answers
+
+    Returns:
+        SemanticCache configured from SEMANTIC_CACHE_CONFIG, or None if semantic caching is disabled
+    """
+    if not SEMANTIC_CACHE_CONFIG["enabled"]:
+        return None
+    with _semantic_caches_lock:
+        cache = _semantic_caches.get(name)
+        if cache is None:
+            ttl = SEMANTIC_CACHE_CONFIG["answer_ttl" if name == "answers" else "search_ttl"]
+            cache = _semantic_caches[name] = SemanticCache(ttl=ttl)
+        return cache
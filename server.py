@@ -0,0 +1,238 @@
+# server.py - HTTP API server for the search agent
+import asyncio
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from pydantic import BaseModel, Field
+from config import OPENAI_API_CONFIG, SERVER_CONFIG, TRACING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class SearchRequest(BaseModel):
+    """Request body for /search."""
+    query: str = Field(description="The search query to execute")
+    engine: str = Field(default="auto", description="Search engine to use, or 'auto'")
+    max_results: Optional[int] = Field(default=None, ge=1, description="Maximum number of results to return")
+
+
+class AskRequest(BaseModel):
+    """Request body for /ask."""
+    query: str = Field(description="The question to answer")
+    llm: str = Field(default=SERVER_CONFIG["default_llm"], description="LLM to use (ollama or openai)")
+    engine: str = Field(default="auto", description="Search engine to use, or 'auto'")
+    stream: bool = Field(default=False, description="Stream the answer as server-sent events")
+
+
+class AgentPool:
+    """
+    Builds one agent per (LLM, search engine) combination and shares it across requests.
+
+    Agents are stateless between runs, so a single warm instance (with its LLM
+    client, search tool and pooled engine) serves every concurrent request.
+    """
+
+    def __init__(self):
+        self._agents: Dict[Tuple[str, str], object] = {}
+        self._lock = threading.Lock()
+
+    def get(self, llm_type: str, search_engine: str):
+        """Get the shared agent for the combination, creating it on first use."""
+        key = (llm_type, search_engine)
+        agent = self._agents.get(key)
+        if agent is not None:
+            return agent
+
+        with self._lock:
+            agent = self._agents.get(key)
+            if agent is None:
+                from agent import create_search_agent
+                agent = create_search_agent(llm_type=llm_type, search_engine=search_engine, verbose=False)
+                self._agents[key] = agent
+            return agent
+
+
+class ConcurrencyLimiter:
+    """Caps the number of requests in progress; excess requests wait up to ``queue_timeout`` seconds."""
+
+    def __init__(self, max_concurrency: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def acquire(self) -> bool:
+        """Wait for a free slot; returns False if none freed up within the queue timeout."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def release(self):
+        self._semaphore.release()
+
+    def releaser(self) -> Callable[[], None]:
+        """Get a function that releases one slot the first time it is called and does nothing after."""
+        released = False
+
+        def release_once():
+            nonlocal released
+            if not released:
+                released = True
+                self.release()
+
+        return release_once
+
+
+def _sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Encode one server-sent event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def create_app(agent_pool: Optional[AgentPool] = None, max_concurrency: Optional[int] = None,
+               queue_timeout: Optional[float] = None):
+    """
+    Create the ASGI application.
+
+    Args:
+        agent_pool: Pool of warm agents; a new one is created by default
+        max_concurrency: Maximum number of requests processed at the same time
+        queue_timeout: Seconds a request waits for a free slot before getting a 503
+
+    Returns:
+        FastAPI: The application
+    """
+    from fastapi import FastAPI, HTTPException
+    from fastapi.responses import PlainTextResponse, StreamingResponse
+    from langchain_tools import asearch_with_failover
+    from search_engines import EngineUnavailableError, invalidate_search_engines
+    from tracing import get_metrics
+
+    class SlotStreamingResponse(StreamingResponse):
+        """
+        Streaming response that frees its concurrency slot however the request ends.
+
+        The stream's own ``finally`` never runs if the client disconnects before
+        the first chunk is pulled, so the response releases the slot as well.
+        """
+
+        def __init__(self, content, release: Callable[[], None], **kwargs):
+            super().__init__(content, **kwargs)
+            self.release = release
+
+        async def __call__(self, scope, receive, send):
+            try:
+                await super().__call__(scope, receive, send)
+            finally:
+                self.release()
+
+    agent_pool = agent_pool or AgentPool()
+    limiter = ConcurrencyLimiter(
+        max_concurrency or SERVER_CONFIG["max_concurrency"],
+        queue_timeout if queue_timeout is not None else SERVER_CONFIG["queue_timeout"]
+    )
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # Build the default agent up front so the first request doesn't pay for it
+        if SERVER_CONFIG["warm_up"]:
+            try:
+                await asyncio.to_thread(agent_pool.get, SERVER_CONFIG["default_llm"], "auto")
+            except Exception as e:
+                logger.warning("Failed to warm up the default agent: %s", e)
+        yield
+        # Close pooled engine sessions
+        invalidate_search_engines()
+
+    app = FastAPI(title="Ollama Search Agent", lifespan=lifespan)
+
+    async def acquire_slot():
+        if not await limiter.acquire():
+            raise HTTPException(status_code=503, detail="Server is at its concurrency limit, try again later")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/metrics")
+    async def metrics():
+        # Served outside the concurrency limit so scrapes work under load
+        if not TRACING_CONFIG["metrics_enabled"]:
+            raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=false)")
+        return PlainTextResponse(get_metrics().render(), media_type="text/plain; version=0.0.4")
+
+    @app.post("/search")
+    async def search(request: SearchRequest):
+        await acquire_slot()
+        try:
+            try:
+                results, engine_name = await asearch_with_failover(request.query, request.engine)
+            except EngineUnavailableError as e:
+                # Every engine is rate limited or out of quota
+                headers = {"Retry-After": str(int(e.retry_after) + 1)} if e.retry_after is not None else None
+                raise HTTPException(status_code=503, detail=str(e), headers=headers)
+            except (ValueError, RuntimeError) as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if request.max_results is not None:
+                results = results[:request.max_results]
+            return {"query": request.query, "engine": engine_name, "results": [result.to_dict() for result in results]}
+        finally:
+            limiter.release()
+
+    @app.post("/ask")
+    async def ask(request: AskRequest):
+        if request.llm == "openai" and not OPENAI_API_CONFIG["api_key"]:
+            raise HTTPException(status_code=400, detail="OPENAI_API_KEY is not configured")
+
+        await acquire_slot()
+        try:
+            agent = await asyncio.to_thread(agent_pool.get, request.llm, request.engine)
+        except Exception as e:
+            limiter.release()
+            raise HTTPException(status_code=400, detail=f"Error creating agent: {e}")
+
+        if not request.stream:
+            try:
+                answer = await agent.arun(request.query, raise_errors=True)
+            except Exception as e:
+                raise HTTPException(status_code=502, detail=f"Agent execution failed: {e}")
+            finally:
+                limiter.release()
+            return {"query": request.query, "answer": answer}
+
+        release = limiter.releaser()
+
+        async def event_stream():
+            # The slot stays taken until the whole answer has been streamed
+            try:
+                async for token in agent.astream(request.query):
+                    yield _sse_event({"token": token})
+                yield _sse_event({}, event="done")
+            finally:
+                release()
+
+        return SlotStreamingResponse(event_stream(), release, media_type="text/event-stream")
+
+    return app
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None):
+    """Run the API server in this process."""
+    import uvicorn
+    uvicorn.run(
+        create_app(),
+        host=host or SERVER_CONFIG["host"],
+        port=port or SERVER_CONFIG["port"]
+    )
+
+
+if __name__ == "__main__":
+    from logging_setup import setup_logging
+    setup_logging()
+    serve()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for LangChainSearchAgent using a scripted LLM
+"""
+
+import asyncio
+import sys
+import os
+from typing import List
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from langchain_core.language_models.llms import LLM
+from agent import LangChainSearchAgent, FinalAnswerStreamHandler
+from langchain_tools import SearchTool
+from config import ANSWER_CACHE_CONFIG
+
+# Scripted answers must not be served from, or written to, the answer cache
+ANSWER_CACHE_CONFIG["enabled"] = False
+
+
+class ScriptedLLM(LLM):
+    """LLM that replays canned ReAct responses and emits them word by word."""
+
+    responses: List[str]
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        text = self.responses[self.calls % len(self.responses)]
+        self.calls += 1
+        if run_manager:
+            for word in text.split(" "):
+                run_manager.on_llm_new_token(word + " ")
+        return text
+
+
+REACT_RESPONSES = [
+    "Thought: Do I need to use a tool? Yes\nAction: web_search\nAction Input: sky color",
+    "Thought: Do I need to use a tool? No\nFinal Answer: The sky is blue.",
+]
+
+
+def create_test_agent(responses: List[str] = REACT_RESPONSES) -> LangChainSearchAgent:
+    llm = ScriptedLLM(responses=responses)
+    return LangChainSearchAgent(llm, tools=[SearchTool(default_engine="placeholder")])
+
+
+def test_final_answer_handler_skips_reasoning():
+    """Only tokens after the 'Final Answer:' marker should be emitted."""
+    tokens = []
+    handler = FinalAnswerStreamHandler(tokens.append)
+    handler.on_llm_start()
+    for token in ["Thought: no tool\nFinal", " Answer:", " Hello", " world"]:
+        handler.on_llm_new_token(token)
+    assert "".join(tokens) == "Hello world"
+
+
+def test_stream_yields_answer_tokens():
+    """stream() and astream() should yield the final answer incrementally."""
+    agent = create_test_agent()
+    tokens = list(agent.stream("why is the sky blue?"))
+    assert len(tokens) > 1
+    assert "".join(tokens).strip() == "The sky is blue."
+
+    async def collect():
+        return [token async for token in create_test_agent().astream("why is the sky blue?")]
+
+    assert "".join(asyncio.run(collect())).strip() == "The sky is blue."
+
+
+def test_run_batch_keeps_input_order():
+    """run_batch should return answers in input order while running queries concurrently."""
+    agent = create_test_agent(["Thought: Do I need to use a tool? No\nFinal Answer: done"])
+    agent.agent_executor.verbose = False
+    queries = [f"query {i}" for i in range(6)]
+
+    answers = agent.run_batch(queries, concurrency=3)
+    assert answers == ["done"] * len(queries)
+
+    completed = sorted(index for index, _, _ in agent.iter_batch(iter(queries), concurrency=2))
+    assert completed == list(range(len(queries)))
+
+
+if __name__ == "__main__":
+    test_final_answer_handler_skips_reasoning()
+    test_stream_yields_answer_tokens()
+    test_run_batch_keeps_input_order()
+    print("=== Agent Tests Complete ===")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for the final answer cache
+"""
+
+import asyncio
+import time
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import agent as agent_module
+from langchain_core.agents import AgentAction
+from config import ANSWER_CACHE_CONFIG
+from search_engines import TieredCache
+from test_agent import create_test_agent
+
+DIRECT_ANSWER = ["Thought: Do I need to use a tool? No\nFinal Answer: cached answer"]
+
+
+class AnswerCacheEnabled:
+    """Enables a fresh memory-only answer cache for the duration of a test."""
+
+    def __init__(self, ttl: float = 60, stale_ttl: float = 60):
+        self.settings = {"enabled": True, "ttl": ttl, "stale_ttl": stale_ttl}
+
+    def __enter__(self):
+        self.saved = {key: ANSWER_CACHE_CONFIG[key] for key in self.settings}
+        ANSWER_CACHE_CONFIG.update(self.settings)
+        agent_module._answer_cache = TieredCache(path=None)
+        return agent_module._answer_cache
+
+    def __exit__(self, *exc_info):
+        ANSWER_CACHE_CONFIG.update(self.saved)
+        agent_module._answer_cache = None
+
+
+def make_agent(cache_context: str = "ollama:llama3|placeholder"):
+    agent = create_test_agent(DIRECT_ANSWER)
+    agent.agent_executor.verbose = False
+    agent.cache_context = cache_context
+    return agent
+
+
+def test_fresh_answer_skips_agent():
+    """A repeated query should be answered from the cache without calling the LLM."""
+    with AnswerCacheEnabled():
+        agent = make_agent()
+        assert agent.run("What is  the answer?") == "cached answer"
+        calls = agent.llm_client.calls
+        assert agent.run("what is the answer?") == "cached answer"
+        assert asyncio.run(agent.arun("What is the answer?")) == "cached answer"
+        assert list(agent.stream("what is the answer?")) == ["cached answer"]
+        assert agent.llm_client.calls == calls
+
+
+def test_cache_is_keyed_by_context():
+    """Another model or engine should not reuse the answer."""
+    with AnswerCacheEnabled():
+        make_agent("ollama:llama3|placeholder").run("question")
+        other = make_agent("openai:gpt-4|placeholder")
+        other.run("question")
+        assert other.llm_client.calls > 0
+
+
+def test_stale_answer_is_served_and_refreshed():
+    """A stale answer should be returned at once while a background run refreshes it."""
+    with AnswerCacheEnabled(ttl=0.05) as cache:
+        agent = make_agent()
+        agent.run("popular question")
+        key = agent._answer_key("popular question")
+        cache.set(key, "old answer", 60)
+        time.sleep(0.1)
+
+        calls = agent.llm_client.calls
+        assert agent.run("popular question") == "old answer"
+        deadline = time.monotonic() + 5
+        while cache.get(key) == "old answer" and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert cache.get(key) == "cached answer"
+        assert agent.llm_client.calls > calls
+
+        # The async path refreshes with a task on the running loop
+        cache.set(key, "old answer", 60)
+        time.sleep(0.1)
+
+        async def ask_and_wait():
+            answer = await agent.arun("popular question")
+            await asyncio.gather(*agent._refresh_tasks)
+            return answer
+
+        assert asyncio.run(ask_and_wait()) == "old answer"
+        assert cache.get(key) == "cached answer"
+
+
+def test_failures_are_not_cached():
+    """Limit stops and answers written after every search failed should not be cached."""
+    with AnswerCacheEnabled() as cache:
+        agent = make_agent()
+        agent.run("question")
+        assert cache.get(agent._answer_key("question")) == "cached answer"
+
+    search_step = [(AgentAction("web_search", "q", ""), "Search results for 'q':\n1. ...")]
+    failed_step = [(AgentAction("web_search", "q", ""), "Search failed: engine offline")]
+    assert agent_module.is_cacheable_result({"output": "answer", "intermediate_steps": search_step})
+    assert agent_module.is_cacheable_result({"output": "answer", "intermediate_steps": []})
+    assert not agent_module.is_cacheable_result({"output": "answer", "intermediate_steps": failed_step})
+    assert not agent_module.is_cacheable_result({"output": agent_module.AGENT_STOPPED_OUTPUT,
+                                                 "intermediate_steps": search_step})
+
+    with AnswerCacheEnabled() as cache:
+        agent = make_agent()
+        agent.agent_executor.max_iterations = 1
+        agent.llm_client.responses = ["Thought: Do I need to use a tool? Yes\nAction: web_search\nAction Input: q"]
+        assert agent.run("endless") == agent_module.AGENT_STOPPED_OUTPUT
+        assert cache.get(agent._answer_key("endless")) is None
+
+
+def test_one_refresh_per_query():
+    """Concurrent stale hits should start a single refresh."""
+    with AnswerCacheEnabled(ttl=0) as cache:
+        agent = make_agent()
+        cache.set(agent._answer_key("busy"), "old answer", 60)
+        assert agent._claim_refresh("busy")
+        calls = agent.llm_client.calls
+        assert agent.run("busy") == "old answer"
+        assert agent.llm_client.calls == calls
+        agent._release_refresh("busy")
+
+
+if __name__ == "__main__":
+    test_fresh_answer_skips_agent()
+    test_cache_is_keyed_by_context()
+    test_stale_answer_is_served_and_refreshed()
+    test_failures_are_not_cached()
+    test_one_refresh_per_query()
+    print("=== Answer Cache Tests Complete ===")
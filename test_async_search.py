@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for the asynchronous search interface
+"""
+
+import asyncio
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import httpx
+
+from config import SEARCH_ENGINES
+from search_engines import BaseSearch, create_search_engine, resilience
+from search_engines.brave_search import BraveSearch
+from search_engines.fanout_search import FanoutSearch
+from search_engines.hedged_search import HedgedSearch
+from langchain_tools import SearchTool
+
+
+class SlowSyncSearch(BaseSearch):
+    """Blocking engine without a native async implementation."""
+
+    def search(self, query: str):
+        import time
+        time.sleep(0.2)
+        return [{"title": query, "link": "http://example.com", "snippet": query}]
+
+
+def test_placeholder_asearch():
+    """Placeholder engine should return the same results asynchronously."""
+    placeholder = create_search_engine("placeholder")
+    results = asyncio.run(placeholder.asearch("async query"))
+    assert results == placeholder.search("async query")
+
+
+def test_default_asearch_overlaps_blocking_engines():
+    """The thread-offloaded default must let blocking searches run concurrently."""
+    engine = SlowSyncSearch()
+
+    async def run_many():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await asyncio.gather(*(engine.asearch(f"q{i}") for i in range(5)))
+        return results, loop.time() - started
+
+    results, elapsed = asyncio.run(run_many())
+    assert [r[0]["title"] for r in results] == [f"q{i}" for i in range(5)]
+    assert elapsed < 0.2 * 5
+
+
+def test_search_tool_arun():
+    """SearchTool should support LangChain's async tool execution."""
+    tool = SearchTool()
+    output = asyncio.run(tool.ainvoke({"query": "async tool", "engine": "placeholder"}))
+    assert "Placeholder Result 1" in output
+
+
+def test_asearch_accepts_options():
+    """Every engine's asearch should accept the keyword options BaseSearch.asearch does."""
+    placeholder = create_search_engine("placeholder")
+    for engine in (placeholder, FanoutSearch(engines=["placeholder"]),
+                   HedgedSearch(primary="placeholder", secondary="placeholder")):
+        assert asyncio.run(engine.asearch("options", num_results=5))
+        assert engine.search("options", num_results=5)
+        engine.close()
+
+
+def test_brave_asearch_non_json_body():
+    """A non-JSON Brave response should be logged and return no results, like the blocking path."""
+    saved_key = SEARCH_ENGINES["brave"].get("api_key")
+    SEARCH_ENGINES["brave"]["api_key"] = "test-key"
+    try:
+        engine = BraveSearch()
+        engine._async_clients.client_kwargs["transport"] = httpx.MockTransport(
+            lambda request: httpx.Response(200, text="<html>maintenance</html>")
+        )
+        assert asyncio.run(engine.asearch("query", num_results=5)) == []
+        engine.close()
+    finally:
+        SEARCH_ENGINES["brave"]["api_key"] = saved_key
+        resilience._circuit_breakers.pop("brave", None)
+
+
+def test_close_releases_async_clients():
+    """Closing an engine should close the async clients it pooled, on every loop."""
+    saved_key = SEARCH_ENGINES["brave"].get("api_key")
+    SEARCH_ENGINES["brave"]["api_key"] = "test-key"
+    try:
+        engine = BraveSearch()
+
+        async def open_client():
+            return engine._async_clients.get()
+
+        # A client whose loop is still open but not running
+        idle_loop = asyncio.new_event_loop()
+        idle_client = idle_loop.run_until_complete(open_client())
+
+        # A client used from inside a running loop that closes the engine itself
+        async def close_inside_loop():
+            client = engine._async_clients.get()
+            engine.close()
+            await asyncio.sleep(0)
+            return client
+
+        running_client = asyncio.run(close_inside_loop())
+        assert idle_client.is_closed and running_client.is_closed
+        idle_loop.close()
+    finally:
+        SEARCH_ENGINES["brave"]["api_key"] = saved_key
+
+
+if __name__ == "__main__":
+    test_placeholder_asearch()
+    test_default_asearch_overlaps_blocking_engines()
+    test_search_tool_arun()
+    test_asearch_accepts_options()
+    test_brave_asearch_non_json_body()
+    test_close_releases_async_clients()
+    print("=== Async Search Tests Complete ===")
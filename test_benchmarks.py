@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the offline benchmark harness
+"""
+
+import json
+import sys
+import os
+import tempfile
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import requests
+from benchmarks.mock_services import LatencyProfile, MockServices
+from benchmarks.run import benchmark_environment, compare, main, parse_args, percentile, run_scenario
+from config import OLLAMA_CONFIG, SEARCH_CACHE_CONFIG, SEARCH_ENGINES, SEARCH_RATE_LIMIT_CONFIG
+
+
+def fast_services(error_rate=0.0):
+    def profile():
+        return LatencyProfile(median=0.001, jitter=0, error_rate=error_rate, seed=1)
+    return MockServices(google=profile(), brave=profile(), ollama=profile())
+
+
+def test_mock_google_api():
+    """The Google stand-in should honour num and start like the real API."""
+    with fast_services() as services:
+        response = requests.get(services.google_url, params={"q": "mock test", "num": 3, "start": 11}, timeout=5)
+    items = response.json()["items"]
+    assert response.status_code == 200
+    assert len(items) == 3
+    assert items[0]["link"] == "https://site3.example.com/mock-test/11"
+    assert services.request_counts["google"] == 1
+
+
+def test_environment_is_restored():
+    """Config changed for a run should be restored afterwards."""
+    saved_google = dict(SEARCH_ENGINES["custom_google"])
+    saved_host = OLLAMA_CONFIG["host"]
+    saved_cache = SEARCH_CACHE_CONFIG["enabled"]
+    saved_limits = dict(SEARCH_RATE_LIMIT_CONFIG)
+    with fast_services() as services, benchmark_environment(services):
+        assert SEARCH_ENGINES["custom_google"]["base_url"] == services.google_url
+        assert OLLAMA_CONFIG["host"] == services.ollama_url
+        assert SEARCH_CACHE_CONFIG["enabled"] is False
+        assert SEARCH_RATE_LIMIT_CONFIG["enabled"] is False
+    assert SEARCH_ENGINES["custom_google"] == saved_google
+    assert OLLAMA_CONFIG["host"] == saved_host
+    assert SEARCH_CACHE_CONFIG["enabled"] == saved_cache
+    assert SEARCH_RATE_LIMIT_CONFIG == saved_limits
+
+
+def test_scenarios_against_mocks():
+    """Every scenario should complete against the stand-ins and report its backend traffic."""
+    args = parse_args(["--requests", "6", "--concurrency", "3", "--warmup", "0", "--trace-memory"])
+    with fast_services() as services, benchmark_environment(services):
+        results = {name: run_scenario(name, services, args) for name in args.scenarios}
+
+    for name, summary in results.items():
+        assert summary["requests"] == 6 and summary["errors"] == 0, (name, summary)
+        assert summary["latency_p50_ms"] <= summary["latency_p95_ms"] <= summary["latency_p99_ms"]
+        assert summary["throughput_rps"] > 0
+        assert summary["python_peak_mb"] > 0
+    assert results["google_wrapper"]["backend_requests"] == {"google": 6}
+    assert results["brave"]["backend_requests"] == {"brave": 6}
+    # One search and two LLM calls (search, then answer) per agent run
+    assert results["agent"]["backend_requests"] == {"google": 6, "ollama": 12}
+
+
+def test_injected_errors_are_counted():
+    """Failed requests should show up in the error rate."""
+    args = parse_args(["--requests", "5", "--concurrency", "1", "--warmup", "0", "--retry-delay", "0.001"])
+    with fast_services(error_rate=1.0) as services, benchmark_environment(services):
+        summary = run_scenario("google_wrapper", services, args)
+    assert summary["errors"] == 5
+    assert summary["error_rate"] == 1.0
+
+
+def test_regression_comparison():
+    """Slower or heavier results beyond the threshold should be flagged."""
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([], 99) is None
+
+    baseline = {"scenarios": {"search_tool": {"throughput_rps": 100.0, "latency_p50_ms": 10.0,
+                                              "latency_p95_ms": 20.0, "python_peak_mb": None}}}
+    current = {"scenarios": {"search_tool": {"throughput_rps": 95.0, "latency_p50_ms": 12.0,
+                                             "latency_p95_ms": 19.0, "python_peak_mb": 3.0}}}
+    rows = {row["metric"]: row for row in compare(current, baseline, threshold=0.1)}
+    assert set(rows) == {"throughput_rps", "latency_p50_ms", "latency_p95_ms"}
+    assert not rows["throughput_rps"]["regressed"]
+    assert rows["latency_p50_ms"]["regressed"]
+    assert not rows["latency_p95_ms"]["regressed"]
+
+
+def test_cli_writes_results_and_compares():
+    """The CLI should save its results and fail when they regress against a baseline."""
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "results.json")
+        argv = ["--scenarios", "brave", "--requests", "4", "--warmup", "0", "--brave-latency", "0.001",
+                "--jitter", "0", "--output", output]
+        assert main(argv) == 0
+        with open(output, encoding="utf-8") as f:
+            results = json.load(f)
+        assert results["scenarios"]["brave"]["requests"] == 4
+        assert results["meta"]["profiles"]["brave"]["median"] == 0.001
+
+        # A baseline that was far faster makes this run a regression
+        results["scenarios"]["brave"]["throughput_rps"] *= 100
+        baseline = os.path.join(directory, "baseline.json")
+        with open(baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f)
+        assert main(argv + ["--baseline", baseline]) == 1
+
+
+if __name__ == "__main__":
+    test_mock_google_api()
+    test_environment_is_restored()
+    test_scenarios_against_mocks()
+    test_injected_errors_are_counted()
+    test_regression_comparison()
+    test_cli_writes_results_and_compares()
+    print("=== Benchmark Tests Complete ===")
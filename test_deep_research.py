@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test script for the deep research pipeline
+"""
+
+import asyncio
+import time
+import sys
+import os
+from typing import List
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+
+import deep_research
+from deep_research import DeepResearcher, EvidenceStore, ResearchBudget
+from langchain_tools import asearch_with_failover
+from search_engines import SearchResult
+
+SUB_QUESTIONS = ["battery chemistry", "battery cost", "battery recycling"]
+
+
+class ResearchLLM(LLM):
+    """LLM that answers each deep research prompt by its kind and streams word by word."""
+
+    calls: int = 0
+    follow_up: str = "DONE"
+
+    @property
+    def _llm_type(self) -> str:
+        return "research"
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        if prompt.startswith("You are planning"):
+            return "1. " + "\n2. ".join(SUB_QUESTIONS)
+        if prompt.startswith("You are researching"):
+            return self.follow_up
+        if prompt.startswith("Write concise research notes"):
+            return "Notes citing [1] and [2]."
+        return "Batteries are improving [1][2][3][4]."
+
+    def _stream(self, prompt, stop=None, run_manager=None, **kwargs):
+        for word in self._call(prompt, stop).split(" "):
+            yield GenerationChunk(text=word + " ")
+
+
+class FakeSearch:
+    """Search that takes a fixed time and returns one page shared by every query plus one of its own."""
+
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self.queries: List[str] = []
+
+    async def __call__(self, query: str, engine: str = "auto"):
+        self.queries.append(query)
+        await asyncio.sleep(self.delay)
+        slug = query.replace(" ", "-")
+        return [
+            SearchResult("Battery overview", "https://www.example.com/batteries/", "Shared page", engine="fake"),
+            SearchResult(f"About {query}", f"https://example.com/{slug}", f"Page about {query}", engine="fake"),
+        ], "fake"
+
+
+def run_with_search(search, test):
+    deep_research.asearch_with_failover = search
+    try:
+        return test()
+    finally:
+        deep_research.asearch_with_failover = asearch_with_failover
+
+
+def make_researcher(llm, **kwargs):
+    settings = {"search_engine": "fake", "max_workers": 4, "max_llm_calls": 20, "max_searches": 16,
+                "max_rounds": 2, "pages_per_question": 0, "verbose": False}
+    settings.update(kwargs)
+    return DeepResearcher(llm, **settings)
+
+
+def test_budget():
+    """The budget should refuse units once they are used up."""
+    budget = ResearchBudget(llm_calls=1, searches=0)
+    assert budget.take("llm_calls")
+    assert not budget.take("llm_calls")
+    assert not budget.take("searches")
+    assert budget.remaining() == {"llm_calls": 0, "searches": 0}
+
+
+def test_evidence_is_deduplicated():
+    """The same page found by two workers should keep one citation number."""
+    store = EvidenceStore()
+    first = store.add([SearchResult("A", "https://example.com/a", "")], "q1")
+    second = store.add([SearchResult("A", "http://www.example.com/a/", ""),
+                        SearchResult("B", "https://example.com/b", "")], "q2")
+    assert second[0] is first[0]
+    assert [item.number for item in store.all()] == [1, 2]
+    assert store.all()[0].sub_question == "q1"
+
+
+def test_sub_questions_run_in_parallel():
+    """Sub-questions should be researched at the same time and their sources merged."""
+    llm = ResearchLLM()
+    search = FakeSearch()
+    researcher = make_researcher(llm)
+
+    def research():
+        start = time.monotonic()
+        report = asyncio.run(researcher.arun("How are batteries developing?"))
+        return report, time.monotonic() - start
+
+    report, elapsed = run_with_search(search, research)
+    assert sorted(search.queries) == sorted(SUB_QUESTIONS)
+    # Three 0.2s searches at once, not one after another
+    assert elapsed < 0.5
+    # Plan, one reflection and one set of notes per sub-question, and the report
+    assert llm.calls == 1 + 2 * len(SUB_QUESTIONS) + 1
+    assert report.startswith("Batteries are improving [1][2][3][4].")
+    # The page every search found is one source; each sub-question adds one more
+    assert report.count("https://www.example.com/batteries/") == 1
+    assert report.count("\n[") == 4
+
+
+def test_budget_limits_work():
+    """Workers should stop searching and asking the LLM once the shared budget is used up."""
+    llm = ResearchLLM(follow_up="more battery details")
+    search = FakeSearch(delay=0)
+    researcher = make_researcher(llm, max_llm_calls=4, max_searches=4, max_rounds=3)
+    report = run_with_search(search, lambda: researcher.run("How are batteries developing?"))
+    assert len(search.queries) == 4
+    assert llm.calls == 4
+    # The report call is always kept back
+    assert report.startswith("Batteries are improving")
+
+
+def test_report_is_streamed():
+    """stream should yield the report piece by piece, ending with the sources."""
+    llm = ResearchLLM()
+    researcher = make_researcher(llm, max_workers=1)
+    tokens = run_with_search(FakeSearch(delay=0), lambda: list(researcher.stream("How are batteries developing?")))
+    assert len(tokens) > 2
+    assert tokens[-1].startswith("\n\nSources:\n[1] ")
+
+
+def test_failed_searches_keep_other_findings():
+    """A sub-question whose search fails should not sink the rest of the report."""
+    search = FakeSearch(delay=0)
+
+    async def flaky_search(query: str, engine: str = "auto"):
+        if query == "battery cost":
+            raise RuntimeError("all engines failed")
+        return await search(query, engine)
+
+    researcher = make_researcher(ResearchLLM(), max_rounds=1)
+    report = run_with_search(flaky_search, lambda: researcher.run("How are batteries developing?"))
+    assert "Batteries are improving" in report
+    assert "battery-chemistry" in report and "battery-recycling" in report
+    assert "battery-cost" not in report
+
+
+if __name__ == "__main__":
+    test_budget()
+    test_evidence_is_deduplicated()
+    test_sub_questions_run_in_parallel()
+    test_budget_limits_work()
+    test_report_is_streamed()
+    test_failed_searches_keep_other_findings()
+    print("=== Deep Research Tests Complete ===")
@@ -5,6 +5,8 @@ Test script for Search Engine Factory
 
 import sys
 import os
+import threading
+import time
 
 # Add the current directory to Python path
 sys.path.insert(0, os.path.dirname(__file__))
@@ -15,7 +17,9 @@ from search_engines import (
     get_default_search_engine,
     list_available_engines,
     check_engine_availability,
-    get_engine_info
+    get_engine_info,
+    get_search_engine,
+    invalidate_search_engines
 )
 
 
@@ -125,6 +129,128 @@ def test_dynamic_registration():
     print("\n=== Dynamic Registration Test Complete ===")
 
 
+def test_instance_pool():
+    """Test that pooled engine instances are reused until invalidated."""
+    print("\n=== Instance Pool Test ===\n")
+    
+    first = get_search_engine("placeholder")
+    assert get_search_engine("placeholder") is first
+    assert get_search_engine("PLACEHOLDER") is first
+    print("✓ Pooled placeholder instance is reused")
+    
+    # Factory.create still hands out fresh instances
+    assert create_search_engine("placeholder") is not first
+    
+    invalidate_search_engines("placeholder")
+    assert get_search_engine("placeholder") is not first
+    print("✓ Invalidation drops the pooled instance")
+    
+    print("\n=== Instance Pool Test Complete ===")
+
+
+def test_availability_memoization():
+    """Test that availability is cached and recomputed when config changes."""
+    print("\n=== Availability Memoization Test ===\n")
+    from config import SEARCH_ENGINES
+    
+    original_key = SEARCH_ENGINES["brave"]["api_key"]
+    try:
+        SEARCH_ENGINES["brave"]["api_key"] = None
+        assert not SearchEngineFactory.is_engine_available("brave")
+        
+        calls = []
+        original_descriptor = SearchEngineFactory.__dict__["get_engine_config_status"]
+        original_status = SearchEngineFactory.get_engine_config_status
+        SearchEngineFactory.get_engine_config_status = classmethod(
+            lambda cls, name: calls.append(name) or original_status(name)
+        )
+        try:
+            SearchEngineFactory.is_engine_available("brave")
+            assert calls == [], "availability should be served from the cache"
+            
+            SEARCH_ENGINES["brave"]["api_key"] = "test-key"
+            assert SearchEngineFactory.is_engine_available("brave")
+            assert calls == ["brave"], "a config change should trigger a recompute"
+        finally:
+            SearchEngineFactory.get_engine_config_status = original_descriptor
+        print("✓ Availability is memoized until the configuration changes")
+    finally:
+        SEARCH_ENGINES["brave"]["api_key"] = original_key
+        SearchEngineFactory.invalidate_availability()
+    
+    print("\n=== Availability Memoization Test Complete ===")
+
+
+def test_lazy_discovery():
+    """Test that listing engines does not import heavy engine dependencies."""
+    print("\n=== Lazy Discovery Test ===\n")
+    import subprocess
+    
+    script = (
+        "import sys\n"
+        "from search_engines import list_available_engines, check_engine_availability\n"
+        "engines = list_available_engines()\n"
+        "assert {'google', 'bing', 'customgoogle', 'brave'} <= set(engines), engines\n"
+        "[check_engine_availability(engine) for engine in engines]\n"
+        "heavy = [m for m in ('langchain_community', 'langchain_google_community', 'googleapiclient') if m in sys.modules]\n"
+        "assert not heavy, heavy\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True
+    )
+    assert result.returncode == 0, result.stderr
+    print("✓ Engines listed without importing heavy dependencies")
+    
+    # Config status now follows the manifest's config section
+    assert set(check_engine_availability("customgoogle")) == {"api_key", "cse_id"}
+    
+    print("\n=== Lazy Discovery Test Complete ===")
+
+
+def test_concurrent_discovery():
+    """Test that threads racing the first lookup wait for discovery to finish."""
+    print("\n=== Concurrent Discovery Test ===\n")
+    saved = (dict(SearchEngineFactory._engines), SearchEngineFactory._discovered)
+    real_listdir = os.listdir
+
+    def slow_listdir(path):
+        time.sleep(0.2)
+        return real_listdir(path)
+
+    SearchEngineFactory._engines = {}
+    SearchEngineFactory._discovered = False
+    os.listdir = slow_listdir
+    try:
+        returned_after = []
+        started = time.monotonic()
+
+        def look_up():
+            engines = SearchEngineFactory.get_available_engines()
+            returned_after.append((time.monotonic() - started, len(engines)))
+
+        threads = [threading.Thread(target=look_up) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        os.listdir = real_listdir
+        SearchEngineFactory._engines, SearchEngineFactory._discovered = saved
+
+    assert all(elapsed >= 0.15 for elapsed, _ in returned_after), returned_after
+    assert len({count for _, count in returned_after}) == 1
+    print("✓ No thread saw a half-populated engine list")
+
+    print("\n=== Concurrent Discovery Test Complete ===")
+
+
 if __name__ == "__main__":
     test_factory_functionality()
     test_dynamic_registration()
+    test_instance_pool()
+    test_availability_memoization()
+    test_lazy_discovery()
+    test_concurrent_discovery()
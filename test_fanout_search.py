@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for fan-out search and result merging
+"""
+
+import asyncio
+import time
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from search_engines import (
+    BaseSearch,
+    FanoutSearch,
+    SearchEngineFactory,
+    normalize_url,
+    reciprocal_rank_fusion,
+    register_search_engine
+)
+
+
+class FastSearch(BaseSearch):
+    def search(self, query: str):
+        return [
+            {"title": "Shared", "link": "https://www.example.com/shared/?utm_source=x", "snippet": "short"},
+            {"title": "Fast only", "link": "https://fast.example.com/", "snippet": "fast"},
+        ]
+
+
+class OtherSearch(BaseSearch):
+    def search(self, query: str):
+        return [
+            {"title": "Other only", "link": "https://other.example.com/", "snippet": "other"},
+            {"title": "Shared", "link": "http://example.com/shared#top", "snippet": "a longer snippet"},
+        ]
+
+
+class SlowSearch(BaseSearch):
+    def search(self, query: str):
+        time.sleep(1.0)
+        return [{"title": "Too late", "link": "https://slow.example.com/", "snippet": "slow"}]
+
+
+for name, class_name in (("fast_test", "FastSearch"), ("other_test", "OtherSearch"), ("slow_test", "SlowSearch")):
+    register_search_engine(name, "test_fanout_search", class_name)
+
+
+def test_normalize_url():
+    """Equivalent URLs should normalize to the same key."""
+    assert normalize_url("https://www.Example.com/a/?b=2&a=1&utm_medium=x#frag") == \
+        normalize_url("http://example.com/a?a=1&b=2")
+    assert normalize_url("https://example.com/a") != normalize_url("https://example.com/b")
+    assert normalize_url(None) == ""
+
+
+def test_reciprocal_rank_fusion_deduplicates():
+    """Results found by several engines should be merged and ranked first."""
+    merged = reciprocal_rank_fusion({
+        "fast": FastSearch().search("q"),
+        "other": OtherSearch().search("q"),
+    })
+    titles = [result["title"] for result in merged]
+    assert titles[0] == "Shared"
+    assert len(merged) == 3
+    assert merged[0].engines == ("fast", "other")
+    assert [result.rank for result in merged] == [1, 2, 3]
+    assert merged[0]["snippet"] == "a longer snippet"
+
+
+def test_fanout_cuts_off_slow_engines():
+    """Engines slower than the latency budget must not stall the search."""
+    fanout = FanoutSearch(engines=["fast_test", "other_test", "slow_test"], latency_budget=0.3)
+
+    started = time.monotonic()
+    results = fanout.search("q")
+    assert time.monotonic() - started < 1.0
+    assert "Too late" not in [result["title"] for result in results]
+    assert results[0]["title"] == "Shared"
+
+    async_results = asyncio.run(fanout.asearch("q"))
+    assert [r["title"] for r in async_results] == [r["title"] for r in results]
+    fanout.close()
+
+
+def test_invalidation_closes_pooled_fanout():
+    """Dropping a member engine should close pooled fan-out instances and their worker threads."""
+    fanout = SearchEngineFactory.get_instance("fanout", engines=["fast_test", "other_test"])
+    assert fanout.search("q")
+    SearchEngineFactory.invalidate("fast_test")
+    assert fanout._executor._shutdown
+    assert SearchEngineFactory.get_instance("fanout", engines=["fast_test", "other_test"]) is not fanout
+    SearchEngineFactory.invalidate("fanout")
+
+
+if __name__ == "__main__":
+    test_normalize_url()
+    test_reciprocal_rank_fusion_deduplicates()
+    test_fanout_cuts_off_slow_engines()
+    test_invalidation_closes_pooled_fanout()
+    print("=== Fan-out Search Tests Complete ===")
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Test script for the page fetching tool
+"""
+
+import asyncio
+import threading
+import time
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import httpx
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langchain_tools import FetchPagesTool, PageFetcher, extract_text
+from langchain_tools import fetch_tools
+
+ARTICLE = "<p>" + " ".join(f"Fact number {i} about the topic." for i in range(30)) + "</p>"
+PAGE = f"""<html><head><title>Example Page</title><style>body {{ color: red; }}</style></head>
+<body><nav>Home | About</nav><article><h1>Heading</h1>{ARTICLE}</article>
+<script>var tracking = 1;</script><footer>Copyright</footer></body></html>"""
+
+
+class MockSite:
+    """Serves test pages through httpx.MockTransport and records concurrency per host."""
+
+    def __init__(self, delay: float = 0.1):
+        self.delay = delay
+        self.active = {}
+        self.max_active = {}
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        self.active[host] = self.active.get(host, 0) + 1
+        self.max_active[host] = max(self.max_active.get(host, 0), self.active[host])
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active[host] -= 1
+        if request.url.path == "/missing":
+            return httpx.Response(404)
+        if request.url.path == "/image":
+            return httpx.Response(200, content=b"\x89PNG", headers={"content-type": "image/png"})
+        if request.url.path == "/huge":
+            return httpx.Response(200, text="<p>" + "word " * 100000 + "</p>",
+                                  headers={"content-type": "text/html"})
+        if request.url.path == "/slow":
+            await asyncio.sleep(5)
+        if request.url.path.startswith("/redirect-to/"):
+            return httpx.Response(302, headers={"location": "http://" + request.url.path[len("/redirect-to/"):]})
+        return httpx.Response(200, text=PAGE, headers={"content-type": "text/html; charset=utf-8"})
+
+
+# Offline stand-in for DNS
+HOSTS = {"internal.example.com": ["10.0.0.5"], "localhost": ["127.0.0.1"]}
+
+
+async def fake_resolve(host, port):
+    return HOSTS.get(host, ["93.184.216.34"])
+
+
+def make_fetcher(site: MockSite, **kwargs) -> PageFetcher:
+    fetcher = PageFetcher(**kwargs)
+    fetcher._clients.client_kwargs["transport"] = httpx.MockTransport(site.handler)
+    fetcher._resolve = fake_resolve
+    return fetcher
+
+
+def test_extract_text():
+    """Extraction should keep the article text and drop scripts, styles and navigation."""
+    title, text = extract_text(PAGE)
+    assert title == "Example Page"
+    assert text.startswith("Heading\nFact number 0")
+    assert "tracking" not in text and "color" not in text
+    assert "Home" not in text and "Copyright" not in text
+
+
+def test_concurrent_fetch_with_host_limits():
+    """Pages should download concurrently, with at most per_host_limit per host."""
+    site = MockSite(delay=0.2)
+    fetcher = make_fetcher(site, max_concurrency=8, per_host_limit=2)
+    urls = [f"https://a.example.com/{i}" for i in range(4)] + [f"https://b.example.com/{i}" for i in range(4)]
+    start = time.monotonic()
+    pages = fetcher.fetch(urls)
+    elapsed = time.monotonic() - start
+    assert [page.url for page in pages] == urls
+    assert all(page.ok and page.title == "Example Page" for page in pages)
+    assert site.max_active == {"a.example.com": 2, "b.example.com": 2}
+    # Two rounds of 0.2s per host, not eight sequential downloads
+    assert elapsed < 1.0
+
+
+def test_failures_and_limits():
+    """Errors, unsupported types, oversized bodies and timeouts should be reported per page."""
+    site = MockSite(delay=0.0)
+    fetcher = make_fetcher(site, timeout=0.5, max_bytes=10000)
+    missing, image, huge, slow = fetcher.fetch([
+        "https://c.example.com/missing", "https://c.example.com/image",
+        "https://c.example.com/huge", "https://c.example.com/slow"
+    ])
+    assert missing.error == "HTTP 404"
+    assert "image/png" in image.error
+    assert huge.ok and huge.truncated and len(huge.text) <= 10000
+    assert "Timed out" in slow.error
+
+
+def test_private_addresses_are_refused():
+    """Loopback, private and metadata addresses should be refused, including after a redirect."""
+    site = MockSite(delay=0.0)
+    fetcher = make_fetcher(site)
+    pages = fetcher.fetch([
+        "http://127.0.0.1/admin", "http://localhost:8080/", "http://169.254.169.254/latest/meta-data/",
+        "http://internal.example.com/", "http://[::1]/", "https://e.example.com/redirect-to/10.1.2.3/secret",
+        "file:///etc/passwd", "https://e.example.com/redirect-to/f.example.com/page"
+    ])
+    *refused, redirected = pages
+    assert all(not page.ok for page in refused), refused
+    assert "non-public address 10.1.2.3" in refused[5].error
+    assert "scheme" in refused[6].error
+    # Redirects to public hosts are still followed
+    assert redirected.ok and redirected.title == "Example Page"
+    # Refused hosts are never contacted
+    assert set(site.max_active) == {"e.example.com", "f.example.com"}
+
+    assert make_fetcher(site, allow_private_addresses=True).fetch(["http://127.0.0.1/page"])[0].ok
+
+
+def test_rebinding_to_private_address_is_refused():
+    """A host that passes the check but connects to a private address should never get the request."""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            self.send_response(200)
+            self.send_header("content-type", "text/html")
+            self.end_headers()
+            self.wfile.write(PAGE.encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://localhost:{server.server_port}/secret"
+    try:
+        # The check sees a public address; the client then connects to loopback
+        fetcher = PageFetcher()
+
+        async def rebinding_resolve(host, port):
+            return ["93.184.216.34"]
+
+        fetcher._resolve = rebinding_resolve
+        page = fetcher.fetch([url])[0]
+        fetcher.close()
+        assert not page.ok and "non-public address 127.0.0.1" in page.error
+        assert requests == []
+
+        fetcher = PageFetcher(allow_private_addresses=True)
+        assert fetcher.fetch([url])[0].ok
+        fetcher.close()
+        assert requests == ["/secret"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_blocking_fetch_reuses_client():
+    """Blocking fetches should share one loop and pooled client instead of building new ones."""
+    fetcher = make_fetcher(MockSite(delay=0.0))
+    try:
+        fetcher.fetch(["https://g.example.com/1"])
+        loop = fetcher._loop
+        client = fetcher._clients._clients[loop]
+        fetcher.fetch(["https://g.example.com/2"])
+        assert fetcher._loop is loop and fetcher._clients._clients[loop] is client and not client.is_closed
+    finally:
+        fetcher.close()
+    assert client.is_closed
+
+
+def test_fetch_tool_output():
+    """The tool should return page text within its token budget, in async runs too."""
+    site = MockSite(delay=0.0)
+    original = fetch_tools._page_fetcher
+    fetch_tools._page_fetcher = make_fetcher(site)
+    try:
+        tool = FetchPagesTool(token_budget=150)
+        output = tool.invoke({"target": "see https://d.example.com/one and https://d.example.com/missing"})
+        assert "Page 1: Example Page" in output
+        assert "Error: HTTP 404" in output
+        assert fetch_tools.count_tokens(output) <= 150
+
+        output = asyncio.run(tool.ainvoke({"target": "https://d.example.com/two"}))
+        assert "Fact number 0 about the topic." in output
+    finally:
+        fetch_tools._page_fetcher = original
+
+
+if __name__ == "__main__":
+    test_extract_text()
+    test_concurrent_fetch_with_host_limits()
+    test_failures_and_limits()
+    test_private_addresses_are_refused()
+    test_rebinding_to_private_address_is_refused()
+    test_blocking_fetch_reuses_client()
+    test_fetch_tool_output()
+    print("=== Fetch Tools Tests Complete ===")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for the token-budgeted search result formatter
+"""
+
+import sys
+import os
+import threading
+import time
+import types
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from search_engines import SearchResult
+from langchain_tools import SearchTool, count_tokens, format_search_results, truncate_text
+import langchain_tools.formatting as formatting
+
+
+LONG_SNIPPET = " ".join(f"Sentence number {i} explains another detail of the topic." for i in range(40))
+
+
+def make_results(count: int = 10):
+    return [SearchResult(title=f"Title {rank}", url=f"https://site{rank}.example.com/page", snippet=LONG_SNIPPET,
+                         rank=rank, engine="test") for rank in range(1, count + 1)]
+
+
+def test_no_results():
+    """An empty result list should produce the usual message."""
+    assert format_search_results([], "nothing") == "No search results found for query: 'nothing'"
+
+
+def test_output_respects_budget():
+    """The output should stay within the token budget for any budget size."""
+    for budget in (80, 200, 500, 2000):
+        formatted = format_search_results(make_results(), "topic", token_budget=budget)
+        assert count_tokens(formatted) <= budget, (budget, count_tokens(formatted))
+        assert "Result 1:" in formatted
+
+
+def test_best_ranked_results_first():
+    """Results should be ordered by rank, and a tight budget should drop the worst ones."""
+    results = list(reversed(make_results(5)))
+    formatted = format_search_results(results, "topic", token_budget=120)
+    assert formatted.index("Title 1") < formatted.index("Title 2")
+    assert "Title 5" not in formatted
+    assert "showing the top" in formatted
+
+
+def test_short_snippets_leave_room_for_others():
+    """Budget unused by a short snippet should go to the following results."""
+    results = make_results(3)
+    results[0].snippet = "Short."
+    formatted = format_search_results(results, "topic", token_budget=400)
+    snippets = [line for line in formatted.splitlines() if line.startswith("  Snippet:")]
+    assert snippets[0] == "  Snippet: Short."
+    assert len(snippets[2]) > 200
+
+
+def test_truncation_on_sentence_boundary():
+    """Snippets should be cut after a full sentence, or at a word with an ellipsis."""
+    text = truncate_text(LONG_SNIPPET, 30)
+    assert text.endswith("topic.")
+    assert count_tokens(text) <= 30
+
+    text = truncate_text("word " * 200, 10)
+    assert text.endswith("...") and not text.endswith(" ...")
+    assert truncate_text("Fits.", 10) == "Fits."
+
+
+def test_search_tool_uses_budget():
+    """SearchTool should format observations with its own budget."""
+    tool = SearchTool(token_budget=100)
+    formatted = tool._format_search_results(make_results(), "topic")
+    assert count_tokens(formatted) <= 100
+
+
+def test_slow_encoding_load_does_not_block():
+    """Counting should use the estimate at once while the tiktoken encoding is still loading."""
+    loaded = threading.Event()
+
+    class FakeEncoding:
+        def encode(self, text, disallowed_special=()):
+            return text.split()
+
+    def get_encoding(name):
+        loaded.wait(5)
+        return FakeEncoding()
+
+    saved = (sys.modules.get("tiktoken"), formatting._encoding, formatting._encoding_loading)
+    sys.modules["tiktoken"] = types.SimpleNamespace(get_encoding=get_encoding)
+    formatting._encoding, formatting._encoding_loading = None, False
+    try:
+        start = time.monotonic()
+        assert count_tokens("one two three four") == 5
+        assert time.monotonic() - start < 1
+        loaded.set()
+        deadline = time.monotonic() + 5
+        while formatting._encoding is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert count_tokens("one two three four") == 4
+    finally:
+        loaded.set()
+        if saved[0] is None:
+            sys.modules.pop("tiktoken", None)
+        else:
+            sys.modules["tiktoken"] = saved[0]
+        formatting._encoding, formatting._encoding_loading = saved[1], saved[2]
+
+
+if __name__ == "__main__":
+    test_no_results()
+    test_output_respects_budget()
+    test_best_ranked_results_first()
+    test_short_snippets_leave_room_for_others()
+    test_truncation_on_sentence_boundary()
+    test_search_tool_uses_budget()
+    test_slow_encoding_load_does_not_block()
+    print("=== Formatting Tests Complete ===")
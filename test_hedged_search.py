@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test script for hedged search and latency histograms
+"""
+
+import asyncio
+import threading
+import time
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from search_engines import BaseSearch, HedgedSearch, LatencyHistogram, register_search_engine
+
+
+class SlowPrimarySearch(BaseSearch):
+    delay = 0.0
+
+    def search(self, query: str):
+        time.sleep(self.delay)
+        return [{"title": "Primary", "link": "https://primary.example.com/", "snippet": query}]
+
+    async def asearch(self, query: str):
+        await asyncio.sleep(self.delay)
+        return [{"title": "Primary", "link": "https://primary.example.com/", "snippet": query}]
+
+
+class BackupHedgeSearch(BaseSearch):
+    def search(self, query: str):
+        return [{"title": "Secondary", "link": "https://secondary.example.com/", "snippet": query}]
+
+
+class BrokenSearch(BaseSearch):
+    def search(self, query: str):
+        raise RuntimeError("provider outage")
+
+
+# hedge_tracked gets its own latency histogram, untouched by the other tests
+for name, class_name in (("hedge_primary", "SlowPrimarySearch"), ("hedge_tracked", "SlowPrimarySearch"),
+                         ("hedge_secondary", "BackupHedgeSearch"), ("hedge_broken", "BrokenSearch")):
+    register_search_engine(name, "test_hedged_search", class_name)
+
+
+def make_hedged(primary: str = "hedge_primary") -> HedgedSearch:
+    return HedgedSearch(primary=primary, secondary="hedge_secondary", min_delay=0.05, max_delay=0.5,
+                        default_delay=0.1, min_samples=5)
+
+
+def test_latency_histogram():
+    """Percentiles should land within one bucket of the true value."""
+    histogram = LatencyHistogram()
+    assert histogram.percentile(95) is None
+    for i in range(1, 101):
+        histogram.record(i / 100.0)
+    assert 0.45 <= histogram.percentile(50) <= 0.6
+    assert 0.9 <= histogram.percentile(95) <= 1.2
+    assert histogram.get_stats()["count"] == 100
+
+    decaying = LatencyHistogram(max_samples=10)
+    for _ in range(25):
+        decaying.record(0.1)
+    assert decaying.count < 10
+
+
+def test_fast_primary_is_not_hedged():
+    """A primary answering within the hedge delay should win alone."""
+    SlowPrimarySearch.delay = 0.0
+    hedged = make_hedged()
+    try:
+        results = hedged.search("fast")
+        assert results[0]["title"] == "Primary"
+        assert hedged.get_stats()["hedged"] == 0
+    finally:
+        hedged.close()
+
+
+def test_slow_primary_is_hedged():
+    """A slow primary should lose to the secondary, in sync and async searches."""
+    SlowPrimarySearch.delay = 1.0
+    hedged = make_hedged()
+    try:
+        start = time.monotonic()
+        results = hedged.search("slow")
+        assert results[0]["title"] == "Secondary"
+        assert time.monotonic() - start < 0.8
+
+        results = asyncio.run(hedged.asearch("slow"))
+        assert results[0]["title"] == "Secondary"
+        stats = hedged.get_stats()
+        assert stats["hedged"] == 2 and stats["secondary_wins"] == 2
+    finally:
+        hedged.close()
+        SlowPrimarySearch.delay = 0.0
+
+
+def test_failed_primary_is_hedged_immediately():
+    """A failing primary should fall through to the secondary without waiting."""
+    hedged = make_hedged(primary="hedge_broken")
+    try:
+        assert hedged.search("outage")[0]["title"] == "Secondary"
+    finally:
+        hedged.close()
+
+
+def test_hedge_delay_follows_latency():
+    """Once enough latencies are recorded, the delay should track the percentile."""
+    SlowPrimarySearch.delay = 0.15
+    hedged = make_hedged(primary="hedge_tracked")
+    hedged.max_delay = 5.0
+    hedged.default_delay = 5.0
+    try:
+        assert hedged.hedge_delay() == 5.0
+        for _ in range(5):
+            hedged.search("warm up")
+        assert 0.15 <= hedged.hedge_delay() <= 0.25
+    finally:
+        hedged.close()
+        SlowPrimarySearch.delay = 0.0
+
+
+def test_concurrent_fast_searches_are_not_hedged():
+    """Many callers at once should not hedge fast engines, even with fewer workers than callers."""
+    SlowPrimarySearch.delay = 0.1
+    for max_workers in (None, 4):
+        hedged = HedgedSearch(primary="hedge_primary", secondary="hedge_secondary", min_delay=0.3,
+                              max_delay=0.3, default_delay=0.3, min_samples=1000, max_workers=max_workers)
+        try:
+            callers = [threading.Thread(target=hedged.search, args=(f"q{i}",)) for i in range(32)]
+            for caller in callers:
+                caller.start()
+            for caller in callers:
+                caller.join()
+            stats = hedged.get_stats()
+            assert stats["searches"] == 32 and stats["hedged"] == 0, (max_workers, stats)
+        finally:
+            hedged.close()
+    SlowPrimarySearch.delay = 0.0
+
+
+def test_cancelled_losers_are_not_recorded():
+    """A primary cancelled after losing to the hedge should not add a latency sample."""
+    from search_engines import get_latency_histogram
+    SlowPrimarySearch.delay = 1.0
+    hedged = make_hedged(primary="hedge_tracked")
+    try:
+        count = get_latency_histogram("hedge_tracked").count
+        assert asyncio.run(hedged.asearch("slow"))[0]["title"] == "Secondary"
+        assert get_latency_histogram("hedge_tracked").count == count
+    finally:
+        hedged.close()
+        SlowPrimarySearch.delay = 0.0
+
+
+if __name__ == "__main__":
+    test_latency_histogram()
+    test_fast_primary_is_not_hedged()
+    test_slow_primary_is_hedged()
+    test_failed_primary_is_hedged_immediately()
+    test_hedge_delay_follows_latency()
+    test_concurrent_fast_searches_are_not_hedged()
+    test_cancelled_losers_are_not_recorded()
+    print("=== Hedged Search Tests Complete ===")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test script for structured, queue-based logging
+"""
+
+import contextlib
+import io
+import json
+import logging
+import queue
+import sys
+import os
+import tempfile
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from logging_setup import NonBlockingQueueHandler, parse_module_levels, setup_logging, shutdown_logging
+from tracing import Tracer
+
+
+def read_json_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_json_lines_with_fields_and_trace_ids():
+    """JSON records should carry extra fields, exceptions and the ids of the span they were logged in."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "logs", "agent.jsonl")
+        setup_logging(level="INFO", log_format="json", module_levels={}, output=path)
+        try:
+            logger = logging.getLogger("search_engines.test")
+            with Tracer(exporter=None).span("search test") as span:
+                logger.info("Searching for '%s'", "sky color", extra={"engine": "placeholder"})
+            try:
+                raise ValueError("engine offline")
+            except ValueError:
+                logger.exception("Search failed")
+        finally:
+            shutdown_logging()
+        first, second = read_json_lines(path)
+
+    assert first["level"] == "INFO" and first["logger"] == "search_engines.test"
+    assert first["message"] == "Searching for 'sky color'"
+    assert first["engine"] == "placeholder"
+    assert first["trace_id"] == span.trace_id and first["span_id"] == span.span_id
+    assert first["time"].endswith("Z")
+    assert second["level"] == "ERROR"
+    assert "ValueError: engine offline" in second["exception"]
+    assert "trace_id" not in second
+
+
+def test_module_levels_and_debug_sampling():
+    """Per-module levels should apply, and sampling should only thin out DEBUG records."""
+    assert parse_module_levels("search_engines=DEBUG, agent=warning") == {"search_engines": 10, "agent": 30}
+    try:
+        parse_module_levels("search_engines")
+        assert False, "expected a ValueError"
+    except ValueError:
+        pass
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "app.log")
+        setup_logging(level="WARNING", log_format="json", module_levels="search_engines=DEBUG", output=path)
+        try:
+            logging.getLogger("search_engines.cache").debug("kept")
+            logging.getLogger("agent").info("filtered by the root level")
+            logging.getLogger("agent").warning("kept too")
+        finally:
+            shutdown_logging()
+        messages = [record["message"] for record in read_json_lines(path)]
+        assert messages == ["kept", "kept too"]
+        # Module levels are reset once logging is shut down
+        assert logging.getLogger("search_engines").level == logging.NOTSET
+
+        setup_logging(level="DEBUG", log_format="text", module_levels={}, debug_sample_rate=0, output=path)
+        try:
+            logging.getLogger("agent").debug("sampled out")
+            logging.getLogger("agent").info("always kept")
+        finally:
+            shutdown_logging()
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+    assert "sampled out" not in text
+    assert "INFO agent: always kept" in text
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """A full log queue should drop records rather than stall the caller."""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    for index in range(3):
+        handler.handle(logging.makeLogRecord({"msg": "record %d", "args": (index,), "levelno": logging.INFO}))
+    assert handler.dropped == 2
+    assert handler.queue.get_nowait().msg == "record 0"
+
+
+def test_search_path_does_not_print():
+    """Searches should log instead of writing to stdout."""
+    from langchain_tools import search_with_failover
+    stdout = io.StringIO()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "app.log")
+        setup_logging(level="DEBUG", log_format="json", module_levels={}, output=path)
+        try:
+            with contextlib.redirect_stdout(stdout):
+                results, engine_name = search_with_failover("logging test", "placeholder")
+        finally:
+            shutdown_logging()
+        records = read_json_lines(path)
+    assert results and engine_name == "placeholder"
+    assert stdout.getvalue() == ""
+    assert any(record.get("engine") == "placeholder" and record.get("query") == "logging test" for record in records)
+
+
+if __name__ == "__main__":
+    test_json_lines_with_fields_and_trace_ids()
+    test_module_levels_and_debug_sampling()
+    test_full_queue_drops_instead_of_blocking()
+    test_search_path_does_not_print()
+    print("=== Logging Tests Complete ===")
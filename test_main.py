@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test script for the command line batch input
+"""
+
+import logging
+import sys
+import os
+import tempfile
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main
+
+
+class ListHandler(logging.Handler):
+    """Keeps the messages of every record it handles."""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_read_batch_queries_skips_bad_lines():
+    """Malformed and query-less lines should be skipped with a logged warning."""
+    handler = ListHandler()
+    main.logger.addHandler(handler)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "queries.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"id": "a", "query": "first"}\n'
+                    '{"query": "broken\n'
+                    '\n'
+                    '{"id": "b"}\n'
+                    '"second"\n')
+        records = {}
+        try:
+            queries = list(main.read_batch_queries(path, records))
+        finally:
+            main.logger.removeHandler(handler)
+
+    assert queries == ["first", "second"]
+    assert records == {0: {"id": "a", "query": "first"}, 1: {"query": "second", "id": 5}}
+    assert len(handler.messages) == 2
+    assert handler.messages[0].startswith("Skipping line 2: invalid JSON")
+    assert handler.messages[1] == "Skipping line 4: no query found"
+
+
+if __name__ == "__main__":
+    test_read_batch_queries_skips_bad_lines()
+    print("=== Main Tests Complete ===")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for the Ollama client
+"""
+
+import asyncio
+import json
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import httpx
+
+from llm_clients import OllamaClient, OllamaError
+
+
+def make_client(handler, **kwargs) -> OllamaClient:
+    """Create a client whose async requests are answered by ``handler``."""
+    client = OllamaClient(retry_backoff=0, **kwargs)
+    client._async_clients.client_kwargs["transport"] = httpx.MockTransport(handler)
+    return client
+
+
+def stream_body(*lines: str) -> bytes:
+    return "\n".join(lines).encode() + b"\n"
+
+
+def collect(client: OllamaClient):
+    async def run():
+        return [token async for token in client.astream_generate("why?")]
+    return asyncio.run(run())
+
+
+def test_stream_skips_malformed_lines():
+    """Malformed lines should be skipped without losing the rest of the answer."""
+    body = stream_body(json.dumps({"response": "The "}), "not json", json.dumps({"response": "sky"}),
+                       json.dumps({"done": True}))
+    client = make_client(lambda request: httpx.Response(200, content=body))
+    assert collect(client) == ["The ", "sky"]
+
+
+def test_stream_error_chunk_raises():
+    """An error reported mid-stream should raise instead of ending the answer silently."""
+    body = stream_body(json.dumps({"response": "The "}), json.dumps({"error": "model runner crashed"}))
+    client = make_client(lambda request: httpx.Response(200, content=body))
+    try:
+        collect(client)
+        assert False, "expected an OllamaError"
+    except OllamaError as e:
+        assert "model runner crashed" in str(e)
+
+
+def test_only_connect_failures_are_retried():
+    """Connection failures should be retried, read timeouts should not."""
+    attempts = []
+
+    def refuse_once(request):
+        attempts.append(request)
+        if len(attempts) == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={"response": "blue"})
+
+    client = make_client(refuse_once, max_retries=2)
+    assert asyncio.run(client.agenerate("why?")) == "blue"
+    assert len(attempts) == 2
+
+    attempts.clear()
+
+    def time_out(request):
+        attempts.append(request)
+        raise httpx.ReadTimeout("no answer yet", request=request)
+
+    client = make_client(time_out, max_retries=2)
+    assert asyncio.run(client.agenerate("why?")) is None
+    assert len(attempts) == 1
+
+    retry = client.session.get_adapter("http://").max_retries
+    assert retry.connect == 2 and retry.read == 0
+
+
+def test_close_releases_async_clients():
+    """close() should close the pooled async client as well as the blocking session."""
+    client = make_client(lambda request: httpx.Response(200, json={"response": "blue"}))
+
+    async def generate():
+        assert await client.agenerate("why?") == "blue"
+        return client._async_clients.get()
+
+    loop = asyncio.new_event_loop()
+    try:
+        async_client = loop.run_until_complete(generate())
+        client.close()
+        assert async_client.is_closed
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    test_stream_skips_malformed_lines()
+    test_stream_error_chunk_raises()
+    test_only_connect_failures_are_retried()
+    test_close_releases_async_clients()
+    print("=== Ollama Client Tests Complete ===")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for the plan-and-execute agent mode
+"""
+
+import asyncio
+import time
+import sys
+import os
+from typing import List
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from langchain.tools import BaseTool
+from langchain_core.outputs import GenerationChunk
+from agent import PlanExecuteSearchAgent
+from test_agent import ScriptedLLM
+
+PLAN_RESPONSES = [
+    "1. solar panel efficiency 2024\n- solar panel cost trends\n\"solar panel recycling\"\nsolar panel cost trends",
+    "Solar panels are getting cheaper and more efficient.",
+]
+
+
+class StreamingScriptedLLM(ScriptedLLM):
+    """Scripted LLM that also streams its responses word by word."""
+
+    def _stream(self, prompt, stop=None, run_manager=None, **kwargs):
+        for word in self._call(prompt, stop).split(" "):
+            yield GenerationChunk(text=word + " ")
+
+
+class SlowSearchTool(BaseTool):
+    """Search tool that takes a fixed time per query and records what was searched."""
+
+    name: str = "web_search"
+    description: str = "Search the web"
+    delay: float = 0.3
+    queries: List[str] = []
+
+    def _run(self, query: str, engine: str = "auto") -> str:
+        self.queries.append(query)
+        time.sleep(self.delay)
+        return f"Result for {query}"
+
+    async def _arun(self, query: str, engine: str = "auto") -> str:
+        self.queries.append(query)
+        await asyncio.sleep(self.delay)
+        return f"Result for {query}"
+
+
+def make_agent():
+    llm = StreamingScriptedLLM(responses=PLAN_RESPONSES)
+    tool = SlowSearchTool(queries=[])
+    return PlanExecuteSearchAgent(llm, tools=[tool], verbose=False), llm, tool
+
+
+def test_plan_is_parsed():
+    """List markers, quotes and duplicates should be removed from the plan."""
+    agent, _, _ = make_agent()
+    assert agent._parse_plan("q", PLAN_RESPONSES[0]) == [
+        "solar panel efficiency 2024", "solar panel cost trends", "solar panel recycling"
+    ]
+    assert agent._parse_plan("original question", "Search queries:\n\n") == ["original question"]
+
+    agent.max_subqueries = 2
+    assert len(agent._parse_plan("q", PLAN_RESPONSES[0])) == 2
+
+
+def test_searches_run_in_parallel():
+    """All planned searches should run at once, with two LLM calls in total."""
+    agent, llm, tool = make_agent()
+    start = time.monotonic()
+    answer = agent.run("How are solar panels developing?")
+    elapsed = time.monotonic() - start
+    assert answer == "Solar panels are getting cheaper and more efficient."
+    assert sorted(tool.queries) == sorted(["solar panel efficiency 2024", "solar panel cost trends",
+                                           "solar panel recycling"])
+    assert llm.calls == 2
+    # Three 0.3s searches in parallel, not one after another
+    assert elapsed < 0.8
+
+
+def test_async_and_stream():
+    """arun and stream should follow the same plan, search and answer steps."""
+    agent, llm, tool = make_agent()
+    start = time.monotonic()
+    answer = asyncio.run(agent.arun("How are solar panels developing?"))
+    assert answer == "Solar panels are getting cheaper and more efficient."
+    assert time.monotonic() - start < 0.8
+    assert len(tool.queries) == 3
+
+    agent, llm, tool = make_agent()
+    tokens = list(agent.stream("How are solar panels developing?"))
+    assert len(tokens) > 1
+    assert "".join(tokens).strip() == "Solar panels are getting cheaper and more efficient."
+
+
+def test_stream_is_traced():
+    """Plan-mode streaming should record a root span and run metrics, with the searches below it."""
+    import tracing
+    from tracing import get_metrics
+    from test_tracing import CollectSpans
+
+    saved_enabled = tracing.TRACING_CONFIG["metrics_enabled"]
+    tracing.TRACING_CONFIG["metrics_enabled"] = True
+    get_metrics().clear()
+    try:
+        with CollectSpans() as spans:
+            agent, llm, tool = make_agent()
+            assert "".join(agent.stream("How are solar panels developing?")).strip()
+            agent, llm, tool = make_agent()
+            tokens = asyncio.run(collect(agent.astream("How are solar panels developing?")))
+            assert "".join(tokens).strip()
+
+            agent, llm, tool = make_agent()
+            llm.responses = []
+            assert list(agent.stream("broken"))[0].startswith("Agent execution failed")
+    finally:
+        tracing.TRACING_CONFIG["metrics_enabled"] = saved_enabled
+
+    roots = spans.named("agent.run")
+    assert len(roots) == 3
+    assert all(root.attributes["agent.mode"] == "plan" for root in roots)
+    assert roots[2].error
+    assert get_metrics().get_counter("agent_runs_total", mode="plan", status="ok") == 2
+    assert get_metrics().get_counter("agent_runs_total", mode="plan", status="error") == 1
+
+
+async def collect(tokens):
+    return [token async for token in tokens]
+
+
+if __name__ == "__main__":
+    test_plan_is_parsed()
+    test_searches_run_in_parallel()
+    test_async_and_stream()
+    test_stream_is_traced()
+    print("=== Plan Agent Tests Complete ===")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test script for search rate limiting, quota tracking and engine failover
+"""
+
+import asyncio
+import tempfile
+import time
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import search_engines.rate_limit as rate_limit
+from search_engines import (
+    BaseSearch,
+    SearchEngineFactory,
+    EngineUnavailableError,
+    QuotaExceededError,
+    QuotaTracker,
+    RateLimiter,
+    TokenBucket,
+    get_rate_limiter,
+    register_search_engine
+)
+from search_engines.rate_limit import parse_retry_after
+from langchain_tools import search_with_failover, asearch_with_failover
+
+
+class ExhaustedSearch(BaseSearch):
+    def search(self, query: str):
+        raise get_rate_limiter().report_quota_exhausted("exhausted_test")
+
+
+class BackupSearch(BaseSearch):
+    def search(self, query: str):
+        return [{"title": "Backup", "link": "https://backup.example.com/", "snippet": query}]
+
+
+for name, class_name in (("exhausted_test", "ExhaustedSearch"), ("backup_test", "BackupSearch")):
+    register_search_engine(name, "test_rate_limit", class_name)
+
+
+def test_token_bucket():
+    """Requests beyond the burst should be spaced out at the configured rate."""
+    bucket = TokenBucket(rate=20, capacity=2)
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+    assert 0.08 <= elapsed < 0.5, elapsed
+
+    # Callers that would wait too long give up without taking a token
+    bucket.pause(5)
+    assert bucket.acquire(max_wait=0.1) < 0
+
+    async def acquire_concurrently():
+        async_bucket = TokenBucket(rate=50, capacity=1)
+        await asyncio.gather(*(async_bucket.aacquire() for _ in range(5)))
+
+    start = time.monotonic()
+    asyncio.run(acquire_concurrently())
+    assert time.monotonic() - start >= 0.07
+
+
+def test_quota_tracker_persistence():
+    """Daily counts should be enforced and survive a restart."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "quota.json")
+        tracker = QuotaTracker({"google_cse": 2}, path)
+        tracker.consume("google_cse")
+        tracker.consume("unlimited")
+        # Counts are written in the background, not on every request
+        assert not os.path.exists(path)
+        tracker.flush()
+
+        restarted = QuotaTracker({"google_cse": 2}, path)
+        assert restarted.remaining("google_cse") == 1
+        assert restarted.remaining("unlimited") is None
+        restarted.consume("google_cse")
+        assert restarted.is_exhausted("google_cse")
+        try:
+            restarted.consume("google_cse")
+            assert False, "quota should be exhausted"
+        except QuotaExceededError as e:
+            assert e.engine_name == "google_cse"
+            assert e.retry_after > 0
+
+
+def test_quota_tracker_merges_processes():
+    """Trackers sharing a quota file should add up their counts instead of overwriting them."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "quota.json")
+        first = QuotaTracker({"google_cse": 5}, path, flush_interval=60)
+        second = QuotaTracker({"google_cse": 5}, path, flush_interval=60)
+        first.consume("google_cse")
+        first.consume("google_cse")
+        second.consume("google_cse")
+        first.flush()
+        second.flush()
+        assert second.remaining("google_cse") == 2
+        second.mark_exhausted("brave")
+        second.flush()
+        first.flush()
+        assert first.get_usage()["google_cse"] == 3
+        assert first.is_exhausted("brave")
+
+        # The timer flushes on its own
+        timed = QuotaTracker({"google_cse": 5}, path, flush_interval=0.01)
+        timed.consume("google_cse")
+        deadline = time.monotonic() + 5
+        while QuotaTracker({}, path).get_usage().get("google_cse") != 4 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert QuotaTracker({}, path).get_usage()["google_cse"] == 4
+
+
+def test_rate_limiter_groups():
+    """Both Google engines should draw from the same quota."""
+    limiter = RateLimiter(daily_quotas={"google_cse": 1})
+    limiter.acquire("customgoogle")
+    assert limiter.is_exhausted("google")
+    try:
+        limiter.acquire("google")
+        assert False, "shared quota should be exhausted"
+    except QuotaExceededError:
+        pass
+
+    limiter.report_rate_limited("brave", retry_after=5)
+    limiter.max_wait = 0.1
+    try:
+        limiter.acquire("brave")
+        assert False, "a paused engine should be reported unavailable"
+    except EngineUnavailableError as e:
+        assert not isinstance(e, QuotaExceededError)
+
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+
+
+def test_failover():
+    """An exhausted engine should hand the query to the next available engine."""
+    original_limiter = rate_limit._rate_limiter
+    rate_limit._rate_limiter = RateLimiter()
+    try:
+        SearchEngineFactory.get_default_engine_name()
+        SearchEngineFactory._engine_preference = ["exhausted_test", "backup_test"]
+        assert SearchEngineFactory.get_default_engine_name() == "exhausted_test"
+
+        results, engine_name = search_with_failover("failover query", "exhausted_test")
+        assert engine_name == "backup_test"
+        assert results[0]["title"] == "Backup"
+
+        # Default selection skips the exhausted engine from now on
+        assert SearchEngineFactory.get_default_engine_name() == "backup_test"
+        results, engine_name = asyncio.run(asearch_with_failover("failover query", "exhausted_test"))
+        assert engine_name == "backup_test"
+    finally:
+        rate_limit._rate_limiter = original_limiter
+        SearchEngineFactory.invalidate_availability()
+
+
+if __name__ == "__main__":
+    test_token_bucket()
+    test_quota_tracker_persistence()
+    test_quota_tracker_merges_processes()
+    test_rate_limiter_groups()
+    test_failover()
+    print("=== Rate Limit Tests Complete ===")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for reranking search results
+"""
+
+import asyncio
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from search_engines import SearchResult
+from langchain_tools import Reranker, bm25_scores
+
+
+RESULTS = [
+    SearchResult(title="Cooking pasta", url="https://a.example.com/", snippet="Boil water and add salt.", rank=1),
+    SearchResult(title="Python asyncio tutorial", url="https://b.example.com/",
+                 snippet="Learn asyncio event loops and tasks in Python.", rank=2),
+    SearchResult(title="Snakes", url="https://c.example.com/", snippet="The python is a large snake.", rank=3),
+]
+
+
+class FakeEmbeddings:
+    """Embeds texts by keyword so similarities are predictable, counting the requests made."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = 0
+
+    def _vector(self, text):
+        text = text.lower()
+        return [float("snake" in text), float("pasta" in text), 0.1]
+
+    def embed(self, texts):
+        self.calls += 1
+        return None if self.fail else [self._vector(text) for text in texts]
+
+    async def aembed(self, texts):
+        return self.embed(texts)
+
+
+def test_bm25_scores():
+    """Documents matching more (and rarer) query terms should score higher."""
+    scores = bm25_scores("python asyncio", ["python asyncio tasks", "python snake", "pasta"])
+    assert scores[0] > scores[1] > scores[2] == 0
+    assert bm25_scores("", ["text"]).tolist() == [0.0]
+
+
+def test_rerank_orders_by_relevance():
+    """The most relevant result should come first, with new ranks and scores."""
+    original = [result.copy() for result in RESULTS]
+    reranked = Reranker(top_k=2, use_embeddings=False).rerank("python asyncio tasks", RESULTS)
+    assert [result.url for result in reranked] == ["https://b.example.com/", "https://c.example.com/"]
+    assert [result.rank for result in reranked] == [1, 2]
+    assert reranked[0].score == 1.0
+    # The input results are left untouched
+    assert RESULTS == original
+
+
+def test_no_matches_keep_engine_order():
+    """Without any matching terms the engine's order should be kept."""
+    reranked = Reranker(top_k=0, use_embeddings=False).rerank("unrelated words", RESULTS)
+    assert [result.url for result in reranked] == [result.url for result in RESULTS]
+
+
+def test_embeddings_blend_in_one_batch():
+    """Embedding similarity should be blended in, with all candidates embedded in one request."""
+    embeddings = FakeEmbeddings()
+    reranker = Reranker(top_k=0, use_embeddings=True, embedding_weight=0.9, embedding_client=embeddings)
+    reranked = reranker.rerank("large snake", RESULTS)
+    assert reranked[0].url == "https://c.example.com/"
+    assert embeddings.calls == 1
+
+    reranked = asyncio.run(reranker.arerank("pasta", RESULTS))
+    assert reranked[0].url == "https://a.example.com/"
+
+
+def test_failed_embeddings_fall_back_to_bm25():
+    """A failed embedding request should fall back to BM25 and pause further requests."""
+    embeddings = FakeEmbeddings(fail=True)
+    reranker = Reranker(top_k=0, use_embeddings=True, embedding_client=embeddings)
+    assert reranker.rerank("python asyncio", RESULTS)[0].url == "https://b.example.com/"
+    reranker.rerank("python asyncio", RESULTS)
+    assert embeddings.calls == 1
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+def test_ollama_embed_batches_and_falls_back():
+    """OllamaClient.embed should send one /api/embed request, or per-text requests on older servers."""
+    from llm_clients import OllamaClient
+
+    client = OllamaClient()
+    requests_made = []
+
+    def post(url, json=None, timeout=None):
+        requests_made.append(url.rsplit("/", 1)[-1])
+        if url.endswith("/api/embed"):
+            if legacy:
+                return FakeResponse(404)
+            return FakeResponse(200, {"embeddings": [[1.0]] * len(json["input"])})
+        return FakeResponse(200, {"embedding": [2.0]})
+
+    client.session.post = post
+    legacy = False
+    assert client.embed(["a", "b", "c"]) == [[1.0], [1.0], [1.0]]
+    assert requests_made == ["embed"]
+
+    legacy = True
+    requests_made.clear()
+    assert client.embed(["a", "b"]) == [[2.0], [2.0]]
+    assert requests_made == ["embed", "embeddings", "embeddings"]
+    client.close()
+
+
+if __name__ == "__main__":
+    test_bm25_scores()
+    test_rerank_orders_by_relevance()
+    test_no_matches_keep_engine_order()
+    test_embeddings_blend_in_one_batch()
+    test_failed_embeddings_fall_back_to_bm25()
+    test_ollama_embed_batches_and_falls_back()
+    print("=== Rerank Tests Complete ===")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for search retries, backoff and circuit breakers
+"""
+
+import asyncio
+import time
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import httpx
+import requests
+from search_engines import CircuitBreaker, CircuitOpenError, EngineResilience, QuotaExceededError
+from search_engines.resilience import is_retryable_error
+
+
+def http_error(status: int, retry_after: str = None) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+class FlakyRequest:
+    """Raises the given errors in turn, then succeeds."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"items": []}
+
+
+def make_resilience(**kwargs) -> EngineResilience:
+    breaker = kwargs.pop("breaker", None) or CircuitBreaker("test", failure_threshold=3, recovery_timeout=0.2)
+    return EngineResilience("test", max_attempts=3, base_delay=0.01, max_delay=1.0, breaker=breaker, **kwargs)
+
+
+def test_error_classification():
+    """Transient errors should be retried, client errors should not."""
+    assert is_retryable_error(http_error(503))
+    assert is_retryable_error(http_error(429))
+    assert is_retryable_error(requests.ConnectionError("refused"))
+    assert is_retryable_error(httpx.ConnectTimeout("timeout"))
+    assert not is_retryable_error(http_error(400))
+    assert not is_retryable_error(http_error(403))
+    assert not is_retryable_error(ValueError("bad json"))
+    assert not is_retryable_error(QuotaExceededError("test", "quota"))
+
+
+def test_retries_transient_errors():
+    """Transient errors should be retried until the request succeeds."""
+    request = FlakyRequest(http_error(503), requests.ConnectionError("reset"))
+    assert make_resilience().call(request) == {"items": []}
+    assert request.calls == 3
+
+    # Client errors are raised on the first attempt
+    request = FlakyRequest(http_error(400))
+    try:
+        make_resilience().call(request)
+        assert False, "400 should not be retried"
+    except requests.HTTPError:
+        pass
+    assert request.calls == 1
+
+
+def test_retry_after():
+    """Retry-After should set the delay, and delays beyond max_delay are not waited for."""
+    request = FlakyRequest(http_error(429, retry_after="0.2"))
+    start = time.monotonic()
+    make_resilience().call(request)
+    assert time.monotonic() - start >= 0.2
+
+    request = FlakyRequest(http_error(503, retry_after="120"))
+    try:
+        make_resilience().call(request)
+        assert False, "a Retry-After beyond max_delay should not be waited for"
+    except requests.HTTPError:
+        pass
+    assert request.calls == 1
+
+
+def test_circuit_breaker():
+    """Consecutive failures should open the circuit until a probe succeeds."""
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=0.2)
+    resilience = make_resilience(breaker=breaker)
+    request = FlakyRequest(*(http_error(502) for _ in range(3)))
+    try:
+        resilience.call(request)
+        assert False, "retries should be used up"
+    except requests.HTTPError:
+        pass
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # Open circuits fail fast without calling the engine
+    request = FlakyRequest()
+    try:
+        resilience.call(request)
+        assert False, "an open circuit should fail fast"
+    except CircuitOpenError as e:
+        assert e.retry_after > 0
+    assert request.calls == 0
+
+    # After the recovery timeout a successful probe closes the circuit
+    time.sleep(0.25)
+    assert not breaker.is_open
+    assert asyncio.run(resilience.acall(asyncio.sleep, 0, result="ok")) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+if __name__ == "__main__":
+    test_error_classification()
+    test_retries_transient_errors()
+    test_retry_after()
+    test_circuit_breaker()
+    print("=== Resilience Tests Complete ===")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script for the search result cache
+"""
+
+import asyncio
+import time
+import sys
+import os
+import tempfile
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from search_engines import BaseSearch, CachedSearch, TieredCache
+
+
+class CountingSearch(BaseSearch):
+    """Engine that records how often it actually hits the 'network'."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, query: str, num_results: int = 10):
+        self.calls += 1
+        return [{"title": query, "link": f"https://example.com/{self.calls}", "snippet": ""}][:num_results]
+
+
+def test_memory_lru_eviction_and_ttl():
+    """The memory tier should evict least recently used entries and expire old ones."""
+    cache = TieredCache(path=None, memory_max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3, ttl=60)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    cache.set("short", "x", ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get("short") is None
+
+    stats = cache.get_stats()
+    assert stats["evictions"] >= 1
+    assert stats["memory_hits"] == 3
+
+
+def test_disk_tier_survives_restart():
+    """Entries written to SQLite should be visible to a fresh cache instance."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.sqlite3")
+        TieredCache(path=path).set("key", [{"title": "t"}], ttl=60)
+
+        reopened = TieredCache(path=path)
+        assert reopened.get("key") == [{"title": "t"}]
+        assert reopened.get_stats()["disk_hits"] == 1
+        # Promoted to memory on the disk hit
+        assert reopened.get("key") == [{"title": "t"}]
+        assert reopened.get_stats()["memory_hits"] == 1
+
+
+def test_disk_size_cap():
+    """The disk tier should keep at most disk_max_entries rows."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.sqlite3")
+        cache = TieredCache(path=path, memory_max_entries=1, disk_max_entries=5)
+        for i in range(TieredCache._DISK_TRIM_INTERVAL):
+            cache.set(f"k{i}", i, ttl=60)
+        assert cache.get("k0") is None
+        assert cache.get(f"k{TieredCache._DISK_TRIM_INTERVAL - 1}") is not None
+
+
+def test_cached_search_keys():
+    """Repeated queries hit the cache; different num_results do not share entries."""
+    engine = CountingSearch()
+    cached = CachedSearch(engine, "counting", cache=TieredCache(path=None), ttl=60)
+
+    first = cached.search("Latest  AI news")
+    assert cached.search("latest ai news") == first
+    assert asyncio.run(cached.asearch("LATEST AI NEWS")) == first
+    assert engine.calls == 1
+
+    cached.search("latest ai news", num_results=1)
+    assert engine.calls == 2
+
+
+if __name__ == "__main__":
+    test_memory_lru_eviction_and_ttl()
+    test_disk_tier_survives_restart()
+    test_disk_size_cap()
+    test_cached_search_keys()
+    print("=== Search Cache Tests Complete ===")
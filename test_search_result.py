@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for structured search results
+"""
+
+import json
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from search_engines import BaseSearch, CachedSearch, SearchResult, TieredCache, to_search_results
+
+
+class FakeWrapper:
+    """Stands in for the LangChain Google/Bing wrappers."""
+
+    def __init__(self, items):
+        self.items = items
+
+    def results(self, query, num_results):
+        return self.items[:num_results]
+
+
+class DictSearch(BaseSearch):
+    """Engine that still returns plain dicts."""
+
+    def search(self, query: str):
+        return [{"title": "Dict", "link": "https://www.example.com/page", "snippet": query}]
+
+
+def test_result_fields_and_dict_access():
+    """Results should normalize fields and still answer dict-style lookups."""
+    result = SearchResult(title="Title", url="https://docs.example.com/a", snippet="text", engine="brave")
+    assert result.display_host == "docs.example.com"
+    assert result["link"] == result.url == result.get("url")
+    assert result.get("displayLink") == "docs.example.com"
+    assert result.get("missing", "default") == "default"
+    assert "link" in result and "missing" not in result
+    assert not hasattr(result, "__dict__")
+
+    # Rows survive a JSON round trip, as they do in the disk cache
+    restored = SearchResult.from_row(json.loads(json.dumps(result.to_row())))
+    assert restored == result
+    assert SearchResult.from_dict(result.to_dict()) == result
+
+
+def test_to_search_results():
+    """Dict results from older engines should be converted and ranked."""
+    results = to_search_results(DictSearch().search("q"), "dict")
+    assert results[0].url == "https://www.example.com/page"
+    assert results[0].engine == "dict"
+    assert results[0].rank == 1
+
+
+def test_langchain_wrapper_parsing():
+    """Google and Bing should return one result per hit instead of a text blob."""
+    from search_engines.google_search import GoogleSearch
+    from search_engines.bing_search import BingSearch
+    from search_engines.resilience import CircuitBreaker, EngineResilience
+
+    items = [
+        {"title": "One", "link": "https://one.example.com/", "snippet": "first"},
+        {"title": "Two", "link": "https://two.example.com/", "snippet": "second"},
+    ]
+    for engine_class, engine_name in ((GoogleSearch, "google"), (BingSearch, "bing")):
+        engine = object.__new__(engine_class)
+        engine.search_wrapper = FakeWrapper(items)
+        engine._resilience = EngineResilience(engine_name, breaker=CircuitBreaker(engine_name))
+        results = engine.search("query")
+        assert [result.title for result in results] == ["One", "Two"]
+        assert [result.rank for result in results] == [1, 2]
+        assert results[1].engine == engine_name
+
+        engine.search_wrapper = FakeWrapper([{"Result": "No good Search Result was found"}])
+        assert engine.search("query") == []
+
+
+def test_cache_stores_rows():
+    """The cache should hold compact rows and hand back SearchResult objects."""
+    cache = TieredCache(path=None)
+    cached = CachedSearch(DictSearch(), "dict", cache=cache, ttl=60)
+    first = cached.search("rows")
+    stored = cache.get(next(iter(cache._memory)))
+    assert isinstance(stored[0], tuple)
+    assert cached.search("rows") == first
+    assert isinstance(cached.search("rows")[0], SearchResult)
+
+
+if __name__ == "__main__":
+    test_result_fields_and_dict_access()
+    test_to_search_results()
+    test_langchain_wrapper_parsing()
+    test_cache_stores_rows()
+    print("=== Search Result Tests Complete ===")
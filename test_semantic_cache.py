@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script for the semantic query cache
+"""
+
+import asyncio
+import time
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+import semantic_cache
+from semantic_cache import NumpyVectorIndex, SemanticCache, create_vector_index
+
+
+TOPICS = ("ai", "weather", "football")
+SYNONYMS = {"ai": ("ai", "artificial intelligence"), "weather": ("weather", "forecast"), "football": ("football",)}
+
+
+class TopicEmbeddings:
+    """Embeds texts by topic, so paraphrases of the same question get the same vector."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        if self.fail:
+            return None
+        return [[float(any(word in text.lower() for word in SYNONYMS[topic])) for topic in TOPICS] + [0.2]
+                for text in texts]
+
+    async def aembed(self, texts):
+        return self.embed(texts)
+
+
+def test_numpy_index():
+    """The index should return the nearest keys and survive removals and growth."""
+    index = NumpyVectorIndex(dim=2, capacity=2)
+    for i, angle in enumerate(np.linspace(0, np.pi / 2, 5)):
+        index.add(f"k{i}", np.array([np.cos(angle), np.sin(angle)], dtype=np.float32))
+    assert len(index) == 5
+    key, similarity = index.search(np.array([1.0, 0.0], dtype=np.float32), k=2)[0]
+    assert key == "k0" and similarity > 0.99
+    index.remove("k0")
+    assert index.search(np.array([1.0, 0.0], dtype=np.float32))[0][0] == "k1"
+    assert len(index) == 4
+
+
+def test_hnsw_falls_back_without_hnswlib():
+    """Asking for HNSW without hnswlib installed should still give a working index."""
+    index = create_vector_index(3, kind="hnsw", capacity=10)
+    index.add("a", np.array([1.0, 0.0, 0.0], dtype=np.float32))
+    assert index.search(np.array([1.0, 0.0, 0.0], dtype=np.float32))[0][0] == "a"
+
+
+def test_paraphrase_hits_and_context():
+    """A reworded query should hit, but not across contexts or topics."""
+    embeddings = TopicEmbeddings()
+    cache = SemanticCache(threshold=0.9, ttl=60, max_entries=10, index="numpy", embedding_client=embeddings)
+    cache.store("latest AI advancements", "answer about AI", context="ollama|brave")
+
+    hit = cache.lookup("recent advances in artificial intelligence", context="ollama|brave")
+    assert hit.value == "answer about AI" and hit.query == "latest AI advancements"
+    assert hit.similarity >= 0.9
+    assert cache.lookup("weather forecast", context="ollama|brave") is None
+    assert cache.lookup("latest AI advancements", context="openai|brave") is None
+
+    # Exact repeats are answered without an embedding request
+    calls = embeddings.calls
+    assert cache.lookup("Latest  AI advancements", context="ollama|brave").similarity == 1.0
+    assert embeddings.calls == calls
+
+    hit = asyncio.run(cache.alookup("what is new in ai", context="ollama|brave"))
+    assert hit.value == "answer about AI"
+    stats = cache.get_stats()
+    assert stats["semantic_hits"] == 2 and stats["exact_hits"] == 1
+
+
+def test_ttl_and_eviction():
+    """Expired entries should miss, and the least recently used entries should be evicted."""
+    cache = SemanticCache(threshold=0.9, ttl=60, max_entries=2, index="numpy", embedding_client=TopicEmbeddings())
+    cache.store("ai news", "ai", ttl=0.05)
+    time.sleep(0.1)
+    assert cache.lookup("artificial intelligence news") is None
+
+    cache.store("ai news", "ai")
+    cache.store("weather today", "weather")
+    cache.store("football scores", "football")
+    assert cache.lookup("artificial intelligence news") is None
+    assert cache.lookup("forecast").value == "weather"
+    assert cache.get_stats()["entries"] == 2
+
+
+def test_embedding_failure_is_a_miss():
+    """Without embeddings the cache should miss and stop calling the model for a while."""
+    embeddings = TopicEmbeddings(fail=True)
+    cache = SemanticCache(embedding_client=embeddings)
+    assert cache.lookup("ai news") is None
+    cache.store("ai news", "value")
+    assert embeddings.calls == 1
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_search_tool_uses_semantic_cache():
+    """SearchTool should reuse the results of a similar earlier search."""
+    from langchain_tools import SearchTool, search_tools
+
+    cache = SemanticCache(threshold=0.9, ttl=60, index="numpy", embedding_client=TopicEmbeddings())
+    search_tools.get_semantic_cache = lambda name: cache
+    try:
+        tool = SearchTool(default_engine="placeholder")
+        first = tool._search("latest AI advancements", "auto")
+        assert cache.get_stats()["writes"] == 1
+        second = tool._search("recent artificial intelligence advances", "auto")
+        assert second == first
+        assert cache.get_stats()["semantic_hits"] == 1
+    finally:
+        search_tools.get_semantic_cache = semantic_cache.get_semantic_cache
+
+
+if __name__ == "__main__":
+    test_numpy_index()
+    test_hnsw_falls_back_without_hnswlib()
+    test_paraphrase_hits_and_context()
+    test_ttl_and_eviction()
+    test_embedding_failure_is_a_miss()
+    test_search_tool_uses_semantic_cache()
+    print("=== Semantic Cache Tests Complete ===")
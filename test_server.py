@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test script for the HTTP API server
+"""
+
+import asyncio
+import json
+import sys
+import os
+import threading
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.testclient import TestClient
+from server import create_app, AgentPool
+from test_agent import create_test_agent
+
+
+class ScriptedAgentPool(AgentPool):
+    """Agent pool handing out agents driven by a scripted LLM."""
+
+    def __init__(self):
+        super().__init__()
+        self.created = 0
+
+    def get(self, llm_type: str, search_engine: str):
+        key = (llm_type, search_engine)
+        if key not in self._agents:
+            self.created += 1
+            agent = create_test_agent()
+            agent.agent_executor.verbose = False
+            self._agents[key] = agent
+        return self._agents[key]
+
+
+def test_search_endpoint():
+    """/search should return structured results from the selected engine."""
+    with TestClient(create_app(agent_pool=ScriptedAgentPool())) as client:
+        response = client.post("/search", json={"query": "test", "engine": "placeholder", "max_results": 1})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["engine"] == "placeholder"
+        assert len(body["results"]) == 1
+
+        assert client.post("/search", json={"query": "test", "engine": "missing"}).status_code == 400
+        for max_results in (0, -2):
+            response = client.post("/search", json={"query": "test", "engine": "placeholder", "max_results": max_results})
+            assert response.status_code == 422
+
+
+def test_ask_reuses_warm_agent():
+    """/ask should answer with a pooled agent and stream tokens as SSE."""
+    pool = ScriptedAgentPool()
+    with TestClient(create_app(agent_pool=pool)) as client:
+        answer = client.post("/ask", json={"query": "why is the sky blue?", "llm": "ollama", "engine": "auto"})
+        assert answer.status_code == 200
+        assert answer.json()["answer"] == "The sky is blue."
+
+        pool.get("ollama", "auto").llm_client.calls = 0
+        with client.stream("POST", "/ask", json={"query": "why?", "llm": "ollama", "engine": "auto", "stream": True}) as response:
+            assert response.headers["content-type"].startswith("text/event-stream")
+            body = "".join(response.iter_text())
+        assert body.count("data: ") > 2
+        assert "event: done" in body
+
+    assert pool.created == 1
+
+
+def test_concurrency_limit():
+    """Requests beyond the concurrency limit should be rejected once the queue timeout expires."""
+    release = threading.Event()
+
+    class BlockingPool(ScriptedAgentPool):
+        def get(self, llm_type, search_engine):
+            release.wait(5)
+            return super().get(llm_type, search_engine)
+
+    app = create_app(agent_pool=BlockingPool(), max_concurrency=1, queue_timeout=0.1)
+    with TestClient(app) as client:
+        first = threading.Thread(target=client.post, args=("/ask",), kwargs={"json": {"query": "slow"}})
+        first.start()
+        try:
+            time.sleep(0.2)
+            assert client.post("/search", json={"query": "q", "engine": "placeholder"}).status_code == 503
+        finally:
+            release.set()
+            first.join()
+
+
+async def asgi_post(app, path: str, payload: dict, send) -> None:
+    """Send one POST request straight to the ASGI app, passing response messages to ``send``."""
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"content-type", b"application/json")],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    await app(scope, receive, send)
+
+
+def test_stream_slot_released_on_early_disconnect():
+    """A client that goes away before the first event should not keep its slot."""
+    app = create_app(agent_pool=ScriptedAgentPool(), max_concurrency=1, queue_timeout=0.1)
+
+    async def scenario():
+        async def disconnected(message):
+            raise OSError("client went away")
+
+        try:
+            await asgi_post(app, "/ask", {"query": "why?", "stream": True}, disconnected)
+        except Exception:
+            pass
+
+        statuses = []
+
+        async def collect(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        await asgi_post(app, "/search", {"query": "q", "engine": "placeholder"}, collect)
+        return statuses
+
+    assert asyncio.run(scenario()) == [200]
+
+
+def test_ask_agent_failure_is_502():
+    """An agent failure should be reported as a 502 with a JSON detail, not as the answer."""
+    pool = ScriptedAgentPool()
+
+    async def failing_arun(query, raise_errors=False):
+        raise RuntimeError("Ollama is unreachable")
+
+    with TestClient(create_app(agent_pool=pool, max_concurrency=1)) as client:
+        pool.get("ollama", "auto").arun = failing_arun
+        response = client.post("/ask", json={"query": "q", "llm": "ollama", "engine": "auto"})
+        assert response.status_code == 502
+        assert "Ollama is unreachable" in response.json()["detail"]
+        # The slot was released
+        assert client.post("/search", json={"query": "q", "engine": "placeholder"}).status_code == 200
+
+
+if __name__ == "__main__":
+    test_search_endpoint()
+    test_ask_reuses_warm_agent()
+    test_concurrency_limit()
+    test_stream_slot_released_on_early_disconnect()
+    test_ask_agent_failure_is_502()
+    print("=== Server Tests Complete ===")
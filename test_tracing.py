@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Test script for step-level tracing and metrics
+"""
+
+import asyncio
+import json
+import sys
+import os
+import tempfile
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import requests
+import tracing
+from tracing import JsonlSpanExporter, MetricsRegistry, Tracer, add_event, get_metrics
+from agent import TracingCallbackHandler
+from search_engines import CachedSearch, EngineResilience, CircuitBreaker, TieredCache, TracedSearch, get_search_engine
+from test_agent import create_test_agent
+
+
+class ListExporter:
+    """Collects finished spans in memory."""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+    def named(self, prefix):
+        return [span for span in self.spans if span.name.startswith(prefix)]
+
+
+class CollectSpans:
+    """Routes the process-wide tracer's spans to a ListExporter for the duration of a test."""
+
+    def __enter__(self):
+        self.saved = tracing._tracer
+        self.exporter = ListExporter()
+        tracing._tracer = Tracer(self.exporter)
+        return self.exporter
+
+    def __exit__(self, *exc_info):
+        tracing._tracer = self.saved
+
+
+def test_spans_nest_and_export():
+    """Spans should nest, record errors and be written as OTLP/JSON lines."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "traces", "spans.jsonl")
+        tracer = Tracer(JsonlSpanExporter(path, service_name="test"))
+        with tracer.span("agent.run", {"agent.query": "q"}) as root:
+            with tracer.span("search placeholder", kind="CLIENT") as child:
+                add_event("cache_hit", cache="search")
+            try:
+                with tracer.span("llm"):
+                    raise ValueError("model offline")
+            except ValueError:
+                pass
+        tracer.exporter.flush()
+
+        with open(path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+    spans = {line["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["name"]: line for line in lines}
+    assert list(spans) == ["search placeholder", "llm", "agent.run"]
+    resource = lines[0]["resourceSpans"][0]["resource"]["attributes"]
+    assert resource == [{"key": "service.name", "value": {"stringValue": "test"}}]
+
+    search = spans["search placeholder"]["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert search["parentSpanId"] == root.span_id and search["traceId"] == root.trace_id
+    assert search["kind"] == "SPAN_KIND_CLIENT"
+    assert search["events"][0]["name"] == "cache_hit"
+    llm = spans["llm"]["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert llm["status"] == {"code": "STATUS_CODE_ERROR", "message": "ValueError: model offline"}
+    assert child.duration <= root.duration
+
+
+def test_prometheus_rendering():
+    """Counters and histograms should render in the Prometheus text format."""
+    metrics = MetricsRegistry(buckets=(0.1, 1.0))
+    metrics.inc("cache_hits_total", cache="search")
+    metrics.inc("cache_hits_total", 2, cache="search")
+    metrics.observe("llm_request_duration_seconds", 0.5, model='llama "3"')
+    metrics.observe("llm_request_duration_seconds", 5, model='llama "3"')
+    text = metrics.render()
+    assert "# TYPE cache_hits_total counter" in text
+    assert 'cache_hits_total{cache="search"} 3' in text
+    assert '# TYPE llm_request_duration_seconds histogram' in text
+    assert 'llm_request_duration_seconds_bucket{model="llama \\"3\\"",le="0.1"} 0' in text
+    assert 'llm_request_duration_seconds_bucket{model="llama \\"3\\"",le="1"} 1' in text
+    assert 'llm_request_duration_seconds_bucket{model="llama \\"3\\"",le="+Inf"} 2' in text
+    assert 'llm_request_duration_seconds_count{model="llama \\"3\\""} 2' in text
+    assert metrics.get_histogram("llm_request_duration_seconds", model='llama "3"')["sum"] == 5.5
+
+
+def test_traced_search_records_cache_hits():
+    """A cached search should be traced as a fast search with a cache hit."""
+    get_metrics().clear()
+    engine = TracedSearch(CachedSearch(get_search_engine("placeholder"), "placeholder", cache=TieredCache()),
+                          "placeholder")
+    with CollectSpans() as spans:
+        engine.search("tracing test")
+        asyncio.run(engine.asearch("tracing test"))
+    first, second = spans.named("search placeholder")
+    assert first.attributes["cache.hit"] is False and second.attributes["cache.hit"] is True
+    assert first.attributes["search.results"] > 0
+    metrics = get_metrics()
+    assert metrics.get_counter("search_requests_total", engine="placeholder", status="ok") == 2
+    assert metrics.get_counter("cache_hits_total", cache="search") == 1
+    assert metrics.get_histogram("search_request_duration_seconds", engine="placeholder", cache="hit")["count"] == 1
+
+
+def test_retries_are_recorded():
+    """Retries should show up as span events and in the retry counter."""
+    get_metrics().clear()
+    response = requests.Response()
+    response.status_code = 503
+    errors = [requests.HTTPError("503 error", response=response)]
+
+    def flaky():
+        if errors:
+            raise errors.pop()
+        return "ok"
+
+    resilience = EngineResilience("test", max_attempts=2, base_delay=0.001,
+                                  breaker=CircuitBreaker("test", failure_threshold=5))
+    with CollectSpans() as spans:
+        with tracing.get_tracer().span("search test"):
+            assert resilience.call(flaky) == "ok"
+    assert spans.spans[0].events[0][1] == "retry"
+    assert get_metrics().get_counter("search_retries_total", engine="test") == 1
+
+
+def test_agent_run_is_traced():
+    """An agent run should produce a root span with LLM, tool and search spans below it."""
+    get_metrics().clear()
+    agent = create_test_agent()
+    agent.agent_executor.verbose = False
+    handler = TracingCallbackHandler()
+    agent.llm_client.callbacks = [handler]
+    for tool in agent.tools:
+        tool.callbacks = [handler]
+    saved_enabled = tracing.TRACING_CONFIG["metrics_enabled"]
+    tracing.TRACING_CONFIG["metrics_enabled"] = True
+    try:
+        with CollectSpans() as spans:
+            assert agent.run("What color is the sky?") == "The sky is blue."
+    finally:
+        tracing.TRACING_CONFIG["metrics_enabled"] = saved_enabled
+
+    root, = spans.named("agent.run")
+    llm_spans = spans.named("llm")
+    tool, = spans.named("tool web_search")
+    search, = spans.named("search")
+    assert len(llm_spans) == 2
+    assert all(span.parent_id == root.span_id for span in llm_spans + [tool])
+    assert search.parent_id == tool.span_id
+    assert {span.trace_id for span in spans.spans} == {root.trace_id}
+    assert llm_spans[0].attributes["gen_ai.usage.input_tokens"] > 0
+    assert llm_spans[0].attributes["gen_ai.usage.output_tokens"] > 0
+    assert "gen_ai.time_to_first_token" in llm_spans[0].attributes
+
+    metrics = get_metrics()
+    assert metrics.get_counter("llm_requests_total", model="scripted", status="ok") == 2
+    assert metrics.get_counter("agent_runs_total", mode="react", status="ok") == 1
+    assert metrics.get_histogram("agent_tool_duration_seconds", tool="web_search")["count"] == 1
+
+
+def test_metrics_endpoint():
+    """The server should expose the metrics in the Prometheus text format."""
+    from fastapi.testclient import TestClient
+    from server import create_app
+    from test_server import ScriptedAgentPool
+
+    get_metrics().clear()
+    get_metrics().inc("cache_hits_total", cache="answer")
+    with TestClient(create_app(agent_pool=ScriptedAgentPool())) as client:
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'cache_hits_total{cache="answer"} 1' in response.text
+
+
+if __name__ == "__main__":
+    test_spans_nest_and_export()
+    test_prometheus_rendering()
+    test_traced_search_records_cache_hits()
+    test_retries_are_recorded()
+    test_agent_run_is_traced()
+    test_metrics_endpoint()
+    print("=== Tracing Tests Complete ===")
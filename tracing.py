@@ -0,0 +1,379 @@
+# tracing.py
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import TRACING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+_current_span: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    One timed step of a request: an agent run, an LLM call, a tool call or a search.
+
+    Spans started while another span is current (in the same thread or
+    asyncio task) become its children and share its trace id.
+    """
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns",
+                 "attributes", "events", "error", "_started")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, kind: str = "INTERNAL",
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Tuple[int, str, Dict[str, Any]]] = []
+        self.error: Optional[str] = None
+        self._started = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        """Record something that happened during the span, e.g. a cache hit or a retry."""
+        self.events.append((time.time_ns(), name, dict(attributes or {})))
+
+    def record_error(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    @property
+    def duration(self) -> float:
+        """Seconds since the span started, or its total duration once ended."""
+        if self.end_ns is not None:
+            return (self.end_ns - self.start_ns) / 1e9
+        return time.perf_counter() - self._started
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Encode the span as an OTLP/JSON span."""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": f"SPAN_KIND_{self.kind}",
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": "STATUS_CODE_ERROR", "message": self.error} if self.error else {"code": "STATUS_CODE_OK"},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.events:
+            span["events"] = [
+                {"timeUnixNano": str(timestamp), "name": name, "attributes": _otlp_attributes(attributes)}
+                for timestamp, name, attributes in self.events
+            ]
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class JsonlSpanExporter:
+    """
+    Appends finished spans to a file, one OTLP/JSON export request per line.
+
+    This is the format of the OpenTelemetry Collector's file exporter, so the
+    file can be replayed into any OTLP backend (e.g. with the collector's
+    ``otlpjsonfile`` receiver) or read with a few lines of Python. Spans are
+    written by a background thread so tracing never blocks on disk I/O.
+    """
+
+    def __init__(self, path: str, service_name: str = "ollama-search-agent"):
+        self.path = path
+        self.service_name = service_name
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    self._writer = threading.Thread(target=self._write_spans, name="span-exporter", daemon=True)
+                    self._writer.start()
+                    atexit.register(self.flush)
+        self._queue.put(span)
+
+    def _line(self, span: Span) -> str:
+        return json.dumps({"resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+            "scopeSpans": [{"scope": {"name": "ollama-search-agent"}, "spans": [span.to_otlp()]}],
+        }]}, ensure_ascii=False)
+
+    def _write_spans(self):
+        while True:
+            # Write everything that finished in the meantime with one open file
+            spans = [self._queue.get()]
+            while True:
+                try:
+                    spans.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(self._line(span) + "\n" for span in spans))
+            except OSError as e:
+                logger.warning("Failed to write spans to %s: %s", self.path, e)
+            finally:
+                for _ in spans:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Wait until every exported span has been written."""
+        if self._writer is not None:
+            self._queue.join()
+
+
+class Tracer:
+    """Creates spans, tracks the current span per thread/task and hands finished spans to the exporter."""
+
+    def __init__(self, exporter: Optional[JsonlSpanExporter] = None):
+        self.exporter = exporter
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None, kind: str = "INTERNAL",
+                   parent: Optional[Span] = None) -> Span:
+        """
+        Start a span without making it current.
+
+        Args:
+            name: Span name
+            attributes: Initial attributes
+            kind: OpenTelemetry span kind (INTERNAL, CLIENT or SERVER)
+            parent: Parent span; defaults to the current span
+
+        Returns:
+            Span: The started span; pass it to ``end_span`` when the step is done
+        """
+        return Span(name, parent if parent is not None else _current_span.get(), kind, attributes)
+
+    def end_span(self, span: Span):
+        if span.end_ns is not None:
+            return
+        span.end_ns = span.start_ns + int((time.perf_counter() - span._started) * 1e9)
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None, kind: str = "INTERNAL") -> Iterator[Span]:
+        """
+        Run a block of code as a span that is current while the block runs.
+
+        Errors raised in the block are recorded on the span and re-raised.
+        """
+        span = self.start_span(name, attributes, kind)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+
+def current_span() -> Optional[Span]:
+    """Get the span of the step running in this thread or asyncio task, if any."""
+    return _current_span.get()
+
+
+def set_current_span(span: Optional[Span]):
+    """Make a span current for code that starts and ends spans from callbacks rather than a ``with`` block."""
+    _current_span.set(span)
+
+
+def add_event(name: str, **attributes):
+    """Add an event to the current span; does nothing outside a span."""
+    span = _current_span.get()
+    if span is not None:
+        span.add_event(name, attributes)
+
+
+def set_attribute(key: str, value: Any):
+    """Set an attribute on the current span; does nothing outside a span."""
+    span = _current_span.get()
+    if span is not None:
+        span.set_attribute(key, value)
+
+
+# Histogram bucket bounds in seconds, from cache hits to slow LLM generations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+METRIC_HELP = {
+    "agent_runs_total": ("counter", "Agent runs by mode and outcome"),
+    "agent_run_duration_seconds": ("histogram", "Agent run duration, including answer cache hits"),
+    "agent_tool_duration_seconds": ("histogram", "Duration of agent tool calls"),
+    "llm_requests_total": ("counter", "LLM calls by model and outcome"),
+    "llm_request_duration_seconds": ("histogram", "LLM call duration"),
+    "llm_time_to_first_token_seconds": ("histogram", "Time until a streaming LLM call produced its first token"),
+    "llm_tokens_total": ("counter", "LLM tokens by direction (input or output)"),
+    "search_requests_total": ("counter", "Searches by engine and outcome"),
+    "search_request_duration_seconds": ("histogram", "Search duration by engine, including result cache hits"),
+    "search_retries_total": ("counter", "Search requests retried after a transient error"),
+    "search_circuit_opened_total": ("counter", "Times an engine's circuit breaker opened"),
+    "cache_hits_total": ("counter", "Cache hits by cache"),
+}
+
+
+def _label_key(labels: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class MetricsRegistry:
+    """Process-wide counters and latency histograms, rendered in the Prometheus text format."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._histograms: Dict[str, Dict[Tuple, List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Add to a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record one observation (usually a duration in seconds) in a histogram."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            # Per-bucket counts, then sum and count
+            data = series.get(key)
+            if data is None:
+                data = series[key] = [0.0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[index] += 1
+                    break
+            data[-2] += value
+            data[-1] += 1
+
+    def get_counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def get_histogram(self, name: str, **labels) -> Dict[str, float]:
+        """Get the count and sum of a histogram series."""
+        with self._lock:
+            data = self._histograms.get(name, {}).get(_label_key(labels))
+            return {"count": data[-1], "sum": data[-2]} if data else {"count": 0, "sum": 0.0}
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def _header(self, name: str, default_type: str) -> List[str]:
+        metric_type, help_text = METRIC_HELP.get(name, (default_type, name))
+        return [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+
+    def render(self) -> str:
+        """Render all metrics, plus the engines' decayed latency percentiles, in the Prometheus text format."""
+        lines: List[str] = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {key: list(data) for key, data in series.items()}
+                          for name, series in self._histograms.items()}
+
+        for name, series in sorted(counters.items()):
+            lines += self._header(name, "counter")
+            lines += [f"{name}{_format_labels(key)} {value:g}" for key, value in sorted(series.items())]
+
+        for name, series in sorted(histograms.items()):
+            lines += self._header(name, "histogram")
+            for key, data in sorted(series.items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, data):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', f'{bound:g}'),))} {cumulative:g}")
+                lines.append(f"{name}_bucket{_format_labels(key + (('le', '+Inf'),))} {data[-1]:g}")
+                lines.append(f"{name}_sum{_format_labels(key)} {data[-2]:.6f}")
+                lines.append(f"{name}_count{_format_labels(key)} {data[-1]:g}")
+
+        # Recent per-engine latencies, as also used for hedging
+        from search_engines import get_latency_stats
+        latency_stats = get_latency_stats()
+        if latency_stats:
+            lines += ["# HELP search_engine_latency_seconds Recent search latency percentiles per engine",
+                      "# TYPE search_engine_latency_seconds summary"]
+            for engine_name, stats in latency_stats.items():
+                for quantile in ("p50", "p95", "p99"):
+                    if stats[quantile] is not None:
+                        labels = (("engine", engine_name), ("quantile", f"0.{quantile[1:]}"))
+                        lines.append(f"search_engine_latency_seconds{_format_labels(labels)} {stats[quantile]:.6f}")
+                lines.append(f"search_engine_latency_seconds_count{_format_labels((('engine', engine_name),))} "
+                             f"{stats['count']:g}")
+        return "\n".join(lines) + "\n"
+
+
+_tracer: Optional[Tracer] = None
+_metrics = MetricsRegistry()
+_tracer_lock = threading.Lock()
+
+
+def tracing_enabled() -> bool:
+    """Check whether steps should be instrumented (for span export, metrics or both)."""
+    return TRACING_CONFIG["enabled"] or TRACING_CONFIG["metrics_enabled"]
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer; spans are exported only when TRACING_ENABLED is set."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                exporter = None
+                if TRACING_CONFIG["enabled"]:
+                    exporter = JsonlSpanExporter(TRACING_CONFIG["path"], TRACING_CONFIG["service_name"])
+                _tracer = Tracer(exporter)
+    return _tracer
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    return _metrics